@@ -0,0 +1,183 @@
+"""Checkpoint stores for resumable flows.
+
+Stores persist the progress of flow instances (step, ids picked up along the
+way and the last seen record state) so that a flow interrupted by a controller
+restart can be resumed with FlowScheduler.resume instead of started over.
+"""
+
+import json
+import os
+from pathlib import Path
+import sqlite3
+from typing import Any, Dict, List, Mapping, Optional, Protocol, Union
+
+from .flows import FlowState
+
+
+def _checkpoint(state: FlowState) -> Dict[str, Any]:
+    """Return a JSON serializable checkpoint of a flow state.
+
+    Context values that cannot be serialized, such as records and selectors, are
+    not checkpointed; they are recovered from the admin API or passed in again
+    on resume.
+    """
+    context = {}
+    for key, value in state.context.items():
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            continue
+        context[key] = value
+
+    return {
+        "id": state.id,
+        "flow": state.flow,
+        "step": state.step,
+        "last_state": state.last_state,
+        "taken": list(state.taken),
+        "context": context,
+    }
+
+
+def _restore(checkpoint: Mapping[str, Any]) -> FlowState:
+    """Return the flow state recorded by a checkpoint."""
+    return FlowState(
+        flow=checkpoint["flow"],
+        context=dict(checkpoint["context"]),
+        step=checkpoint["step"],
+        id=checkpoint["id"],
+        last_state=checkpoint.get("last_state"),
+        taken=list(checkpoint.get("taken", [])),
+    )
+
+
+class CheckpointStore(Protocol):
+    """Persistent store of flow checkpoints."""
+
+    def save(self, state: FlowState):
+        """Record the progress of a flow instance."""
+        ...
+
+    def complete(self, state: FlowState):
+        """Record that a flow instance has finished."""
+        ...
+
+    def load(self, id: str) -> Optional[FlowState]:
+        """Return the last checkpoint of an unfinished flow instance."""
+        ...
+
+    def pending(self, flow: Optional[str] = None) -> List[FlowState]:
+        """Return the last checkpoints of unfinished flow instances."""
+        ...
+
+
+class JsonLinesCheckpointStore:
+    """Checkpoint store appending checkpoints to a JSON lines file.
+
+    Each save appends a line, so writes are cheap and a crash can lose at most
+    the line being written. Call compact to drop superseded lines.
+    """
+
+    def __init__(self, path: Union[str, Path], *, fsync: bool = False):
+        """Initialize the store, loading checkpoints already in the file."""
+        self.path = Path(path)
+        self.fsync = fsync
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with self.path.open() as file:
+                for line in file:
+                    try:
+                        checkpoint = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Partially written final line
+                        continue
+                    if checkpoint.get("done"):
+                        self._pending.pop(checkpoint["id"], None)
+                    else:
+                        self._pending[checkpoint["id"]] = checkpoint
+
+    def _append(self, checkpoint: Mapping[str, Any]):
+        with self.path.open("a") as file:
+            file.write(json.dumps(checkpoint) + "\n")
+            if self.fsync:
+                file.flush()
+                os.fsync(file.fileno())
+
+    def save(self, state: FlowState):
+        """Record the progress of a flow instance."""
+        checkpoint = _checkpoint(state)
+        self._pending[state.id] = checkpoint
+        self._append(checkpoint)
+
+    def complete(self, state: FlowState):
+        """Record that a flow instance has finished."""
+        self._pending.pop(state.id, None)
+        self._append({"id": state.id, "done": True})
+
+    def load(self, id: str) -> Optional[FlowState]:
+        """Return the last checkpoint of an unfinished flow instance."""
+        checkpoint = self._pending.get(id)
+        return _restore(checkpoint) if checkpoint else None
+
+    def pending(self, flow: Optional[str] = None) -> List[FlowState]:
+        """Return the last checkpoints of unfinished flow instances."""
+        return [
+            _restore(checkpoint)
+            for checkpoint in self._pending.values()
+            if flow is None or checkpoint["flow"] == flow
+        ]
+
+    def compact(self):
+        """Rewrite the file with only the checkpoints of unfinished flows."""
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp.open("w") as file:
+            for checkpoint in self._pending.values():
+                file.write(json.dumps(checkpoint) + "\n")
+        tmp.replace(self.path)
+
+
+class SQLiteCheckpointStore:
+    """Checkpoint store keeping the latest checkpoint of each flow in SQLite."""
+
+    def __init__(self, path: Union[str, Path]):
+        """Initialize the store."""
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints "
+            "(id TEXT PRIMARY KEY, flow TEXT NOT NULL, checkpoint TEXT NOT NULL)"
+        )
+        self.conn.commit()
+
+    def save(self, state: FlowState):
+        """Record the progress of a flow instance."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO checkpoints (id, flow, checkpoint) VALUES (?, ?, ?)",
+            (state.id, state.flow, json.dumps(_checkpoint(state))),
+        )
+        self.conn.commit()
+
+    def complete(self, state: FlowState):
+        """Record that a flow instance has finished."""
+        self.conn.execute("DELETE FROM checkpoints WHERE id = ?", (state.id,))
+        self.conn.commit()
+
+    def load(self, id: str) -> Optional[FlowState]:
+        """Return the last checkpoint of an unfinished flow instance."""
+        row = self.conn.execute(
+            "SELECT checkpoint FROM checkpoints WHERE id = ?", (id,)
+        ).fetchone()
+        return _restore(json.loads(row[0])) if row else None
+
+    def pending(self, flow: Optional[str] = None) -> List[FlowState]:
+        """Return the last checkpoints of unfinished flow instances."""
+        if flow is None:
+            rows = self.conn.execute("SELECT checkpoint FROM checkpoints")
+        else:
+            rows = self.conn.execute(
+                "SELECT checkpoint FROM checkpoints WHERE flow = ?", (flow,)
+            )
+        return [_restore(json.loads(row[0])) for row in rows]
+
+    def close(self):
+        """Close the database."""
+        self.conn.close()
@@ -1,17 +1,26 @@
 """ACA-Py Controller."""
 
 import asyncio
-from contextlib import AsyncExitStack
+from contextlib import AsyncExitStack, asynccontextmanager
+from contextvars import ContextVar
 from dataclasses import asdict, dataclass, field, fields, is_dataclass
 import dataclasses
+from functools import lru_cache
 import json
 import logging
-from json import dumps
+from json import dumps, loads
+import time
 from types import TracebackType
 from typing import (
+    TYPE_CHECKING,
     Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
     ClassVar,
     Dict,
+    FrozenSet,
+    List,
     Literal,
     Mapping,
     Optional,
@@ -27,16 +36,78 @@ from typing import (
     get_origin,
 )
 
-from aiohttp import ClientResponse, ClientSession
+from aiohttp import ClientError, ClientResponse, ClientSession, ClientTimeout
 from async_selective_queue import Select
 
-from .events import Event, EventQueue, Queue
+from .deadlines import budget, current_deadline, current_step
+from .events import (
+    CompactPayload,
+    Event,
+    EventQueue,
+    FanOutQueue,
+    LazyPayload,
+    Overflow,
+    Queue,
+    RECORD_ID_KEYS,
+    RecordState,
+    Subscription,
+    last_seq,
+    matches,
+    record_key,
+)
+
+if TYPE_CHECKING:
+    from .journal import EventJournal
+    from .lag import LagMonitor
+    from .limits import AdaptiveConcurrency, CircuitBreaker
+    from .retry import RetryPolicy
+
+try:
+    from pydantic import BaseModel as PydanticBaseModel, TypeAdapter
+except ImportError:
+    PydanticBaseModel = None
+    TypeAdapter = None
 
 
 LOGGER = logging.getLogger(__name__)
 T = TypeVar("T")
 
 
+@dataclass(frozen=True)
+class _Write:
+    """Write request awaiting the event it causes, for response lag.
+
+    sent is the POSIX time the request was sent, since the event cursor at that
+    time and record_ids the ids of the records in its response.
+    """
+
+    sent: float
+    since: int
+    record_ids: FrozenSet[str]
+
+
+# The last write request of the current task, until an event it caused arrives
+_last_write: ContextVar[Optional[_Write]] = ContextVar("last_write", default=None)
+
+_RECORD_ID_FIELDS = frozenset(RECORD_ID_KEYS.values())
+
+
+def _record_ids(body: bytes) -> FrozenSet[str]:
+    """Return the ids of the records in a response, at the top or one level down."""
+    try:
+        value = loads(body) if body else None
+    except ValueError:
+        return frozenset()
+    if not isinstance(value, dict):
+        return frozenset()
+    ids = set()
+    for item in (value, *(item for item in value.values() if isinstance(item, dict))):
+        for key in _RECORD_ID_FIELDS:
+            if isinstance(item.get(key), str):
+                ids.add(item[key])
+    return frozenset(ids)
+
+
 @runtime_checkable
 class Serde(Protocol):
     """Object supporting serialization and deserialization methods."""
@@ -73,27 +144,97 @@ def _serialize(value: Serializable):
     raise TypeError(f"Could not serialize value {value}")
 
 
+def _is_pydantic_type(as_type: Any) -> bool:
+    """Return whether as_type is a pydantic model or a list of pydantic models."""
+    if PydanticBaseModel is None:
+        return False
+    if get_origin(as_type) is list:
+        args = get_args(as_type)
+        return bool(args) and _is_pydantic_type(args[0])
+    return isinstance(as_type, type) and issubclass(as_type, PydanticBaseModel)
+
+
+@lru_cache(maxsize=None)
+def _type_adapter(as_type: Any) -> "TypeAdapter[Any]":
+    """Return a cached TypeAdapter for as_type.
+
+    Building a TypeAdapter compiles a validator for the type, which is much more
+    expensive than using one; adapters are built once per target type.
+    """
+    assert TypeAdapter is not None
+    return TypeAdapter(as_type)
+
+
+def _construct(value: Any, as_type: Any) -> Any:
+    """Construct pydantic models from trusted values without validation.
+
+    Fields holding models, lists or dicts of models, including optional ones, are
+    constructed recursively from the model's field annotations; other values are
+    kept as they are.
+    """
+    origin = get_origin(as_type)
+    args = get_args(as_type)
+    if origin is list and isinstance(value, list):
+        return [_construct(item, args[0]) for item in value] if args else value
+    if origin is dict and isinstance(value, dict):
+        if len(args) < 2:
+            return value
+        return {key: _construct(item, args[1]) for key, item in value.items()}
+    if args and origin not in (list, dict):
+        # Union or Optional; use the first member the value has the shape of
+        for arg in args:
+            if _is_pydantic_type(arg) and isinstance(value, dict):
+                return _construct(value, arg)
+            if get_origin(arg) in (list, dict) and isinstance(value, get_origin(arg)):
+                return _construct(value, arg)
+        return value
+    if _is_pydantic_type(as_type) and isinstance(value, dict):
+        return _construct_model(value, as_type)
+    return value
+
+
+def _construct_model(value: Dict[str, Any], as_type: Any) -> Any:
+    """Construct a pydantic model and its nested fields without validation."""
+    values = dict(value)
+    for name, info in as_type.model_fields.items():
+        key = info.alias if info.alias in values else name
+        if key in values:
+            values[key] = _construct(values[key], info.annotation)
+    return as_type.model_construct(**values)
+
+
 @overload
-def _deserialize(value: Any) -> Mapping[str, Any]: ...
+def _deserialize(value: Any, *, trusted: bool = False) -> Mapping[str, Any]: ...
 
 
 @overload
-def _deserialize(value: Any, as_type: Type[T]) -> T: ...
+def _deserialize(value: Any, as_type: Type[T], *, trusted: bool = False) -> T: ...
 
 
 @overload
-def _deserialize(value: Any, as_type: None) -> Mapping[str, Any]: ...
+def _deserialize(
+    value: Any, as_type: None, *, trusted: bool = False
+) -> Mapping[str, Any]: ...
+
 
+def _deserialize(
+    value: Any, as_type: Optional[Type[T]] = None, *, trusted: bool = False
+) -> Union[T, Any]:
+    """Deserialize value.
 
-def _deserialize(value: Any, as_type: Optional[Type[T]] = None) -> Union[T, Any]:
-    """Deserialize value."""
+    If trusted is set, pydantic models are constructed without validation.
+    """
     if value is None:
         return None
     if as_type is None:
         return value
+    if _is_pydantic_type(as_type):
+        if trusted:
+            return _construct(value, as_type)
+        return _type_adapter(as_type).validate_python(value)
     if get_origin(as_type) is list:
         args = get_args(as_type)
-        return [_deserialize(item, args[0]) for item in value]
+        return [_deserialize(item, args[0], trusted=trusted) for item in value]
     if issubclass(as_type, Serde):
         return as_type.deserialize(value)
     if is_dataclass(as_type):
@@ -103,6 +244,37 @@ def _deserialize(value: Any, as_type: Optional[Type[T]] = None) -> Union[T, Any]
     raise TypeError(f"Could not deserialize value into type {as_type.__name__}")
 
 
+def _deserialize_json(
+    raw: bytes, as_type: Optional[Type[T]] = None, *, trusted: bool = False
+) -> Union[T, Any]:
+    """Deserialize a raw JSON document.
+
+    Pydantic targets are validated directly from the raw bytes, skipping the
+    intermediate dictionary.
+    """
+    if as_type is not None and not trusted and _is_pydantic_type(as_type):
+        return _type_adapter(as_type).validate_json(raw)
+    return _deserialize(loads(raw), as_type, trusted=trusted)
+
+
+def _deserialize_event(
+    event: Event, as_type: Optional[Type[T]] = None, *, trusted: bool = False
+) -> Union[T, Any]:
+    """Deserialize the payload of an event.
+
+    Payloads not yet decoded are deserialized directly from their raw JSON.
+    Compact payloads are returned as plain dictionaries and lists.
+    """
+    payload = event.payload
+    if isinstance(payload, LazyPayload):
+        if as_type is None or payload.decoded:
+            return _deserialize(payload.data, as_type, trusted=trusted)
+        return _deserialize_json(payload.raw.encode(), as_type, trusted=trusted)
+    if isinstance(payload, CompactPayload):
+        return _deserialize(payload.to_dict(), as_type, trusted=trusted)
+    return _deserialize(payload, as_type, trusted=trusted)
+
+
 MinType = TypeVar("MinType", bound="Minimal")
 S = TypeVar("S", bound=Serializable)
 
@@ -186,6 +358,11 @@ def omit_none(mapping: Mapping[str, Any] | None = None, **kwargs):
     return {key: value for key, value in mapping.items() if value is not None}
 
 
+def _after(select: Select[Event], since: int) -> Select[Event]:
+    """Return select restricted to events received after cursor since."""
+    return lambda event: event.seq > since and select(event)
+
+
 class ControllerError(Exception):
     """Raised on error in controller."""
 
@@ -194,6 +371,16 @@ class ControllerTimeoutError(ControllerError, asyncio.TimeoutError):
     """Raised on timout waiting for event."""
 
 
+class ControllerResponseError(ControllerError):
+    """Raised on an error response from the admin API."""
+
+    def __init__(self, message: str, status: int, headers: Mapping[str, str]):
+        """Initialize the error."""
+        super().__init__(message)
+        self.status = status
+        self.headers = headers
+
+
 class Controller:
     """ACA-Py Controller."""
 
@@ -207,21 +394,71 @@ class Controller:
         wallet_type: Optional[str] = None,
         headers: Optional[Mapping[str, str]] = None,
         event_queue: Optional[Queue[Event]] = None,
+        trust_responses: bool = False,
+        request_timeout: Optional[float] = None,
+        event_timeout: Optional[float] = 5,
+        retry: Optional["RetryPolicy"] = None,
+        concurrency: Optional["AdaptiveConcurrency"] = None,
+        breaker: Optional["CircuitBreaker"] = None,
+        session: Optional[ClientSession] = None,
+        fast_setup: bool = False,
+        journal: Optional["EventJournal"] = None,
+        lag: Optional["LagMonitor"] = None,
     ):
-        """Initialize and ACA-Py Controller."""
+        """Initialize and ACA-Py Controller.
+
+        If trust_responses is set, responses and events deserialized into pydantic
+        models are constructed without validation.
+
+        request_timeout and event_timeout are the default seconds allowed for
+        admin API requests and event waits; None means no limit. Calls made under
+        a deadline are further limited to the time remaining before it.
+
+        retry is the policy used to retry transient request failures; requests
+        are not retried without one. concurrency adaptively limits the requests
+        in flight to the agent and breaker fails requests fast while the agent
+        is unhealthy. Share these between controllers for the same agent.
+
+        If session is set, requests are made through it instead of a new client
+        session per request; the caller is responsible for closing it.
+
+        If fast_setup is set, setup returns without waiting on the agent: the
+        label is taken from the settings event whenever the WS attaches, unless
+        passed in, and the wallet type is fetched on first need, unless passed
+        in. Requests other than GETs wait for the WS to attach so that the events
+        they cause are not missed.
+
+        If journal is set, every event received on the WS is appended to it.
+        If lag is set, event delivery lag and the time from write requests to
+        the first awaited event about a record in their response are recorded
+        in it.
+        """
         self.base_url = base_url
         self.label = label or "ACA-Py"
+        self._label_given = label is not None
         self.headers = dict(headers or {})
 
         if wallet_id and not subwallet_token:
             raise ValueError("subwallet_token required when wallet_id is set")
         self.wallet_id = wallet_id
         self.subwallet_token = subwallet_token
+        self.wallet_type = wallet_type
         if subwallet_token:
             self.headers["Authorization"] = f"Bearer {subwallet_token}"
         self._event_queue: Optional[Queue[Event]] = event_queue
+        self.trust_responses = trust_responses
+        self.request_timeout = request_timeout
+        self.event_timeout = event_timeout
+        self.retry = retry
+        self.concurrency = concurrency
+        self.breaker = breaker
+        self.session = session
+        self.fast_setup = fast_setup
+        self.journal = journal
+        self.lag = lag
 
         self._stack: Optional[AsyncExitStack] = None
+        self._attached: Optional[asyncio.Task] = None
 
     @property
     def is_subwallet(self) -> bool:
@@ -253,6 +490,12 @@ class Controller:
         self._stack = await AsyncExitStack().__aenter__()
         if not self._event_queue:
             self._event_queue = await self._stack.enter_async_context(EventQueue(self))
+            if self.fast_setup:
+                self._start_attach()
+                self._stack.callback(self._cancel_attach)
+
+        if self.fast_setup:
+            return self
 
         # Get settings
         settings = await self.record("settings")
@@ -263,17 +506,53 @@ class Controller:
         self.wallet_type = config["config"]["wallet.type"]
         return self
 
+    def _start_attach(self):
+        """Start waiting for the WS to attach."""
+        self._attached = asyncio.get_event_loop().create_task(self._attach())
+
+    def _cancel_attach(self):
+        if self._attached:
+            self._attached.cancel()
+
+    async def _attach(self):
+        """Wait for the WS to attach, taking the label from its settings event."""
+        settings = await self.event("settings")
+        if not self._label_given:
+            self.label = settings["label"]
+
+    async def _wait_attached(self):
+        """Wait for the WS to attach before a write.
+
+        If it does not attach in time, the wait starts over for the next write.
+        """
+        assert self._attached
+        try:
+            await asyncio.shield(self._attached)
+        except Exception as error:
+            self._start_attach()
+            raise ControllerError(
+                f"WS of {self.label} did not attach; no settings event received"
+            ) from error
+
+    async def get_wallet_type(self) -> str:
+        """Return the wallet type, fetching it from the agent on first need."""
+        if self.wallet_type is None:
+            config = await self.get("/status/config")
+            self.wallet_type = config["config"]["wallet.type"]
+        assert self.wallet_type
+        return self.wallet_type
+
     async def shutdown(self, exc_info: Optional[Tuple] = None):
         """Shutdown the controller."""
         if self._stack:
             await self._stack.__aexit__(*(exc_info or (None, None, None)))
 
-    async def _handle_response(
+    def _log_request(
         self,
         resp: ClientResponse,
         data: Optional[bytes] = None,
         json: Optional[Mapping[str, Any]] = None,
-    ) -> Mapping[str, Any]:
+    ):
         def _header_filter(headers: Mapping[str, str]):
             return {
                 key: value
@@ -307,18 +586,103 @@ class Controller:
                 resp.url.path_qs,
             )
 
-        if resp.ok and resp.content_type == "application/json":
-            body = await resp.json()
-            response_out = dumps(body, indent=2, sort_keys=True)
-            if response_out.count("\n") > 200:
-                response_out = dumps(body, sort_keys=True)
-            LOGGER.info("Response: %s", response_out)
-            return body
+    async def _check_response(
+        self, resp: ClientResponse, content_type: str = "application/json"
+    ):
+        """Raise an error if the response failed or has an unexpected content type."""
+        if resp.ok and resp.content_type == content_type:
+            return
 
         body = await resp.text()
         if resp.ok:
             raise ControllerError(f"Unexpected content type {resp.content_type}: {body}")
-        raise ControllerError(f"Request failed: {resp.url} {body}")
+        raise ControllerResponseError(
+            f"Request failed: {resp.url} {body}", resp.status, resp.headers
+        )
+
+    async def _handle_response(
+        self,
+        resp: ClientResponse,
+        data: Optional[bytes] = None,
+        json: Optional[Mapping[str, Any]] = None,
+        *,
+        raw: bool = False,
+    ) -> bytes:
+        self._log_request(resp, data, json)
+        await self._check_response(resp)
+
+        body = await resp.read()
+        if raw:
+            LOGGER.info("Response: %d bytes", len(body))
+        elif LOGGER.isEnabledFor(logging.INFO):
+            parsed = loads(body)
+            response_out = dumps(parsed, indent=2, sort_keys=True)
+            if response_out.count("\n") > 200:
+                response_out = dumps(parsed, sort_keys=True)
+            LOGGER.info("Response: %s", response_out)
+        return body
+
+    def _timeout_error(self, message: str) -> ControllerTimeoutError:
+        """Return a timeout error naming the step and deadline, if any."""
+        deadline = current_deadline()
+        step = current_step()
+        if deadline and deadline.expired:
+            name = f" {deadline.name}" if deadline.name else ""
+            message += f"\nDeadline{name} exhausted"
+            if step:
+                message += f" at step {step}"
+        elif step:
+            message += f"\nStep: {step}"
+        return ControllerTimeoutError(message)
+
+    def _budget(
+        self, timeout: Optional[float], default: Optional[float], what: str
+    ) -> Optional[float]:
+        """Return the seconds allowed for a call, raising if none remain."""
+        allowed = budget(default if timeout is None else timeout)
+        if allowed is not None and allowed <= 0:
+            raise self._timeout_error(f"{what} not started before timeout")
+        return allowed
+
+    async def healthy(self, timeout: float = 5) -> bool:
+        """Return whether the agent reports it is live and ready."""
+        try:
+            live = await self._request("GET", "/status/live", raw=True, timeout=timeout)
+            ready = await self._request("GET", "/status/ready", raw=True, timeout=timeout)
+        except (ControllerError, ClientError, asyncio.TimeoutError):
+            return False
+        return bool(loads(live).get("alive") and loads(ready).get("ready"))
+
+    async def _guarded(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        """Make a request attempt under the circuit breaker and concurrency limit."""
+        if self.breaker:
+            await self.breaker.allow(self.healthy)
+        token = await self.concurrency.acquire() if self.concurrency else 0
+
+        start = time.monotonic()
+        latency: Optional[float] = None
+        error: Optional[BaseException] = None
+        try:
+            return await attempt()
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            if not isinstance(error, asyncio.CancelledError):
+                latency = time.monotonic() - start
+            if self.concurrency:
+                await self.concurrency.release(token, latency, error)
+            if self.breaker and latency is not None:
+                self.breaker.record(error)
+
+    @asynccontextmanager
+    async def _client_session(self) -> AsyncIterator[ClientSession]:
+        """Return a client session for requests to the admin API."""
+        if self.session:
+            yield self.session
+            return
+        async with ClientSession(base_url=self.base_url, headers=self.headers) as session:
+            yield session
 
     async def request(
         self,
@@ -330,18 +694,72 @@ class Controller:
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
         response: Optional[Type[T]] = None,
+        timeout: Optional[float] = None,
+        retry: Optional[bool] = None,
     ) -> Union[T, Mapping[str, Any]]:
-        """Make an HTTP request."""
-        async with ClientSession(base_url=self.base_url, headers=self.headers) as session:
+        """Make an HTTP request.
+
+        Passing response=bytes returns the raw response body without parsing it.
+        timeout overrides the controller's request_timeout for each attempt at
+        the request. retry overrides whether the controller's retry policy may
+        retry this request.
+        """
+        raw = response is bytes
+        what = f"Request {method} {url} to {self.label}"
+        if self._attached and method != "GET":
+            await self._wait_attached()
+        sent, since = time.time(), last_seq()
+
+        async def _attempt() -> bytes:
+            return await self._guarded(
+                lambda: self._request(
+                    method,
+                    url,
+                    data=data,
+                    json=json,
+                    params=params,
+                    headers=headers,
+                    raw=raw,
+                    timeout=self._budget(timeout, self.request_timeout, what),
+                )
+            )
+
+        try:
+            if self.retry:
+                body = await self.retry.call(method, url, _attempt, retry=retry)
+            else:
+                body = await _attempt()
+        except asyncio.TimeoutError:
+            raise self._timeout_error(f"{what} timed out") from None
+
+        if self.lag and method != "GET":
+            _last_write.set(_Write(sent, since, _record_ids(body)))
+        if raw:
+            return cast(T, body)
+        return _deserialize_json(body, response, trusted=self.trust_responses)
+
+    async def _request(
+        self,
+        method: Literal["GET", "POST", "PUT", "DELETE"],
+        url: str,
+        *,
+        data: Optional[bytes] = None,
+        json: Optional[Serializable] = None,
+        params: Optional[Mapping[str, Any]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        raw: bool = False,
+        timeout: Optional[float] = None,
+    ) -> bytes:
+        options = {"timeout": ClientTimeout(total=timeout)} if timeout is not None else {}
+        async with self._client_session() as session:
             headers = dict(headers or {})
             headers.update(self.headers)
 
             if method == "GET" or method == "DELETE":
                 async with session.request(
-                    method, url, params=params, headers=headers
+                    method, url, params=params, headers=headers, **options
                 ) as resp:
-                    body = await self._handle_response(resp)
-                    value = _deserialize(body, response)
+                    body = await self._handle_response(resp, raw=raw)
 
             elif method == "POST" or method == "PUT":
                 json_ = _serialize(json)
@@ -349,14 +767,70 @@ class Controller:
                     json_ = {}
 
                 async with session.request(
-                    method, url, data=data, json=json_, params=params
+                    method,
+                    url,
+                    data=data,
+                    json=json_,
+                    params=params,
+                    headers=headers,
+                    **options,
                 ) as resp:
-                    body = await self._handle_response(resp, data=data, json=json_)
-                    value = _deserialize(body, response)
+                    body = await self._handle_response(
+                        resp, data=data, json=json_, raw=raw
+                    )
             else:
                 raise ValueError(f"Unsupported method {method}")
 
-        return value
+        return body
+
+    async def stream(
+        self,
+        method: Literal["GET", "POST", "PUT", "DELETE"],
+        url: str,
+        *,
+        data: Optional[bytes] = None,
+        json: Optional[Serializable] = None,
+        params: Optional[Mapping[str, Any]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        content_type: str = "application/json",
+        chunk_size: int = 2**16,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[bytes]:
+        """Make an HTTP request and iterate over chunks of the raw response body.
+
+        The body is never parsed or buffered in full, making this suitable for
+        passing large responses (tails files, large record lists) onward. The
+        timeout covers the whole response, however slowly it is consumed.
+        """
+        what = f"Request {method} {url} to {self.label}"
+        timeout = self._budget(timeout, self.request_timeout, what)
+        if method in ("POST", "PUT"):
+            json_ = _serialize(json)
+            if not data and json_ is None:
+                json_ = {}
+        else:
+            json_ = None
+
+        options = {"timeout": ClientTimeout(total=timeout)} if timeout is not None else {}
+        async with self._client_session() as session:
+            headers = dict(headers or {})
+            headers.update(self.headers)
+            try:
+                async with session.request(
+                    method,
+                    url,
+                    data=data,
+                    json=json_,
+                    params=params,
+                    headers=headers,
+                    **options,
+                ) as resp:
+                    self._log_request(resp, data, json_)
+                    await self._check_response(resp, content_type)
+                    async for chunk in resp.content.iter_chunked(chunk_size):
+                        yield chunk
+            except asyncio.TimeoutError:
+                raise self._timeout_error(f"{what} timed out") from None
 
     @overload
     async def get(
@@ -365,6 +839,7 @@ class Controller:
         *,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
     ) -> Mapping[str, Any]: ...
 
     @overload
@@ -374,6 +849,7 @@ class Controller:
         *,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
         response: Type[T],
     ) -> T: ...
 
@@ -384,6 +860,7 @@ class Controller:
         *,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
         response: None,
     ) -> Mapping[str, Any]: ...
 
@@ -393,11 +870,12 @@ class Controller:
         *,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
         response: Optional[Type[T]] = None,
     ) -> Union[T, Mapping[str, Any]]:
         """HTTP Get."""
         return await self.request(
-            "GET", url, params=params, headers=headers, response=response
+            "GET", url, params=params, headers=headers, response=response, timeout=timeout
         )
 
     @overload
@@ -407,6 +885,7 @@ class Controller:
         *,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
     ) -> Mapping[str, Any]: ...
 
     @overload
@@ -416,6 +895,7 @@ class Controller:
         *,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
         response: None,
     ) -> Mapping[str, Any]: ...
 
@@ -426,6 +906,7 @@ class Controller:
         *,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
         response: Type[T],
     ) -> T: ...
 
@@ -435,11 +916,17 @@ class Controller:
         *,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
         response: Optional[Type[T]] = None,
     ) -> Union[T, Mapping[str, Any]]:
         """HTTP Delete."""
         return await self.request(
-            "DELETE", url, params=params, headers=headers, response=response
+            "DELETE",
+            url,
+            params=params,
+            headers=headers,
+            response=response,
+            timeout=timeout,
         )
 
     @overload
@@ -451,6 +938,7 @@ class Controller:
         json: Optional[Serializable] = None,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
     ) -> Mapping[str, Any]: ...
 
     @overload
@@ -462,6 +950,7 @@ class Controller:
         json: Optional[Serializable] = None,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
         response: Type[T],
     ) -> T: ...
 
@@ -474,6 +963,7 @@ class Controller:
         json: Optional[Serializable] = None,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
         response: None = None,
     ) -> Mapping[str, Any]: ...
 
@@ -485,6 +975,7 @@ class Controller:
         json: Optional[Serializable] = None,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
         response: Optional[Type[T]] = None,
     ) -> Union[T, Mapping[str, Any]]:
         """HTTP POST."""
@@ -496,6 +987,7 @@ class Controller:
             params=params,
             headers=headers,
             response=response,
+            timeout=timeout,
         )
 
     @overload
@@ -507,6 +999,7 @@ class Controller:
         json: Optional[Serializable] = None,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
     ) -> Mapping[str, Any]: ...
 
     @overload
@@ -518,6 +1011,7 @@ class Controller:
         json: Optional[Serializable] = None,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
         response: None,
     ) -> Mapping[str, Any]: ...
 
@@ -530,6 +1024,7 @@ class Controller:
         json: Optional[Serializable] = None,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
         response: Type[T],
     ) -> T: ...
 
@@ -541,6 +1036,7 @@ class Controller:
         json: Optional[Serializable] = None,
         params: Optional[Mapping[str, Any]] = None,
         headers: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = None,
         response: Optional[Type[T]] = None,
     ) -> Union[T, Mapping[str, Any]]:
         """HTTP Put."""
@@ -552,8 +1048,81 @@ class Controller:
             params=params,
             headers=headers,
             response=response,
+            timeout=timeout,
         )
 
+    async def paginate(
+        self,
+        url: str,
+        *,
+        params: Optional[Mapping[str, Any]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        response: Optional[Type[T]] = None,
+        page_size: int = 100,
+        prefetch: bool = False,
+        limit_param: str = "limit",
+        offset_param: str = "offset",
+        results_key: Optional[str] = "results",
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Union[T, Mapping[str, Any]]]:
+        """Iterate over the results of a paged list endpoint.
+
+        Pages are requested page_size results at a time using the limit_param and
+        offset_param query parameters, stopping at the first short page. Raises
+        ControllerError if a page has more than page_size results, as returned by
+        endpoints ignoring the parameters. Results
+        are deserialized into response as they are iterated over, so at most two
+        pages (when prefetch is set) are held in memory at once.
+
+        Most ACA-Py list endpoints accept limit and offset and wrap results in a
+        "results" key; others (like /credentials) use start and count, and
+        endpoints returning a bare list can be paged by setting results_key=None.
+        timeout applies to each page request.
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+
+        async def _page(offset: int) -> List[Any]:
+            body = await self.get(
+                url,
+                params={**(params or {}), limit_param: page_size, offset_param: offset},
+                headers=headers,
+                timeout=timeout,
+            )
+            page = cast(List[Any], body) if results_key is None else body[results_key]
+            if len(page) > page_size:
+                # The whole list again and again; offsets would never run out
+                raise ControllerError(
+                    f"{url} returned {len(page)} results for a page of {page_size}; "
+                    f"it does not support {limit_param} and {offset_param}"
+                )
+            return page
+
+        offset = 0
+        next_page: Optional[asyncio.Task] = None
+        try:
+            page = await _page(offset)
+            while True:
+                offset += len(page)
+                full = len(page) >= page_size
+                if full and prefetch:
+                    next_page = asyncio.ensure_future(_page(offset))
+
+                for item in page:
+                    yield _deserialize(item, response, trusted=self.trust_responses)
+
+                if not full:
+                    return
+
+                if next_page:
+                    page = await next_page
+                    next_page = None
+                else:
+                    page = await _page(offset)
+        finally:
+            if next_page:
+                next_page.cancel()
+
     @overload
     async def record(
         self,
@@ -615,7 +1184,7 @@ class Controller:
         topic: str,
         *,
         record_type: Optional[Type[T]] = None,
-        timeout: int = 5,
+        timeout: Optional[float] = None,
         **values,
     ) -> Union[T, Mapping[str, Any]]:
         """Get a record from an event with values matching those passed in.
@@ -626,11 +1195,83 @@ class Controller:
             topic, event_type=record_type, timeout=timeout, **values
         )
 
+    def mark(self) -> int:
+        """Return a cursor for waiting on events received from now on.
+
+        Pass the cursor as since to event waits to ignore older events, e.g.
+        stale events from an earlier step, without flushing the event queue.
+        """
+        return last_seq()
+
+    def record_state(self, topic: str, record_id: str) -> Optional[RecordState]:
+        """Return the latest state of a record seen in events, if known.
+
+        Use this to skip waiting for a state the record has already reached:
+
+            known = controller.record_state("connections", conn_id)
+            if not known or known.state != "active":
+                await controller.event_with_values(
+                    "connections", connection_id=conn_id, state="active"
+                )
+        """
+        queue = self.event_queue
+        if not isinstance(queue, FanOutQueue):
+            return None
+        return queue.latest(topic, record_id)
+
+    async def _wait(
+        self,
+        select: Select[Event],
+        what: str,
+        timeout: Optional[float],
+        since: Optional[int],
+        values: Optional[Tuple[str, Mapping[str, Any]]] = None,
+    ) -> Event:
+        """Await an event from the event queue.
+
+        values, the topic and payload values selected, lets a FanOutQueue serve
+        the wait from its waiter registry instead of testing select.
+        """
+        queue = self.event_queue
+        timeout = self._budget(timeout, self.event_timeout, what)
+        try:
+            if isinstance(queue, FanOutQueue) and values is not None:
+                topic, payload_values = values
+                event = await queue.wait(
+                    topic, payload_values, timeout=timeout, since=since
+                )
+            elif isinstance(queue, FanOutQueue):
+                event = await queue.get(select, timeout=timeout, since=since)
+            else:
+                if since is not None:
+                    select = _after(select, since)
+                event = await queue.get(select, timeout=timeout)  # type: ignore
+        except asyncio.TimeoutError:
+            raise self._timeout_error(f"{what}not received before timeout") from None
+
+        if self.lag:
+            self._record_response_lag(event)
+        return event
+
+    def _record_response_lag(self, event: Event):
+        """Record the response lag of an event caused by the last write, if it was."""
+        write = _last_write.get()
+        key = record_key(event)
+        if write and key and event.seq > write.since and key[1] in write.record_ids:
+            assert self.lag
+            self.lag.responded(
+                event.topic, event.payload.get("state"), event.received - write.sent
+            )
+            _last_write.set(None)
+
     @overload
     async def event(
         self,
         topic: str,
         select: Optional[Select[Event]] = None,
+        *,
+        timeout: Optional[float] = None,
+        since: Optional[int] = None,
     ) -> Mapping[str, Any]: ...
 
     @overload
@@ -640,6 +1281,8 @@ class Controller:
         select: Optional[Select[Event]] = None,
         *,
         event_type: None,
+        timeout: Optional[float] = None,
+        since: Optional[int] = None,
     ) -> Mapping[str, Any]: ...
 
     @overload
@@ -649,6 +1292,8 @@ class Controller:
         select: Optional[Select[Event]] = None,
         *,
         event_type: Type[T],
+        timeout: Optional[float] = None,
+        since: Optional[int] = None,
     ) -> T: ...
 
     async def event(
@@ -657,17 +1302,21 @@ class Controller:
         select: Optional[Select[Event]] = None,
         *,
         event_type: Optional[Type[T]] = None,
+        timeout: Optional[float] = None,
+        since: Optional[int] = None,
     ) -> Union[T, Mapping[str, Any]]:
-        """Await an event matching a given topic and condition."""
-        try:
-            event = await self.event_queue.get(
-                lambda event: event.topic == topic and (select(event) if select else True)
-            )
-        except asyncio.TimeoutError:
-            raise ControllerError(
-                f"Event from {self.label} with topic {topic} not received before timeout"
-            ) from None
-        return _deserialize(event.payload, event_type)
+        """Await an event matching a given topic and condition.
+
+        timeout overrides the controller's event_timeout for this wait. If since
+        is set, only events received after that cursor (see mark) match.
+        """
+        event = await self._wait(
+            lambda event: event.topic == topic and (select(event) if select else True),
+            f"Event from {self.label} with topic {topic} ",
+            timeout,
+            since,
+        )
+        return _deserialize_event(event, event_type, trusted=self.trust_responses)
 
     @overload
     async def event_with_values(
@@ -675,6 +1324,8 @@ class Controller:
         topic: str,
         *,
         event_type: Type[T],
+        timeout: Optional[float] = None,
+        since: Optional[int] = None,
         **values,
     ) -> T: ...
 
@@ -684,6 +1335,8 @@ class Controller:
         topic: str,
         *,
         event_type: None = None,
+        timeout: Optional[float] = None,
+        since: Optional[int] = None,
         **values,
     ) -> Mapping[str, Any]: ...
 
@@ -692,19 +1345,74 @@ class Controller:
         topic: str,
         *,
         event_type: Optional[Type[T]] = None,
-        timeout: int = 5,
+        timeout: Optional[float] = None,
+        since: Optional[int] = None,
         **values,
     ) -> Union[T, Mapping[str, Any]]:
-        """Await an event matching a given topic and set of values."""
-        try:
-            event = await self.event_queue.get(
-                lambda event: event.topic == topic
-                and all(event.payload.get(key) == value for key, value in values.items()),
-                timeout=timeout,
-            )
-        except asyncio.TimeoutError:
-            raise ControllerTimeoutError(
-                f"Record from {self.label} with topic {topic} and values\n\t{values}\n"
-                "not received before timeout"
-            ) from None
-        return _deserialize(event.payload, event_type)
+        """Await an event matching a given topic and set of values.
+
+        timeout overrides the controller's event_timeout for this wait. If since
+        is set, only events received after that cursor (see mark) match.
+        """
+        event = await self._wait(
+            lambda event: matches(event, topic, values),
+            f"Record from {self.label} with topic {topic} and values\n\t{values}\n",
+            timeout,
+            since,
+            (topic, values),
+        )
+        return _deserialize_event(event, event_type, trusted=self.trust_responses)
+
+    @overload
+    def subscribe(
+        self,
+        topic: str,
+        *,
+        event_type: Type[T],
+        maxsize: int = 1000,
+        overflow: Overflow = "drop-oldest",
+        **values,
+    ) -> Subscription[T]: ...
+
+    @overload
+    def subscribe(
+        self,
+        topic: str,
+        *,
+        event_type: None = None,
+        maxsize: int = 1000,
+        overflow: Overflow = "drop-oldest",
+        **values,
+    ) -> Subscription[Mapping[str, Any]]: ...
+
+    def subscribe(
+        self,
+        topic: str,
+        *,
+        event_type: Optional[Type[T]] = None,
+        maxsize: int = 1000,
+        overflow: Overflow = "drop-oldest",
+        **values,
+    ) -> Subscription[Any]:
+        """Subscribe to events matching a given topic and set of values.
+
+        Unlike event_with_values, a subscription observes every matching event
+        from now on without taking it from other waiters. Events are buffered,
+        up to maxsize, until iterated over; see Subscription for overflow.
+
+            async with controller.subscribe("connections", state="active") as conns:
+                async for conn in conns:
+                    ...
+        """
+        queue = self.event_queue
+        if not isinstance(queue, FanOutQueue):
+            raise ControllerError("Event queue does not support subscriptions")
+
+        return queue.subscribe(
+            lambda event: matches(event, topic, values),
+            lambda event: _deserialize_event(
+                event, event_type, trusted=self.trust_responses
+            ),
+            maxsize=maxsize,
+            overflow=overflow,
+        )
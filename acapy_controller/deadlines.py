@@ -0,0 +1,104 @@
+"""Deadlines for controller calls.
+
+A deadline bounds the total time spent on a sequence of admin API requests and
+event waits, such as a whole protocol flow. Deadlines are held in a context
+variable, so they propagate through any protocol helper and into tasks the
+helper starts. Each request and event wait is given the remaining budget (or its
+own timeout, if shorter).
+
+    with deadline(30, "issue credential"):
+        await indy_issue_credential_v2(issuer, holder, ...)
+
+Steps name the part of a flow in progress so that timeouts can report which
+step exhausted the budget.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+import time
+from typing import Iterator, Optional
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """Point in time by which a sequence of calls must complete."""
+
+    expires: float
+    name: Optional[str] = None
+
+    @classmethod
+    def after(cls, seconds: float, name: Optional[str] = None) -> "Deadline":
+        """Return a deadline expiring seconds from now."""
+        return cls(time.monotonic() + seconds, name)
+
+    def remaining(self) -> float:
+        """Return the seconds remaining before the deadline, if any."""
+        return max(self.expires - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        """Return whether the deadline has passed."""
+        return time.monotonic() >= self.expires
+
+
+_deadline: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+_step: ContextVar[Optional[str]] = ContextVar("step", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Return the deadline in effect, if any."""
+    return _deadline.get()
+
+
+def current_step() -> Optional[str]:
+    """Return the name of the step in progress, if any."""
+    return _step.get()
+
+
+@contextmanager
+def deadline(seconds: Optional[float], name: Optional[str] = None) -> Iterator[None]:
+    """Bound the calls made within the context to seconds from now.
+
+    Nested deadlines can only shorten the deadline in effect. Passing None leaves
+    the deadline in effect unchanged.
+    """
+    outer = _deadline.get()
+    if seconds is None:
+        yield
+        return
+
+    inner = Deadline.after(seconds, name)
+    if outer and outer.expires <= inner.expires:
+        inner = outer
+
+    token = _deadline.set(inner)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def step(name: str) -> Iterator[None]:
+    """Name the step in progress within the context."""
+    token = _step.set(name)
+    try:
+        yield
+    finally:
+        _step.reset(token)
+
+
+def budget(timeout: Optional[float]) -> Optional[float]:
+    """Return the time allowed for a call with the given timeout.
+
+    This is the lesser of timeout and the time remaining before the deadline in
+    effect; None means no limit.
+    """
+    current = _deadline.get()
+    if current is None:
+        return timeout
+    remaining = current.remaining()
+    if timeout is None:
+        return remaining
+    return min(timeout, remaining)
@@ -1,34 +1,765 @@
 """Event Listener."""
 
 import asyncio
+from bisect import bisect_right, insort
+from collections import Counter, OrderedDict, deque
 from contextlib import asynccontextmanager, suppress
+from functools import lru_cache
+import heapq
+from itertools import count
 import json
 import logging
-from typing import TYPE_CHECKING, Any, AsyncIterator, Mapping, Optional
+import re
+import sys
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
 from aiohttp import ClientSession, WSMsgType
-from async_selective_queue import AsyncSelectiveQueue as Queue
-from dataclasses import dataclass
+from async_selective_queue import AsyncSelectiveQueue as Queue, Select
+from dataclasses import dataclass, field
 
 if TYPE_CHECKING:
     from .controller import Controller
+    from .lag import LagMonitor
 
 LOGGER = logging.getLogger(__name__)
+T = TypeVar("T")
 
 
-@dataclass
+class _Sequence:
+    """Monotonically increasing event sequence numbers."""
+
+    def __init__(self):
+        self.last = 0
+
+    def next(self) -> int:
+        self.last += 1
+        return self.last
+
+
+_SEQUENCE = _Sequence()
+
+
+def last_seq() -> int:
+    """Return the sequence number of the last event received."""
+    return _SEQUENCE.last
+
+
+# String values that JSON encodes as themselves, so are found verbatim in raw JSON
+_PLAIN = re.compile(r"[ !#-.0-\[\]-~]*")
+
+
+@lru_cache(maxsize=None)
+def _plain_field(key: str) -> "re.Pattern[str]":
+    """Return a pattern matching key with a plain string value in raw JSON."""
+    return re.compile(rf'"{re.escape(key)}"\s*:\s*"({_PLAIN.pattern})"')
+
+
+class LazyPayload(Mapping[str, Any]):
+    """Event payload kept as raw JSON until first accessed.
+
+    Most events are never consumed, so decoding is deferred until the payload
+    is read. may_contain and peek answer cheap questions from the raw JSON
+    without decoding it.
+    """
+
+    __slots__ = ("_raw", "_data")
+
+    def __init__(self, raw: str):
+        """Initialize the payload from its raw JSON object."""
+        self._raw: Optional[str] = raw
+        self._data: Optional[Dict[str, Any]] = None
+
+    @property
+    def decoded(self) -> bool:
+        """Return whether the payload has been decoded."""
+        return self._data is not None
+
+    @property
+    def raw(self) -> str:
+        """Return the payload as JSON."""
+        return self._raw if self._raw is not None else json.dumps(self._data)
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """Return the decoded payload, decoding it if needed."""
+        if self._data is None:
+            assert self._raw is not None
+            self._data = json.loads(self._raw)
+            self._raw = None
+        return self._data
+
+    def __getitem__(self, key: str) -> Any:
+        """Return the value of key."""
+        return self.data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the keys of the payload."""
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        """Return the number of keys of the payload."""
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        """Return the payload as JSON, without decoding it."""
+        return self.raw
+
+    def may_contain(self, values: Mapping[str, Any]) -> bool:
+        """Return False if the payload surely does not contain values.
+
+        Only plain string values are checked against the raw JSON; True means
+        the payload must be decoded to tell.
+        """
+        if self._raw is None:
+            return True
+        for value in values.values():
+            if (
+                isinstance(value, str)
+                and _PLAIN.fullmatch(value)
+                and f'"{value}"' not in self._raw
+            ):
+                return False
+        return True
+
+    def peek(self, key: str) -> Any:
+        """Return the value of a top-level key, avoiding decoding if possible.
+
+        If key occurs once in the raw JSON with a plain string value, that value
+        is returned without decoding. This relies on the key being at the top
+        level when present at all, as is the case for the state, updated_at and
+        id fields of ACA-Py records.
+        """
+        if self._raw is not None:
+            count = self._raw.count(f'"{key}"')
+            if not count:
+                return None
+            if count == 1:
+                match = _plain_field(key).search(self._raw)
+                if match:
+                    return match.group(1)
+        return self.data.get(key)
+
+
+# Layouts of compact payloads, shared by payloads with the same keys
+_LAYOUTS: Dict[Tuple[str, ...], Dict[str, int]] = {}
+_MAX_LAYOUTS = 4096
+
+# Payload values repeated across many events, interned when compacted
+_INTERNED_VALUES = frozenset({"state", "rfc23_state", "role", "their_role", "initiator"})
+
+
+def _layout(keys: Tuple[str, ...]) -> Dict[str, int]:
+    """Return the shared key layout of payloads with keys."""
+    layout = _LAYOUTS.get(keys)
+    if layout is None:
+        layout = {sys.intern(key): index for index, key in enumerate(keys)}
+        if len(_LAYOUTS) < _MAX_LAYOUTS:
+            _LAYOUTS[tuple(layout)] = layout
+    return layout
+
+
+def _compact(key: Optional[str], value: Any) -> Any:
+    if isinstance(value, dict):
+        return CompactPayload(value)
+    if isinstance(value, list):
+        return tuple(_compact(None, item) for item in value)
+    if key in _INTERNED_VALUES and type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+def _uncompact(value: Any) -> Any:
+    if isinstance(value, CompactPayload):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_uncompact(item) for item in value]
+    return value
+
+
+class CompactPayload(Mapping[str, Any]):
+    """Immutable event payload sharing its key storage with similar payloads.
+
+    Payloads with the same keys, in the same order, share a single key layout
+    and each only hold a tuple of values. Nested objects are compacted too,
+    arrays become tuples, and state values are interned.
+    """
+
+    __slots__ = ("_layout", "_values")
+
+    def __init__(self, payload: Mapping[str, Any]):
+        """Initialize the payload from a mapping."""
+        self._layout = _layout(tuple(payload))
+        self._values = tuple(_compact(key, value) for key, value in payload.items())
+
+    def __getitem__(self, key: str) -> Any:
+        """Return the value of key."""
+        return self._values[self._layout[key]]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value of key, or default if missing."""
+        index = self._layout.get(key)
+        return default if index is None else self._values[index]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the keys of the payload."""
+        return iter(self._layout)
+
+    def __len__(self) -> int:
+        """Return the number of keys of the payload."""
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        """Return the payload as a dictionary would be represented."""
+        return repr(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the payload as plain dictionaries and lists."""
+        return {key: _uncompact(value) for key, value in zip(self._layout, self._values)}
+
+
+def payload_json(payload: Mapping[str, Any]) -> str:
+    """Return an event payload as JSON, reusing the raw JSON if available."""
+    if isinstance(payload, LazyPayload):
+        return payload.raw
+    if isinstance(payload, CompactPayload):
+        payload = payload.to_dict()
+    return json.dumps(payload)
+
+
+@dataclass(slots=True)
 class Event:
-    """Event data class."""
+    """Event data class.
+
+    seq orders events by the time they were received, across all queues, and
+    received is the POSIX time at which it was received. The topic and wallet_id
+    are interned; they repeat across many events.
+    """
 
     topic: str
     payload: Mapping[str, Any]
     wallet_id: Optional[str] = None
+    seq: int = field(default_factory=_SEQUENCE.next)
+    received: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        """Intern the topic and wallet_id."""
+        self.topic = sys.intern(self.topic)
+        if self.wallet_id is not None:
+            self.wallet_id = sys.intern(self.wallet_id)
+
+
+# Payload key holding the id of the record an event is about, by topic
+RECORD_ID_KEYS: Dict[str, str] = {
+    "connections": "connection_id",
+    "out_of_band": "oob_id",
+    "mediation": "mediation_id",
+    "endorse_transaction": "transaction_id",
+    "issue_credential": "credential_exchange_id",
+    "issue_credential_v2_0": "cred_ex_id",
+    "issue_credential_v2_0_indy": "cred_ex_id",
+    "issue_credential_v2_0_anoncreds": "cred_ex_id",
+    "issue_credential_v2_0_ld_proof": "cred_ex_id",
+    "present_proof": "presentation_exchange_id",
+    "present_proof_v2_0": "pres_ex_id",
+}
+
+RecordKey = Tuple[str, str]
+
+
+def _field(payload: Mapping[str, Any], key: str) -> Any:
+    """Return the value of a top-level field of a record payload."""
+    if isinstance(payload, LazyPayload):
+        return payload.peek(key)
+    return payload.get(key)
+
+
+def record_key(event: Event) -> Optional[RecordKey]:
+    """Return the topic and id of the record an event is about, if known."""
+    key = RECORD_ID_KEYS.get(event.topic)
+    record_id = _field(event.payload, key) if key else None
+    return (event.topic, record_id) if isinstance(record_id, str) else None
+
+
+def _record_lag(lag: "LagMonitor", event: Event):
+    """Record the delivery lag of an event about a record."""
+    updated_at = _field(event.payload, "updated_at")
+    if isinstance(updated_at, str):
+        state = _field(event.payload, "state")
+        lag.delivered(event.topic, state, updated_at, event.received)
+
+
+@dataclass(frozen=True)
+class RecordState:
+    """Latest known state of a record, from the last event received about it."""
+
+    state: Optional[str]
+    updated_at: Optional[str]
+    seq: int
+
+
+def matches(event: Event, topic: str, values: Mapping[str, Any]) -> bool:
+    """Return whether an event has topic and a payload containing values."""
+    if event.topic != topic:
+        return False
+    payload = event.payload
+    if isinstance(payload, LazyPayload) and not payload.may_contain(values):
+        return False
+    return all(payload.get(key) == value for key, value in values.items())
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class _Waiter:
+    """Pending wait for an event with a topic and payload values."""
+
+    __slots__ = ("id", "topic", "values", "key", "future")
+
+    def __init__(
+        self,
+        id: int,
+        topic: str,
+        values: Mapping[str, Any],
+        key: Tuple[str, Optional[str], Any],
+        future: "asyncio.Future[Event]",
+    ):
+        self.id = id
+        self.topic = topic
+        self.values = values
+        self.key = key
+        self.future = future
+
+
+class WaiterRegistry:
+    """Pending event waits, indexed by topic and one correlation value.
+
+    Each waiter is indexed by its topic and its most selective value (ids
+    before other values, state last), so an arriving event only touches the
+    waiters indexed under a value it carries instead of every waiter. The
+    timeouts of all waiters are served by a single timer over a heap.
+    """
+
+    def __init__(self):
+        """Initialize the registry."""
+        self._index: Dict[Tuple[str, Optional[str], Any], Dict[int, _Waiter]] = {}
+        self._fields: Dict[str, Counter] = {}
+        self._ids = count()
+        self._pending = 0
+        self._timeouts: List[Tuple[float, int, _Waiter]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def __len__(self) -> int:
+        """Return the number of pending waiters."""
+        return self._pending
+
+    @staticmethod
+    def _index_field(values: Mapping[str, Any]) -> Optional[str]:
+        """Return the most selective of values to index a waiter by."""
+        best, best_rank = None, 3
+        for key, value in values.items():
+            if value is None or not _hashable(value):
+                continue
+            rank = 0 if key.endswith("_id") else 2 if key == "state" else 1
+            if rank < best_rank:
+                best, best_rank = key, rank
+        return best
+
+    def add(
+        self, topic: str, values: Mapping[str, Any], timeout: Optional[float]
+    ) -> _Waiter:
+        """Register a wait, failing it with TimeoutError after timeout seconds."""
+        loop = asyncio.get_running_loop()
+        name = self._index_field(values)
+        key = (topic, name, values[name] if name else None)
+        waiter = _Waiter(next(self._ids), topic, values, key, loop.create_future())
+        self._index.setdefault(key, {})[waiter.id] = waiter
+        self._fields.setdefault(topic, Counter())[name] += 1
+        self._pending += 1
+
+        if timeout is not None:
+            if len(self._timeouts) > 2 * self._pending + 64:
+                # Drop the entries of waiters that finished before timing out
+                self._timeouts = [
+                    entry for entry in self._timeouts if not entry[2].future.done()
+                ]
+                heapq.heapify(self._timeouts)
+            heapq.heappush(self._timeouts, (loop.time() + timeout, waiter.id, waiter))
+            if self._timer is None or self._timeouts[0][2] is waiter:
+                self._schedule(loop)
+        return waiter
+
+    def remove(self, waiter: _Waiter):
+        """Unregister a wait, if still registered."""
+        waiters = self._index.get(waiter.key)
+        if waiters is None or waiters.pop(waiter.id, None) is None:
+            return
+        if not waiters:
+            del self._index[waiter.key]
+        topic, name, _ = waiter.key
+        fields = self._fields[topic]
+        fields[name] -= 1
+        if not fields[name]:
+            del fields[name]
+            if not fields:
+                del self._fields[topic]
+        self._pending -= 1
+
+    def deliver(self, event: Event) -> bool:
+        """Hand an event to the oldest waiter it matches, if any."""
+        fields = self._fields.get(event.topic)
+        if not fields:
+            return False
+
+        found: Optional[_Waiter] = None
+        for name in fields:
+            value = _field(event.payload, name) if name else None
+            if not _hashable(value):
+                continue
+            for waiter in self._index.get((event.topic, name, value), {}).values():
+                if found is not None and waiter.id > found.id:
+                    break
+                if waiter.future.done():
+                    continue
+                if matches(event, event.topic, waiter.values):
+                    found = waiter
+                    break
+
+        if found is None:
+            return False
+        self.remove(found)
+        found.future.set_result(event)
+        return True
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_at(self._timeouts[0][0], self._expire, loop)
+
+    def _expire(self, loop: asyncio.AbstractEventLoop):
+        """Fail the waits whose timeout has passed."""
+        self._timer = None
+        now = loop.time()
+        while self._timeouts and (
+            self._timeouts[0][0] <= now or self._timeouts[0][2].future.done()
+        ):
+            _, _, waiter = heapq.heappop(self._timeouts)
+            if not waiter.future.done():
+                self.remove(waiter)
+                waiter.future.set_exception(asyncio.TimeoutError())
+        if self._timeouts:
+            self._schedule(loop)
+
+
+Overflow = Literal["drop-oldest", "drop-newest", "error"]
+
+
+class SubscriptionOverflowError(RuntimeError):
+    """Raised by a subscription whose buffer overflowed with overflow="error"."""
+
+
+class Subscription(Generic[T]):
+    """Stream of the events matching a filter, with its own bounded buffer.
+
+    Subscriptions see copies of events: any number of subscriptions, and the
+    one-shot waiters of the event queue, observe the same event. When the buffer
+    is full, overflow decides whether the oldest or newest event is dropped or
+    the subscription fails.
+    """
+
+    def __init__(
+        self,
+        queue: "FanOutQueue",
+        select: Select[Event],
+        transform: Callable[[Event], T],
+        *,
+        maxsize: int = 1000,
+        overflow: Overflow = "drop-oldest",
+    ):
+        """Initialize the subscription; use FanOutQueue.subscribe instead."""
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.queue = queue
+        self.select = select
+        self.transform = transform
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.delivered = 0
+        self.dropped = 0
+        self._buffer: Deque[Tuple[float, Event]] = deque()
+        self._ready = asyncio.Event()
+        self._overflowed = False
+        self._closed = False
+
+    @property
+    def lag(self) -> int:
+        """Return the number of events received but not yet consumed."""
+        return len(self._buffer)
+
+    @property
+    def age(self) -> float:
+        """Return the seconds the oldest unconsumed event has been waiting."""
+        if not self._buffer:
+            return 0.0
+        return time.monotonic() - self._buffer[0][0]
+
+    def offer(self, event: Event):
+        """Buffer an event if it matches the subscription."""
+        if self._closed or not self.select(event):
+            return
+
+        if len(self._buffer) >= self.maxsize:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                LOGGER.warning(
+                    "Subscription lagging by %d events, %d dropped",
+                    len(self._buffer),
+                    self.dropped,
+                )
+            if self.overflow == "drop-newest":
+                return
+            if self.overflow == "error":
+                self._overflowed = True
+                self._ready.set()
+                return
+            self._buffer.popleft()
+
+        self._buffer.append((time.monotonic(), event))
+        self._ready.set()
+
+    def close(self):
+        """Stop receiving events, ending iteration once the buffer is consumed."""
+        self._closed = True
+        self.queue.unsubscribe(self)
+        self._ready.set()
+
+    def __aiter__(self) -> "Subscription[T]":
+        """Return the subscription as an iterator."""
+        return self
+
+    async def __anext__(self) -> T:
+        """Return the next event, waiting for one if needed."""
+        while True:
+            if self._overflowed:
+                raise SubscriptionOverflowError(
+                    f"Subscription buffer of {self.maxsize} events overflowed"
+                )
+            if self._buffer:
+                break
+            if self._closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+
+        _, event = self._buffer.popleft()
+        self.delivered += 1
+        return self.transform(event)
+
+    async def __aenter__(self) -> "Subscription[T]":
+        """Return the subscription."""
+        return self
+
+    async def __aexit__(self, *exc_info):
+        """Close the subscription."""
+        self.close()
+
+
+class FanOutQueue(Queue[Event]):
+    """Event queue also delivering a copy of each event to subscriptions.
+
+    Events about records (see RECORD_ID_KEYS) are deduplicated: an event with
+    the same record id, state and updated_at as one already received is
+    dropped, as is an event older than the latest one received for its record,
+    e.g. one replayed after a WS reconnect. A newer event for a record in a state
+    it was in before replaces the older event if that is still queued, so a
+    wait for the state is not satisfied by the stale one.
+
+    The latest state of the last max_records records is kept for lookup with
+    latest.
+
+    If compact is set, decoded payloads are stored as CompactPayloads, saving
+    memory when many events are buffered, e.g. when replaying a journal.
+    Payloads not yet decoded are kept as is.
+
+    Waits for events with a topic and payload values (see wait) are kept in a
+    WaiterRegistry, so the cost of an event does not grow with the number of
+    waits pending.
+    """
+
+    def __init__(self, max_records: int = 10000, *, compact: bool = False):
+        """Initialize the queue."""
+        super().__init__()
+        self.max_records = max_records
+        self.compact = compact
+        self.duplicates = 0
+        self._subscriptions: List[Subscription] = []
+        self._latest: "OrderedDict[RecordKey, RecordState]" = OrderedDict()
+        self._states: Dict[RecordKey, Dict[Optional[str], Event]] = {}
+        self._waiters = WaiterRegistry()
+
+    def latest(self, topic: str, record_id: str) -> Optional[RecordState]:
+        """Return the latest known state of a record, if any."""
+        return self._latest.get((topic, record_id))
+
+    def _discard(self, event: Event):
+        """Remove an event from the queue if it is still queued."""
+        index = self._start(event.seq - 1)
+        if index < len(self._queue) and self._queue[index] is event:
+            del self._queue[index]
+
+    def _accept(self, event: Event) -> bool:
+        """Track the state of the record of an event; return False if stale."""
+        key = record_key(event)
+        if key is None:
+            return True
+
+        state = _field(event.payload, "state")
+        updated_at = _field(event.payload, "updated_at")
+        if not isinstance(updated_at, str):
+            updated_at = None
+        latest = self._latest.get(key)
+        states = self._states.setdefault(key, {})
+        previous = states.get(state)
+        if updated_at is not None:
+            if latest and latest.updated_at and updated_at < latest.updated_at:
+                return False
+            if previous and _field(previous.payload, "updated_at") == updated_at:
+                return False
+
+        if previous is not None:
+            # Superseded by this event; never satisfy a wait with the older one
+            self._discard(previous)
+
+        states[state] = event
+        self._latest[key] = RecordState(state, updated_at, event.seq)
+        self._latest.move_to_end(key)
+        if len(self._latest) > self.max_records:
+            evicted, _ = self._latest.popitem(last=False)
+            del self._states[evicted]
+        return True
+
+    def subscribe(
+        self,
+        select: Select[Event],
+        transform: Callable[[Event], T],
+        *,
+        maxsize: int = 1000,
+        overflow: Overflow = "drop-oldest",
+    ) -> Subscription[T]:
+        """Subscribe to events matching select."""
+        subscription = Subscription(
+            self, select, transform, maxsize=maxsize, overflow=overflow
+        )
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Stop delivering events to a subscription."""
+        with suppress(ValueError):
+            self._subscriptions.remove(subscription)
+
+    def _start(self, since: int) -> int:
+        """Return the index of the first queued event after cursor since."""
+        return bisect_right(self._queue, since, key=lambda event: event.seq)
+
+    async def _get_since(self, select: Optional[Select[Event]], since: int) -> Event:
+        """Retrieve the first matching event received after cursor since."""
+        async with self._cond:
+            while True:
+                for index in range(self._start(since), len(self._queue)):
+                    if select is None or select(self._queue[index]):
+                        return self._queue.pop(index)
+                await self._cond.wait()
+
+    async def get(
+        self,
+        select: Optional[Select[Event]] = None,
+        *,
+        timeout: Optional[float] = 5,
+        since: Optional[int] = None,
+    ) -> Event:
+        """Retrieve an event from the queue.
+
+        If since is set, only events received after that cursor are considered;
+        older events are skipped without scanning them.
+        """
+        if since is None:
+            return await super().get(select, timeout=timeout)  # type: ignore
+        return await asyncio.wait_for(self._get_since(select, since), timeout)
+
+    async def wait(
+        self,
+        topic: str,
+        values: Mapping[str, Any],
+        *,
+        timeout: Optional[float] = 5,
+        since: Optional[int] = None,
+    ) -> Event:
+        """Retrieve an event with topic and payload values, waiting if needed.
+
+        If since is set, only events received after that cursor are considered.
+        """
+        start = self._start(since) if since is not None else 0
+        for index in range(start, len(self._queue)):
+            if matches(self._queue[index], topic, values):
+                return self._queue.pop(index)
+
+        waiter = self._waiters.add(topic, values, timeout)
+        try:
+            return await waiter.future
+        except asyncio.CancelledError:
+            future = waiter.future
+            if future.done() and not future.cancelled() and not future.exception():
+                # Delivered as the wait was cancelled; do not lose the event
+                event = future.result()
+                if not self._waiters.deliver(event):
+                    insort(self._queue, event, key=lambda event: event.seq)
+            raise
+        finally:
+            self._waiters.remove(waiter)
+
+    async def put(self, value: Event):
+        """Deliver an event to subscriptions and push it onto the queue.
+
+        Duplicate and stale events are dropped.
+        """
+        if self.compact and not isinstance(value.payload, (LazyPayload, CompactPayload)):
+            value.payload = CompactPayload(value.payload)
+        if not self._accept(value):
+            self.duplicates += 1
+            LOGGER.debug("Dropping duplicate or stale event: %s", value)
+            return
+        for subscription in self._subscriptions:
+            subscription.offer(value)
+        if self._waiters.deliver(value):
+            return
+        await super().put(value)
 
 
 @asynccontextmanager
 async def EventQueue(controller: "Controller") -> AsyncIterator[Queue[Event]]:
     """Create event queue."""
-    event_queue: Queue[Event] = Queue()
+    event_queue: Queue[Event] = FanOutQueue()
     ws_task = asyncio.get_event_loop().create_task(ws(controller, event_queue))
 
     yield event_queue
@@ -39,45 +770,158 @@ async def EventQueue(controller: "Controller") -> AsyncIterator[Queue[Event]]:
     ws_task = None
 
 
-async def _handle_message(
-    controller: "Controller", queue: Queue[Event], data: Mapping[str, Any]
-):
+# WS frame as sent by ACA-Py, up to the payload and after it; others are decoded
+# in full
+_FRAME_HEAD = re.compile(
+    r'\{\s*"topic"\s*:\s*"(?P<topic>[^"\\]*)"\s*,\s*"payload"\s*:\s*'
+)
+_FRAME_TAIL = re.compile(
+    r'(?:\s*,\s*"wallet_id"\s*:\s*(?:"(?P<wallet_id>[^"\\]*)"|null))?\s*\}\s*'
+)
+_DECODER = json.JSONDecoder()
+
+
+def parse_event(raw: str) -> Optional[Event]:
+    """Return the event of a raw WS message, or None for pings.
+
+    Only the topic and wallet_id are extracted; the payload is kept as raw JSON
+    and decoded lazily. The end of the payload is found by decoding it, but only
+    the raw JSON is kept, so buffered events stay small. Frames with other keys
+    after the payload are decoded in full. Raises ValueError or TypeError if the
+    message is not a valid event.
+    """
+    head = _FRAME_HEAD.match(raw)
+    if head and raw.startswith("{", head.end()):
+        _, end = _DECODER.raw_decode(raw, head.end())
+        tail = _FRAME_TAIL.fullmatch(raw, end)
+        if tail:
+            payload = LazyPayload(raw[head.end() : end])
+            return Event(head["topic"], payload, tail["wallet_id"])
+
+    data = json.loads(raw)
     if data.get("topic") == "ping":
-        LOGGER.debug("%s: WS Ping received", controller.label)
-        return
+        return None
+    return Event(**data)
+
 
+async def _handle_message(controller: "Controller", queue: Queue[Event], raw: str):
     try:
-        event = Event(**data)
+        event = parse_event(raw)
     except Exception:
-        LOGGER.warning(
-            "Unable to parse event: %s",
-            json.dumps(data, indent=2),
-        )
+        LOGGER.warning("Unable to parse event: %s", raw)
+        return
+
+    if event is None:
+        LOGGER.debug("%s: WS Ping received", controller.label)
         return
 
+    if controller.journal:
+        controller.journal.append(event)
+    if controller.lag:
+        _record_lag(controller.lag, event)
+
     if event.topic == "settings":
         LOGGER.debug("Received settings for %s: %s", controller.label, event)
-        await queue.put(event)
+        await _put(queue, event)
         return
 
     if not controller.is_subwallet or event.wallet_id == controller.wallet_id:
         LOGGER.debug("%s: %s", controller.label, event)
+        await _put(queue, event)
+
+
+async def _put(queue: Queue[Event], event: Event):
+    """Push an event onto a queue, dropping it if its payload is not valid JSON."""
+    try:
         await queue.put(event)
+    except json.JSONDecodeError:
+        LOGGER.warning("Unable to decode event payload: %s", event)
 
 
-async def ws(controller: "Controller", queue: Queue[Event]):
-    """WS Task."""
-    LOGGER.info("Opening WS to %s/ws", controller.base_url)
-    async with ClientSession(controller.base_url) as session:
+async def _ws_messages(
+    base_url: str, headers: Optional[Mapping[str, str]] = None
+) -> AsyncIterator[str]:
+    """Iterate over the messages received on an agent's WS."""
+    LOGGER.info("Opening WS to %s/ws", base_url)
+    async with ClientSession(base_url, headers=headers) as session:
         async with session.ws_connect("/ws", timeout=30.0) as ws:
             try:
                 async for msg in ws:
                     if msg.type == WSMsgType.TEXT:
-                        data = msg.json()
-                        await _handle_message(controller, queue, data)
+                        yield msg.data
                     if msg.type == WSMsgType.ERROR:
                         # TODO Can we continue after ERROR?
                         break
             finally:
                 if not ws.closed:
                     await ws.close()
+
+
+async def ws(controller: "Controller", queue: Queue[Event]):
+    """WS Task."""
+    async for raw in _ws_messages(controller.base_url):
+        await _handle_message(controller, queue, raw)
+
+
+class EventHub:
+    """Route events from a single WS to per-wallet event queues.
+
+    A hub connects to the WS of a multitenant agent as the base wallet and feeds
+    the event queues of any number of subwallet controllers, so tenants do not
+    each open their own connection. Events for wallets without a queue are
+    dropped.
+    """
+
+    def __init__(self, controller: "Controller"):
+        """Initialize the hub for the base wallet controller of an agent."""
+        self.controller = controller
+        self.queues: Dict[str, Queue[Event]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def queue(self, wallet_id: str) -> Queue[Event]:
+        """Return the event queue of a wallet, creating it if needed."""
+        if wallet_id not in self.queues:
+            self.queues[wallet_id] = FanOutQueue()
+        return self.queues[wallet_id]
+
+    def drop(self, wallet_id: str):
+        """Stop routing events to a wallet, discarding its queue."""
+        self.queues.pop(wallet_id, None)
+
+    async def _handle_message(self, raw: str):
+        try:
+            event = parse_event(raw)
+        except Exception:
+            LOGGER.warning("Unable to parse event: %s", raw)
+            return
+
+        if event is None:
+            return
+
+        if self.controller.journal:
+            self.controller.journal.append(event)
+        if self.controller.lag:
+            _record_lag(self.controller.lag, event)
+
+        queue = self.queues.get(event.wallet_id) if event.wallet_id else None
+        if queue is None:
+            LOGGER.debug("Dropping event for inactive wallet: %s", event)
+            return
+        await _put(queue, event)
+
+    async def _run(self):
+        async for raw in _ws_messages(self.controller.base_url, self.controller.headers):
+            await self._handle_message(raw)
+
+    async def __aenter__(self) -> "EventHub":
+        """Start routing events."""
+        self._task = asyncio.get_event_loop().create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        """Stop routing events."""
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
@@ -0,0 +1,652 @@
+"""Declarative protocol flows.
+
+A flow is declared as a sequence of transitions. Each transition names the role
+that acts, an optional trigger event (topic and values to match) and an optional
+action to take once triggered. The scheduler drives flow instances through their
+transitions, many at a time, recording the ids picked up along the way in each
+instance's context.
+
+Transitions that do not depend on each other, such as the final waits of both
+parties, can be grouped to be taken concurrently as one step: each member of a
+Parallel group (a transition or a chain of transitions) starts at once.
+
+Given a checkpoint store, the scheduler checkpoints each instance after every
+transition. An interrupted instance is resumed by querying the admin API for the
+records its remaining transitions are waiting on, skipping past transitions that
+happened while it was not running.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+import logging
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+from uuid import uuid4
+
+from .controller import Controller, ControllerError, _deserialize
+from .deadlines import deadline, step
+
+if TYPE_CHECKING:
+    from .checkpoints import CheckpointStore
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Ref:
+    """Reference to a value in a flow instance's context."""
+
+    key: str
+
+
+def resolve(value: Any, context: Mapping[str, Any]) -> Any:
+    """Replace references in value with values from context."""
+    if isinstance(value, Ref):
+        return context[value.key]
+    if isinstance(value, Mapping):
+        return {key: resolve(item, context) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [resolve(item, context) for item in value]
+    return value
+
+
+class Action(Protocol):
+    """Action taken by a role when a transition fires."""
+
+    def __call__(
+        self, controller: Controller, context: Mapping[str, Any]
+    ) -> Awaitable[Any]:
+        """Perform the action, returning its result."""
+        ...
+
+
+@dataclass(frozen=True)
+class Request:
+    """Action making a request to the admin API of the acting role.
+
+    url is formatted with the flow context; references in json and params are
+    resolved from the flow context.
+    """
+
+    method: Literal["GET", "POST", "PUT", "DELETE"]
+    url: str
+    json: Any = None
+    params: Optional[Mapping[str, Any]] = None
+    response: Optional[Type[Any]] = None
+
+    async def __call__(self, controller: Controller, context: Mapping[str, Any]):
+        """Make the request."""
+        return await controller.request(
+            self.method,
+            self.url.format(**context),
+            json=resolve(self.json, context),
+            params=resolve(self.params, context),
+            response=self.response,
+        )
+
+
+@dataclass(frozen=True)
+class Transition:
+    """Transition of a flow to its next step.
+
+    The transition is triggered when the role's controller receives an event on
+    topic with payload matching values, or immediately if topic is None. The
+    action, if any, is then taken by the role.
+
+    The result of the transition is the action's result or, without an action,
+    the triggering event. Fields of the result are saved into the flow context
+    under the keys of save; the whole result is saved under result.
+
+    record is the admin API url, formatted with the flow context, of the record
+    the trigger event is about. It may also be a list endpoint, in which case
+    the first record matching values (other than state) is used. record_key is
+    the key of the record in the response, if it is nested. The record is used
+    to recover the transition if the event was missed while a flow was not
+    running.
+    """
+
+    name: str
+    role: str
+    topic: Optional[str] = None
+    values: Mapping[str, Any] = field(default_factory=dict)
+    event_type: Optional[Type[Any]] = None
+    action: Optional[Action] = None
+    save: Mapping[str, str] = field(default_factory=dict)
+    result: Optional[str] = None
+    timeout: Optional[float] = None
+    record: Optional[str] = None
+    record_key: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Parallel:
+    """Group of transitions taken concurrently as one step of a flow.
+
+    Each member is a transition or a chain of transitions taken in order. All
+    members start at once and the group is done when every member is; if one
+    fails, the others are cancelled. Members must not depend on values saved
+    by each other.
+    """
+
+    name: str
+    members: Sequence[Union[Transition, Sequence[Transition]]]
+
+    @property
+    def chains(self) -> Tuple[Tuple[Transition, ...], ...]:
+        """Return the members of the group as chains of transitions."""
+        return tuple(
+            (member,) if isinstance(member, Transition) else tuple(member)
+            for member in self.members
+        )
+
+    @property
+    def transitions(self) -> Tuple[Transition, ...]:
+        """Return the transitions of all members."""
+        return tuple(transition for chain in self.chains for transition in chain)
+
+
+Step = Union[Transition, Parallel]
+
+
+@dataclass(frozen=True)
+class Flow:
+    """A protocol flow declared as a sequence of transitions and groups of them."""
+
+    name: str
+    transitions: Sequence[Step]
+
+    def __add__(self, other: Union["Flow", Sequence[Step]]) -> "Flow":
+        """Return a flow with the transitions of other appended."""
+        transitions = other.transitions if isinstance(other, Flow) else other
+        return Flow(self.name, (*self.transitions, *transitions))
+
+
+@dataclass
+class FlowState:
+    """State of a flow instance.
+
+    step is the index of the next transition to take and last_state is the
+    state of the last record seen by the flow. If the next step is a parallel
+    group, taken lists the names of its transitions already taken.
+    """
+
+    flow: str
+    context: Dict[str, Any]
+    step: int = 0
+    id: str = field(default_factory=lambda: uuid4().hex)
+    last_state: Optional[str] = None
+    taken: List[str] = field(default_factory=list)
+
+    def __getitem__(self, key: str) -> Any:
+        """Return a value from the context."""
+        return self.context[key]
+
+
+class FlowError(ControllerError):
+    """Raised when a flow cannot be driven."""
+
+
+async def concurrently(*aws: Awaitable[Any]) -> List[Any]:
+    """Await awaitables concurrently, returning their results in order.
+
+    The first to fail cancels the others and its error is raised.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for task in tasks:
+        if task in done and task.exception() is not None:
+            raise task.exception()  # type: ignore[misc]
+    return [task.result() for task in tasks]
+
+
+# Values describing the progress of a record rather than identifying it
+STATE_KEYS = ("state", "rfc23_state")
+
+# States of records by topic and state key, in the order records go through them.
+# Each role's states are in order; abandoned and other failure states are left
+# out, so records in them never count as having reached a state.
+STATE_ORDER: Dict[Tuple[str, str], Tuple[str, ...]] = {
+    ("connections", "state"): (
+        "init",
+        "invitation",
+        "request",
+        "response",
+        "active",
+        "completed",
+    ),
+    ("connections", "rfc23_state"): (
+        "start",
+        "invitation-sent",
+        "invitation-received",
+        "request-sent",
+        "request-received",
+        "response-sent",
+        "response-received",
+        "completed",
+    ),
+    ("issue_credential", "state"): (
+        "proposal_sent",
+        "proposal_received",
+        "offer_sent",
+        "offer_received",
+        "request_sent",
+        "request_received",
+        "credential_issued",
+        "credential_received",
+        "credential_acked",
+        "credential_revoked",
+    ),
+    ("issue_credential_v2_0", "state"): (
+        "proposal-sent",
+        "proposal-received",
+        "offer-sent",
+        "offer-received",
+        "request-sent",
+        "request-received",
+        "credential-issued",
+        "credential-received",
+        "done",
+        "credential-revoked",
+    ),
+    ("present_proof", "state"): (
+        "proposal_sent",
+        "proposal_received",
+        "request_sent",
+        "request_received",
+        "presentation_sent",
+        "presentation_received",
+        "verified",
+        "presentation_acked",
+    ),
+    ("present_proof_v2_0", "state"): (
+        "proposal-sent",
+        "proposal-received",
+        "request-sent",
+        "request-received",
+        "presentation-sent",
+        "presentation-received",
+        "done",
+    ),
+}
+
+
+def _field(result: Any, name: str) -> Any:
+    """Return a field of a transition result."""
+    if hasattr(result, name):
+        return getattr(result, name)
+    return result[name]
+
+
+def _reached(topic: str, key: str, current: Any, target: Any) -> bool:
+    """Return whether a record in state current is at or past state target."""
+    if current == target:
+        return True
+    order = STATE_ORDER.get((topic, key), ())
+    return (
+        current in order
+        and target in order
+        and order.index(current) > order.index(target)
+    )
+
+
+def _has_state(transition: Transition) -> bool:
+    """Return whether a transition waits for its record to reach a state."""
+    return any(key in transition.values for key in STATE_KEYS)
+
+
+def _records(body: Any, record_key: Optional[str]) -> Iterable[Mapping[str, Any]]:
+    """Return the records in an admin API response."""
+    if isinstance(body, Mapping) and isinstance(body.get("results"), list):
+        records = body["results"]
+    else:
+        records = [body]
+    for record in records:
+        if record_key:
+            record = record.get(record_key)
+        if isinstance(record, Mapping):
+            yield record
+
+
+class FlowScheduler:
+    """Drive flow instances concurrently.
+
+    Waits for trigger events go through each role's controller, so instances of
+    any number of flows can share controllers and their event queues.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        checkpoints: Optional["CheckpointStore"] = None,
+    ):
+        """Initialize the scheduler.
+
+        concurrency bounds the number of instances run at once by run_many;
+        timeout is the default time to wait for a trigger event, falling back to
+        the controller's event_timeout. deadline bounds the time each instance
+        may take in total. If checkpoints is set, instances are checkpointed to
+        it after every transition.
+        """
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.deadline = deadline
+        self.checkpoints = checkpoints
+
+    async def _transition(
+        self,
+        transition: Transition,
+        roles: Mapping[str, Controller],
+        state: FlowState,
+    ):
+        controller = roles.get(transition.role)
+        if controller is None:
+            raise FlowError(
+                f"Flow {state.flow} has no controller for role {transition.role}"
+            )
+
+        result = None
+        if transition.topic:
+            result = await controller.event_with_values(
+                transition.topic.format(**state.context),
+                event_type=transition.event_type,
+                timeout=transition.timeout or self.timeout,
+                **resolve(transition.values, state.context),
+            )
+        if transition.action:
+            result = await transition.action(controller, state.context)
+
+        self._apply(transition, state, result)
+
+    def _apply(self, transition: Transition, state: FlowState, result: Any):
+        """Save the result of a transition into the flow state."""
+        for key, name in transition.save.items():
+            state.context[key] = _field(result, name)
+        if transition.result:
+            state.context[transition.result] = result
+        if transition.topic and not transition.action:
+            try:
+                state.last_state = _field(result, "state")
+            except (AttributeError, KeyError, TypeError):
+                pass
+
+    async def _record(
+        self, transition: Transition, controller: Controller, state: FlowState
+    ) -> Optional[Mapping[str, Any]]:
+        """Return the current record a transition is waiting on, if known."""
+        assert transition.record
+        try:
+            url = transition.record.format(**state.context)
+            values = resolve(transition.values, state.context)
+        except KeyError:
+            # Depends on ids not yet known
+            return None
+
+        try:
+            body = await controller.get(url)
+        except ControllerError:
+            return None
+
+        for record in _records(body, transition.record_key):
+            if all(
+                record.get(key) == value
+                for key, value in values.items()
+                if key not in STATE_KEYS
+            ):
+                return record
+        return None
+
+    async def _recover_transition(
+        self, transition: Transition, roles: Mapping[str, Controller], state: FlowState
+    ) -> bool:
+        """Return whether the record of a transition reached the state it waits for.
+
+        A record past that state (see STATE_ORDER) has reached it too. The record
+        is applied as the result if so; otherwise only ids are saved from it.
+        """
+        controller = roles.get(transition.role)
+        if not transition.topic or not transition.record or not controller:
+            return False
+
+        record = await self._record(transition, controller, state)
+        if record is None:
+            return False
+
+        values = resolve(transition.values, state.context)
+        result = _deserialize(record, transition.event_type)
+        states = [key for key in STATE_KEYS if key in values]
+        topic = transition.topic
+        if all(_reached(topic, key, record.get(key), values[key]) for key in states):
+            self._apply(transition, state, result)
+            return True
+
+        # Save ids only
+        for key, name in transition.save.items():
+            state.context[key] = _field(result, name)
+        return False
+
+    async def _recover(
+        self, flow: Flow, roles: Mapping[str, Controller], state: FlowState
+    ):
+        """Advance state past transitions that happened while it was not running.
+
+        Records of the remaining transitions are fetched in order. Ids are saved
+        from every record found and the flow moves past the last transition whose
+        record already reached the state it waits for. Within a parallel group, the
+        transitions reached are marked taken, along with those before them in
+        their chain; the flow moves past the group once all are taken.
+
+        A transition whose values have no state only tells that its record
+        exists, so it is recovered only once everything before it is taken.
+        """
+        for index in range(state.step, len(flow.transitions)):
+            item = flow.transitions[index]
+            if isinstance(item, Transition):
+                if not _has_state(item) and index != state.step:
+                    continue
+                if await self._recover_transition(item, roles, state):
+                    state.step = index + 1
+                    state.taken = []
+                    LOGGER.debug(
+                        "Flow %s (%s): recovered %s", flow.name, state.id, item.name
+                    )
+                continue
+
+            current = index == state.step
+            taken = await self._recover_group(flow, item, roles, state, current)
+            if len(taken) == len(item.transitions):
+                state.step = index + 1
+                state.taken = []
+            elif current:
+                state.taken = taken
+
+    async def _recover_group(
+        self,
+        flow: Flow,
+        group: Parallel,
+        roles: Mapping[str, Controller],
+        state: FlowState,
+        current: bool,
+    ) -> List[str]:
+        """Return the names of the transitions of a group taken or recovered.
+
+        current tells whether the group is the next step of the flow.
+        """
+        taken = list(state.taken) if current else []
+        for chain in group.chains:
+            for position, transition in enumerate(chain):
+                if transition.name in taken:
+                    continue
+                if not _has_state(transition) and (
+                    not current
+                    or any(previous.name not in taken for previous in chain[:position])
+                ):
+                    continue
+                if await self._recover_transition(transition, roles, state):
+                    taken.extend(
+                        previous.name
+                        for previous in chain[: position + 1]
+                        if previous.name not in taken
+                    )
+                    LOGGER.debug(
+                        "Flow %s (%s): recovered %s", flow.name, state.id, transition.name
+                    )
+        return taken
+
+    async def _chain(
+        self,
+        flow: Flow,
+        chain: Sequence[Transition],
+        roles: Mapping[str, Controller],
+        state: FlowState,
+    ):
+        """Take the transitions of a chain not yet taken, in order."""
+        for transition in chain:
+            if transition.name in state.taken:
+                continue
+            with step(f"{flow.name}: {transition.name}"):
+                await self._transition(transition, roles, state)
+            state.taken.append(transition.name)
+            if self.checkpoints:
+                self.checkpoints.save(state)
+
+    async def run(
+        self,
+        flow: Flow,
+        roles: Mapping[str, Controller],
+        context: Optional[Mapping[str, Any]] = None,
+        *,
+        state: Optional[FlowState] = None,
+    ) -> FlowState:
+        """Run a flow instance to completion.
+
+        Pass state to continue an instance from its next step. Timeouts raised
+        under the scheduler's deadline name the transition that exhausted it.
+        """
+        if state is None:
+            state = FlowState(flow.name, dict(context or {}))
+        elif context:
+            state.context.update(context)
+
+        with deadline(self.deadline, f"of flow {flow.name} ({state.id})"):
+            while state.step < len(flow.transitions):
+                item = flow.transitions[state.step]
+                LOGGER.debug("Flow %s (%s): %s", flow.name, state.id, item.name)
+                if isinstance(item, Parallel):
+                    await concurrently(
+                        *(self._chain(flow, chain, roles, state) for chain in item.chains)
+                    )
+                else:
+                    with step(f"{flow.name}: {item.name}"):
+                        await self._transition(item, roles, state)
+                state.step += 1
+                state.taken = []
+                if self.checkpoints:
+                    self.checkpoints.save(state)
+
+        if self.checkpoints:
+            self.checkpoints.complete(state)
+        return state
+
+    async def resume(
+        self,
+        flow: Flow,
+        roles: Mapping[str, Controller],
+        state: FlowState,
+        context: Optional[Mapping[str, Any]] = None,
+    ) -> FlowState:
+        """Resume an interrupted flow instance from its checkpointed state.
+
+        context supplies values that are not checkpointed, such as selectors.
+        """
+        if context:
+            state.context.update(context)
+        await self._recover(flow, roles, state)
+        if self.checkpoints:
+            self.checkpoints.save(state)
+        return await self.run(flow, roles, state=state)
+
+    async def resume_pending(
+        self,
+        flow: Flow,
+        roles: Mapping[str, Controller],
+        context: Optional[Mapping[str, Any]] = None,
+    ) -> AsyncIterator[FlowState]:
+        """Resume all checkpointed instances of a flow, yielding them as they end."""
+        if not self.checkpoints:
+            raise FlowError("Cannot resume flows without a checkpoint store")
+
+        tasks = [
+            asyncio.ensure_future(self.resume(flow, roles, state, context))
+            for state in self.checkpoints.pending(flow.name)
+        ]
+        try:
+            for next_state in asyncio.as_completed(tasks):
+                yield await next_state
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def run_many(
+        self,
+        flow: Flow,
+        roles: Mapping[str, Controller],
+        contexts: Iterable[Mapping[str, Any]],
+    ) -> AsyncIterator[FlowState]:
+        """Run many instances of a flow, yielding their states as they finish.
+
+        Instances are pipelined: each one proceeds as soon as its own trigger
+        events arrive, regardless of the progress of the others.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency) if self.concurrency else None
+
+        async def _run(context: Mapping[str, Any]) -> FlowState:
+            if semaphore is None:
+                return await self.run(flow, roles, context)
+            async with semaphore:
+                return await self.run(flow, roles, context)
+
+        tasks = [asyncio.ensure_future(_run(context)) for context in contexts]
+        try:
+            for next_state in asyncio.as_completed(tasks):
+                yield await next_state
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def run_flow(
+    flow: Flow,
+    roles: Mapping[str, Controller],
+    context: Optional[Mapping[str, Any]] = None,
+    *,
+    scheduler: Optional[FlowScheduler] = None,
+) -> FlowState:
+    """Run a single flow instance to completion.
+
+    Pass a scheduler to set timeouts or checkpoint the flow.
+    """
+    return await (scheduler or FlowScheduler()).run(flow, roles, context)
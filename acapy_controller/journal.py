@@ -0,0 +1,339 @@
+"""Append-only journal of received events.
+
+A journal records every event a controller receives (topic, wallet_id, payload,
+receive timestamp and a journal sequence number) for post-mortem debugging of
+failed runs and for replaying them offline.
+
+Events are appended to memory-mapped segment files, each with an index file of
+fixed size (seq, timestamp, offset) entries, so tailing and time-range scans
+only read the events they return. A segment is rotated once full; retention
+limits delete the oldest segments.
+
+    journal = EventJournal("events", segment_size=16 * 1024 * 1024, max_segments=8)
+    async with Controller(base_url, journal=journal) as controller:
+        ...
+
+    # Later, feed the journal back into an event queue
+    queue = FanOutQueue()
+    controller = Controller(base_url, event_queue=queue)
+    await journal.replay(queue, start=time.time() - 3600)
+"""
+
+import asyncio
+from bisect import bisect_left
+from dataclasses import dataclass
+import json
+import logging
+import mmap
+import os
+from pathlib import Path
+import struct
+import time
+from typing import Any, Iterator, List, Mapping, Optional, Tuple, Union
+
+from .events import Event, Queue, payload_json
+
+LOGGER = logging.getLogger(__name__)
+
+# Record header: body length, seq, timestamp; a zero length marks the end
+_HEADER = struct.Struct("<IQd")
+# Index entry: seq, timestamp, offset of the record in the segment
+_ENTRY = struct.Struct("<QdQ")
+
+
+@dataclass(frozen=True)
+class JournalEntry:
+    """Event recorded in a journal."""
+
+    seq: int
+    timestamp: float
+    topic: str
+    wallet_id: Optional[str]
+    payload: Mapping[str, Any]
+
+    def event(self) -> Event:
+        """Return the entry as an event, with a new sequence number."""
+        return Event(self.topic, self.payload, self.wallet_id)
+
+
+class _Index:
+    """Index entries of a segment, read lazily from the index file."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.data) // _ENTRY.size
+
+    def __getitem__(self, index: int) -> Tuple[int, float, int]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return _ENTRY.unpack_from(self.data, index * _ENTRY.size)
+
+
+class _Segment:
+    """Segment file and its index."""
+
+    def __init__(self, directory: Path, number: int):
+        self.number = number
+        self.path = directory / f"{number:08d}.seg"
+        self.index_path = directory / f"{number:08d}.idx"
+
+    def index(self) -> _Index:
+        try:
+            return _Index(self.index_path.read_bytes())
+        except FileNotFoundError:
+            return _Index(b"")
+
+    def read(self, offset: int, data: Union[bytes, mmap.mmap]) -> JournalEntry:
+        length, seq, timestamp = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        body = json.loads(data[start : start + length])
+        return JournalEntry(
+            seq, timestamp, body["topic"], body.get("wallet_id"), body["payload"]
+        )
+
+    def delete(self):
+        for path in (self.path, self.index_path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class EventJournal:
+    """Segmented, memory-mapped, append-only journal of events."""
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        *,
+        segment_size: int = 64 * 1024 * 1024,
+        max_segments: Optional[int] = None,
+        max_age: Optional[float] = None,
+    ):
+        """Open the journal in directory, creating it if needed.
+
+        Segments are rotated once segment_size bytes are written to them. When a
+        segment is rotated, the oldest segments beyond max_segments, and those
+        with no events in the last max_age seconds, are deleted.
+        """
+        if segment_size <= _HEADER.size:
+            raise ValueError("segment_size is too small")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self.max_age = max_age
+        self.last_seq = 0
+
+        self._segments: List[_Segment] = [
+            _Segment(self.directory, int(path.stem))
+            for path in sorted(self.directory.glob("*.seg"))
+        ]
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._index_file = None
+        self._offset = 0
+        if self._segments:
+            self._open(self._segments[-1])
+        else:
+            self._rotate()
+
+    def _open(self, segment: _Segment):
+        """Open a segment for appending, recovering entries missing from its index."""
+        self._file = segment.path.open("r+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < self.segment_size:
+            self._file.truncate(self.segment_size)
+            size = self.segment_size
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._index_file = segment.index_path.open("ab", buffering=0)
+
+        index = segment.index()
+        offset = 0
+        if len(index):
+            self.last_seq, _, offset = index[-1]
+            offset += _HEADER.size + _HEADER.unpack_from(self._map, offset)[0]
+
+        # Entries written after the index, e.g. before a crash
+        while offset + _HEADER.size <= size:
+            length, seq, timestamp = _HEADER.unpack_from(self._map, offset)
+            if not length or offset + _HEADER.size + length > size:
+                break
+            try:
+                segment.read(offset, self._map)
+            except ValueError:
+                break
+            self._index_file.write(_ENTRY.pack(seq, timestamp, offset))
+            self.last_seq = seq
+            offset += _HEADER.size + length
+        self._offset = offset
+
+    def _close(self):
+        """Close the segment being appended to, trimming unused space."""
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.truncate(self._offset)
+            self._file.close()
+            self._file = None
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+    def _rotate(self, needed: int = 0):
+        """Start a new segment with room for at least needed bytes."""
+        self._close()
+        number = self._segments[-1].number + 1 if self._segments else 0
+        segment = _Segment(self.directory, number)
+        with segment.path.open("wb") as file:
+            file.truncate(max(self.segment_size, needed))
+        self._segments.append(segment)
+        self._open(segment)
+        self._retain()
+
+    def _retain(self):
+        """Delete the oldest segments beyond the retention limits."""
+        expired = time.time() - self.max_age if self.max_age is not None else None
+        while len(self._segments) > 1:
+            oldest = self._segments[0]
+            too_many = self.max_segments is not None and len(self._segments) > (
+                self.max_segments
+            )
+            index = oldest.index()
+            too_old = expired is not None and (not len(index) or index[-1][1] < expired)
+            if not too_many and not too_old:
+                return
+            LOGGER.debug("Deleting journal segment %s", oldest.path)
+            oldest.delete()
+            del self._segments[0]
+
+    def append(self, event: Event, timestamp: Optional[float] = None) -> int:
+        """Record an event received at timestamp, when it was received by default.
+
+        Returns the journal sequence number of the event.
+        """
+        body = (
+            f'{{"topic": {json.dumps(event.topic)}, '
+            f'"wallet_id": {json.dumps(event.wallet_id)}, '
+            f'"payload": {payload_json(event.payload)}}}'
+        ).encode()
+        size = _HEADER.size + len(body)
+        assert self._map is not None and self._index_file is not None
+        # Leave room for the end marker
+        if self._offset + size + _HEADER.size > len(self._map):
+            self._rotate(size + _HEADER.size)
+            assert self._map is not None and self._index_file is not None
+
+        seq = self.last_seq + 1
+        timestamp = event.received if timestamp is None else timestamp
+        offset = self._offset
+        self._map[offset + _HEADER.size : offset + size] = body
+        _HEADER.pack_into(self._map, offset, len(body), seq, timestamp)
+        self._index_file.write(_ENTRY.pack(seq, timestamp, offset))
+        self._offset += size
+        self.last_seq = seq
+        return seq
+
+    def flush(self):
+        """Flush appended events to disk."""
+        if self._map is not None:
+            self._map.flush()
+
+    def close(self):
+        """Close the journal."""
+        self._close()
+
+    def __enter__(self) -> "EventJournal":
+        """Return the journal."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the journal."""
+        self.close()
+
+    def _entries(self, segment: _Segment, start: int) -> Iterator[JournalEntry]:
+        """Iterate over the entries of a segment from index position start."""
+        index = segment.index()
+        if start >= len(index):
+            return
+        with segment.path.open("rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for position in range(start, len(index)):
+                    yield segment.read(index[position][2], data)
+
+    def scan(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        *,
+        since: Optional[int] = None,
+    ) -> Iterator[JournalEntry]:
+        """Iterate over the events received from start until before end.
+
+        start and end are timestamps; if since is set, only events after that
+        journal sequence number are returned.
+        """
+        segments = list(self._segments)
+        for number, segment in enumerate(segments):
+            if number + 1 < len(segments):
+                following = segments[number + 1].index()
+                if len(following) and (
+                    (start is not None and following[0][1] <= start)
+                    or (since is not None and following[0][0] <= since + 1)
+                ):
+                    # Every event wanted is in a later segment
+                    continue
+
+            index = segment.index()
+            position = 0
+            if start is not None:
+                position = bisect_left(index, start, key=lambda entry: entry[1])
+            if since is not None:
+                position = max(
+                    position, bisect_left(index, since + 1, key=lambda entry: entry[0])
+                )
+            for entry in self._entries(segment, position):
+                if end is not None and entry.timestamp >= end:
+                    return
+                yield entry
+
+    def tail(self, count: int = 10) -> List[JournalEntry]:
+        """Return the last count events received."""
+        entries: List[JournalEntry] = []
+        for segment in reversed(self._segments):
+            wanted = count - len(entries)
+            if wanted <= 0:
+                break
+            index = segment.index()
+            entries[:0] = self._entries(segment, max(len(index) - wanted, 0))
+        return entries
+
+    async def replay(
+        self,
+        queue: Queue[Event],
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        *,
+        speed: Optional[float] = None,
+    ) -> int:
+        """Put the events received from start until before end onto a queue.
+
+        Events get new sequence numbers as they are put onto the queue. If speed
+        is set, the time between events is kept, divided by speed; otherwise
+        events are put as fast as possible. Returns the number of events replayed.
+        """
+        count = 0
+        previous: Optional[float] = None
+        for entry in self.scan(start, end):
+            if speed and previous is not None and entry.timestamp > previous:
+                await asyncio.sleep((entry.timestamp - previous) / speed)
+            previous = entry.timestamp
+            await queue.put(entry.event())
+            count += 1
+        return count
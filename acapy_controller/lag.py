@@ -0,0 +1,168 @@
+"""Event delivery lag measurement.
+
+A lag monitor aggregates, per topic and state, histograms of:
+
+- delivery lag: the time an event was received minus the updated_at of the
+  record it carries, i.e. how far event delivery trails the agent; and
+- response lag: the time from a POST (or other write) being sent to the first
+  awaited event about a record in its response arriving, i.e. how long the
+  agent takes to act on it. Each write is measured once, and events about other
+  records or received before the write was sent are not counted.
+
+High delivery lag points at a backed-up agent or WS, rather than at slow
+processing by the agent. Delivery lag compares the agent's clock with ours,
+so it includes any skew between the two.
+
+    lag = LagMonitor(threshold=2.0)
+    async with Controller(base_url, lag=lag) as controller:
+        ...
+    for (topic, state), histogram in lag.delivery.items():
+        print(topic, state, histogram.summary())
+"""
+
+from bisect import bisect_left
+from datetime import datetime, timezone
+import logging
+import time
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of histogram buckets; the last bucket is unbounded
+BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+LagKey = Tuple[str, Optional[str]]
+
+
+def parse_timestamp(value: str) -> Optional[float]:
+    """Return the POSIX time of an ACA-Py record timestamp, if valid."""
+    try:
+        when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.timestamp()
+
+
+class Histogram:
+    """Histogram of durations in fixed buckets."""
+
+    def __init__(self, buckets: Sequence[float] = BUCKETS):
+        """Initialize the histogram with bucket upper bounds in seconds."""
+        self.buckets = tuple(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float):
+        """Record a duration; negative durations count as zero."""
+        value = max(value, 0.0)
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        """Return the mean duration."""
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Return the upper bound of the bucket holding quantile q.
+
+        Values in the last, unbounded, bucket are reported as the maximum.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> Mapping[str, float]:
+        """Return the count, mean, p50, p90, p99 and max durations."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class LagMonitor:
+    """Histograms of delivery and response lag per topic and state.
+
+    A warning is logged when delivery lag exceeds threshold seconds, at most
+    once per warn_interval seconds for each topic and state.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        *,
+        warn_interval: float = 60.0,
+        buckets: Sequence[float] = BUCKETS,
+    ):
+        """Initialize the monitor."""
+        self.threshold = threshold
+        self.warn_interval = warn_interval
+        self.buckets = buckets
+        self.delivery: Dict[LagKey, Histogram] = {}
+        self.response: Dict[LagKey, Histogram] = {}
+        self._warned: Dict[LagKey, float] = {}
+
+    def _histogram(self, histograms: Dict[LagKey, Histogram], key: LagKey) -> Histogram:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(self.buckets)
+        return histogram
+
+    def delivered(
+        self, topic: str, state: Optional[str], updated_at: str, received: float
+    ):
+        """Record the delivery lag of an event received at POSIX time received."""
+        updated = parse_timestamp(updated_at)
+        if updated is None:
+            return
+        lag = received - updated
+        key = (topic, state)
+        self._histogram(self.delivery, key).record(lag)
+
+        if self.threshold is not None and lag > self.threshold:
+            now = time.monotonic()
+            if now - self._warned.get(key, -self.warn_interval) >= self.warn_interval:
+                self._warned[key] = now
+                LOGGER.warning(
+                    "Events with topic %s and state %s delivered %.1f s after the "
+                    "record was updated; the agent may be backed up",
+                    topic,
+                    state,
+                    lag,
+                )
+
+    def responded(self, topic: str, state: Optional[str], lag: float):
+        """Record the time from a write being sent to an awaited event arriving."""
+        self._histogram(self.response, (topic, state)).record(lag)
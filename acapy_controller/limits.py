@@ -0,0 +1,182 @@
+"""Adaptive concurrency and circuit breaking per agent.
+
+AdaptiveConcurrency bounds the number of admin API requests in flight to an
+agent, growing the bound additively while requests are fast and succeed and
+cutting it multiplicatively (AIMD) when latency rises or the agent errors.
+
+CircuitBreaker fails requests fast once the recent error rate of an agent is too
+high, then probes /status/live and /status/ready before letting requests
+through again.
+
+Set either or both on a controller; they apply to every request attempt.
+"""
+
+import asyncio
+from collections import deque
+import logging
+import time
+from typing import Awaitable, Callable, Deque, Literal, Optional
+
+from aiohttp import ClientConnectionError
+
+from .controller import ControllerError, ControllerResponseError
+
+LOGGER = logging.getLogger(__name__)
+
+
+def is_overload(error: Optional[BaseException]) -> bool:
+    """Return whether error indicates the agent is overloaded or unhealthy.
+
+    Client errors (4xx other than 429) are the caller's fault and do not count.
+    """
+    if error is None:
+        return False
+    if isinstance(error, ControllerResponseError):
+        return error.status >= 500 or error.status == 429
+    return isinstance(error, (ClientConnectionError, asyncio.TimeoutError))
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on the number of requests in flight to an agent."""
+
+    def __init__(
+        self,
+        *,
+        initial: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        latency_target: Optional[float] = None,
+        tolerance: float = 2.0,
+        backoff: float = 0.5,
+    ):
+        """Initialize the limit.
+
+        A request is congested if it fails with an overload error or takes
+        longer than latency_target seconds. Without a target, the lowest latency
+        seen times tolerance is used. On congestion the limit is multiplied by
+        backoff; otherwise it grows by about one per limit's worth of requests.
+        """
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.in_flight = 0
+        self.min_latency: Optional[float] = None
+        self._epoch = 0
+        self._condition = asyncio.Condition()
+
+    def _target(self) -> Optional[float]:
+        if self.latency_target is not None:
+            return self.latency_target
+        if self.min_latency is None:
+            return None
+        return self.min_latency * self.tolerance
+
+    async def acquire(self) -> int:
+        """Wait for a slot, returning a token to pass to release."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return self._epoch
+
+    async def release(
+        self, token: int, latency: Optional[float], error: Optional[BaseException]
+    ):
+        """Release a slot, adjusting the limit given the outcome of the request.
+
+        Pass latency None if the request was abandoned without an outcome.
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            if latency is not None:
+                self._adjust(token, latency, error)
+            self._condition.notify_all()
+
+    def _adjust(self, token: int, latency: float, error: Optional[BaseException]):
+        if error is None and (self.min_latency is None or latency < self.min_latency):
+            self.min_latency = latency
+
+        target = self._target()
+        congested = is_overload(error) or (target is not None and latency > target)
+        if not congested:
+            self.limit = min(self.limit + 1 / self.limit, self.max_limit)
+        elif token == self._epoch:
+            # Cut at most once per round of requests started at the old limit
+            self._epoch += 1
+            self.limit = max(self.limit * self.backoff, self.min_limit)
+            LOGGER.debug("Concurrency limit reduced to %d", self.limit)
+
+
+class CircuitOpenError(ControllerError):
+    """Raised when a request is refused because an agent's circuit is open."""
+
+
+class CircuitBreaker:
+    """Fail fast on an agent whose recent requests mostly fail."""
+
+    def __init__(
+        self,
+        *,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        min_requests: int = 10,
+        reset_timeout: float = 5.0,
+    ):
+        """Initialize the breaker.
+
+        The circuit opens when at least min_requests of the last window requests
+        have completed and failure_rate of them failed with overload errors.
+        After reset_timeout seconds the agent's health is probed; the circuit
+        closes if it is live and ready and stays open for another reset_timeout
+        otherwise.
+        """
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.reset_timeout = reset_timeout
+        self.state: Literal["closed", "open", "half-open"] = "closed"
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+
+    def _open(self):
+        self.state = "open"
+        self._opened_at = time.monotonic()
+
+    async def allow(self, probe: Callable[[], Awaitable[bool]]):
+        """Raise CircuitOpenError unless requests may be made.
+
+        probe checks the health of the agent.
+        """
+        if self.state == "closed":
+            return
+        if (
+            self.state == "half-open"
+            or time.monotonic() - self._opened_at < self.reset_timeout
+        ):
+            raise CircuitOpenError("Circuit open: agent is unhealthy")
+
+        self.state = "half-open"
+        try:
+            healthy = await probe()
+        except BaseException:
+            self._open()
+            raise
+        if not healthy:
+            self._open()
+            raise CircuitOpenError("Circuit open: agent failed health check")
+
+        LOGGER.info("Circuit closed: agent is healthy")
+        self.state = "closed"
+        self._outcomes.clear()
+
+    def record(self, error: Optional[BaseException]):
+        """Record the outcome of a request."""
+        if self.state != "closed":
+            return
+        self._outcomes.append(is_overload(error))
+        if len(self._outcomes) < self.min_requests:
+            return
+        if sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+            LOGGER.warning("Circuit opened: agent is failing")
+            self._open()
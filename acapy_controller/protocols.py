@@ -2,12 +2,38 @@
 
 import asyncio
 from dataclasses import dataclass
+import json
 import logging
 from secrets import randbelow, token_hex
-from typing import Any, Dict, List, Mapping, Optional, Tuple, Type, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Container,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 from uuid import uuid4
 
 from .controller import Controller, ControllerError, MinType, Minimal, omit_none, params
+from .flows import (
+    Action,
+    Flow,
+    FlowScheduler,
+    Parallel,
+    Ref,
+    Request,
+    Transition,
+    concurrently,
+    run_flow,
+)
 from .onboarding import get_onboarder
 
 
@@ -249,22 +275,27 @@ async def didexchange(
         response=ConnRecord,
     )
 
-    await invitee.event_with_values(
-        topic="connections",
-        connection_id=invitee_conn.connection_id,
-        rfc23_state="response-received",
-    )
-    invitee_conn = await invitee.event_with_values(
-        topic="connections",
-        connection_id=invitee_conn.connection_id,
-        rfc23_state="completed",
-        event_type=ConnRecord,
-    )
-    inviter_conn = await inviter.event_with_values(
-        topic="connections",
-        connection_id=inviter_conn.connection_id,
-        rfc23_state="completed",
-        event_type=ConnRecord,
+    async def _invitee_completed(connection_id: str) -> ConnRecord:
+        await invitee.event_with_values(
+            topic="connections",
+            connection_id=connection_id,
+            rfc23_state="response-received",
+        )
+        return await invitee.event_with_values(
+            topic="connections",
+            connection_id=connection_id,
+            rfc23_state="completed",
+            event_type=ConnRecord,
+        )
+
+    invitee_conn, inviter_conn = await concurrently(
+        _invitee_completed(invitee_conn.connection_id),
+        inviter.event_with_values(
+            topic="connections",
+            connection_id=inviter_conn.connection_id,
+            rfc23_state="completed",
+            event_type=ConnRecord,
+        ),
     )
 
     return inviter_conn, invitee_conn
@@ -295,19 +326,21 @@ async def request_mediation_v1(
         event_type=MediationRecord,
     )
     await mediator.post(f"/mediation/requests/{mediator_record.mediation_id}/grant")
-    client_record = await client.event_with_values(
-        topic="mediation",
-        connection_id=client_connection_id,
-        mediation_id=client_record.mediation_id,
-        state="granted",
-        event_type=MediationRecord,
-    )
-    mediator_record = await mediator.event_with_values(
-        topic="mediation",
-        connection_id=mediator_connection_id,
-        mediation_id=mediator_record.mediation_id,
-        state="granted",
-        event_type=MediationRecord,
+    client_record, mediator_record = await concurrently(
+        client.event_with_values(
+            topic="mediation",
+            connection_id=client_connection_id,
+            mediation_id=client_record.mediation_id,
+            state="granted",
+            event_type=MediationRecord,
+        ),
+        mediator.event_with_values(
+            topic="mediation",
+            connection_id=mediator_connection_id,
+            mediation_id=mediator_record.mediation_id,
+            state="granted",
+            event_type=MediationRecord,
+        ),
     )
     return mediator_record, client_record
 
@@ -459,11 +492,8 @@ async def indy_anoncred_credential_artifacts(
 ):
     """Prepare credential artifacts for indy anoncreds."""
     # Get wallet type
-    if agent.wallet_type is None:
-        raise ControllerError(
-            "Wallet type not found. Please correctly set up the controller."
-        )
-    anoncreds_wallet = agent.wallet_type == "askar-anoncreds"
+    wallet_type = await agent.get_wallet_type()
+    anoncreds_wallet = wallet_type == "askar-anoncreds"
 
     # If using wallet=askar-anoncreds:
     if anoncreds_wallet:
@@ -472,6 +502,9 @@ async def indy_anoncred_credential_artifacts(
                 "If using askar-anoncreds wallet, issuerID must be specified."
             )
 
+        # Ignore endorsements acked before these artifacts were requested
+        since = agent.mark()
+
         schema = (
             await agent.post(
                 "/anoncreds/schema",
@@ -490,7 +523,7 @@ async def indy_anoncred_credential_artifacts(
 
         if endorser_connection_id:
             await agent.event_with_values(
-                "endorse_transaction", state="transaction_acked"
+                "endorse_transaction", state="transaction_acked", since=since
             )
 
         cred_def = (
@@ -517,18 +550,18 @@ async def indy_anoncred_credential_artifacts(
         if endorser_connection_id:
             # Cred Def
             await agent.event_with_values(
-                "endorse_transaction", timeout=120, state="transaction_acked"
+                "endorse_transaction", timeout=120, state="transaction_acked", since=since
             )
             # Rev Reg Def x2
             await agent.event_with_values(
-                "endorse_transaction", timeout=60, state="transaction_acked"
+                "endorse_transaction", timeout=60, state="transaction_acked", since=since
             )
             await agent.event_with_values(
-                "endorse_transaction", timeout=60, state="transaction_acked"
+                "endorse_transaction", timeout=60, state="transaction_acked", since=since
             )
             # Init list
             await agent.event_with_values(
-                "endorse_transaction", timeout=60, state="transaction_acked"
+                "endorse_transaction", timeout=60, state="transaction_acked", since=since
             )
 
         return schema, cred_def
@@ -560,6 +593,24 @@ async def indy_anoncred_credential_artifacts(
     return schema, cred_def
 
 
+async def enable_auto_respond(agent: Controller):
+    """Have an agent respond to credential offers on its own.
+
+    Holders must respond to offers on their own for the fast mode of issuance
+    helpers, either through this or by starting the agent with
+    --auto-respond-credential-offer. Issuers and verifiers need nothing: fast
+    mode sets auto_issue and auto_verify on each exchange.
+
+    The setting applies to every offer the agent's wallet receives, so issuance
+    to it without fast mode then fails: the agent has already sent the request
+    the helper would send.
+    """
+    await agent.put(
+        "/settings",
+        json={"extra_settings": {"ACAPY_AUTO_RESPOND_CREDENTIAL_OFFER": True}},
+    )
+
+
 @dataclass
 class V10CredentialExchange(Minimal):
     """V1.0 credential exchange record."""
@@ -580,15 +631,19 @@ async def indy_issue_credential_v1(
     holder_connection_id: str,
     cred_def_id: str,
     attributes: Mapping[str, str],
+    *,
+    fast: bool = False,
 ) -> Tuple[V10CredentialExchange, V10CredentialExchange]:
     """Issue an indy credential using issue-credential/1.0.
 
-    Issuer and holder should already be connected.
+    Issuer and holder should already be connected. If fast, the holder must
+    respond to offers on its own (see enable_auto_respond) and the issuer issues
+    on its own; the controller only stores the credential and awaits states.
     """
     issuer_cred_ex = await issuer.post(
         "/issue-credential/send-offer",
         json={
-            "auto_issue": False,
+            "auto_issue": fast,
             "auto_remove": False,
             "comment": "Credential from minimal example",
             "trace": False,
@@ -618,25 +673,26 @@ async def indy_issue_credential_v1(
     )
     holder_cred_ex_id = holder_cred_ex.credential_exchange_id
 
-    holder_cred_ex = await holder.post(
-        f"/issue-credential/records/{holder_cred_ex_id}/send-request",
-        response=V10CredentialExchange,
-    )
+    if not fast:
+        holder_cred_ex = await holder.post(
+            f"/issue-credential/records/{holder_cred_ex_id}/send-request",
+            response=V10CredentialExchange,
+        )
 
-    await issuer.event_with_values(
-        topic="issue_credential",
-        credential_exchange_id=issuer_cred_ex_id,
-        state="request_received",
-    )
+        await issuer.event_with_values(
+            topic="issue_credential",
+            credential_exchange_id=issuer_cred_ex_id,
+            state="request_received",
+        )
 
-    # TODO Remove after ACA-Py 0.12.0
-    # Race condition in DB commit vs webhook emit
-    await asyncio.sleep(1)
-    issuer_cred_ex = await issuer.post(
-        f"/issue-credential/records/{issuer_cred_ex_id}/issue",
-        json={},
-        response=V10CredentialExchange,
-    )
+        # TODO Remove after ACA-Py 0.12.0
+        # Race condition in DB commit vs webhook emit
+        await asyncio.sleep(1)
+        issuer_cred_ex = await issuer.post(
+            f"/issue-credential/records/{issuer_cred_ex_id}/issue",
+            json={},
+            response=V10CredentialExchange,
+        )
 
     await holder.event_with_values(
         topic="issue_credential",
@@ -649,18 +705,19 @@ async def indy_issue_credential_v1(
         json={},
         response=V10CredentialExchange,
     )
-    issuer_cred_ex = await issuer.event_with_values(
-        topic="issue_credential",
-        event_type=V10CredentialExchange,
-        credential_exchange_id=issuer_cred_ex_id,
-        state="credential_acked",
-    )
-
-    holder_cred_ex = await holder.event_with_values(
-        topic="issue_credential",
-        event_type=V10CredentialExchange,
-        credential_exchange_id=holder_cred_ex_id,
-        state="credential_acked",
+    issuer_cred_ex, holder_cred_ex = await concurrently(
+        issuer.event_with_values(
+            topic="issue_credential",
+            event_type=V10CredentialExchange,
+            credential_exchange_id=issuer_cred_ex_id,
+            state="credential_acked",
+        ),
+        holder.event_with_values(
+            topic="issue_credential",
+            event_type=V10CredentialExchange,
+            credential_exchange_id=holder_cred_ex_id,
+            state="credential_acked",
+        ),
     )
 
     return issuer_cred_ex, holder_cred_ex
@@ -701,6 +758,215 @@ class V20CredExRecordDetail(Minimal):
     anoncreds: V20CredExRecordAnonCreds | None = None
 
 
+def _credential_offer_v2(
+    connection_id: str,
+    filter: Mapping[str, Any],
+    attributes: Optional[Mapping[str, str]] = None,
+    *,
+    fast: bool = False,
+) -> Dict[str, Any]:
+    """Return the body of an issue-credential/2.0 send-offer request."""
+    offer: Dict[str, Any] = {
+        "auto_issue": fast,
+        "auto_remove": False,
+        "comment": "Credential from minimal example",
+        "trace": False,
+        "connection_id": connection_id,
+        "filter": filter,
+    }
+    if attributes is not None:
+        offer["credential_preview"] = {
+            "type": "issue-credential-2.0/2.0/credential-preview",
+            "attributes": [
+                {
+                    "mime_type": None,
+                    "name": name,
+                    "value": value,
+                }
+                for name, value in attributes.items()
+            ],
+        }
+    return offer
+
+
+_ISSUE_CREDENTIAL_V2_EXCHANGE = (
+    Transition(
+        "send-offer",
+        "issuer",
+        action=Request(
+            "POST",
+            "/issue-credential-2.0/send-offer",
+            json=Ref("offer"),
+            response=V20CredExRecord,
+        ),
+        save={"issuer_cred_ex_id": "cred_ex_id", "thread_id": "thread_id"},
+    ),
+    Transition(
+        "offer-received",
+        "holder",
+        topic="issue_credential_v2_0",
+        values={
+            "connection_id": Ref("holder_connection_id"),
+            "state": "offer-received",
+        },
+        event_type=V20CredExRecord,
+        save={"holder_cred_ex_id": "cred_ex_id"},
+        record="/issue-credential-2.0/records?thread_id={thread_id}",
+        record_key="cred_ex_record",
+    ),
+    Transition(
+        "send-request",
+        "holder",
+        action=Request(
+            "POST",
+            "/issue-credential-2.0/records/{holder_cred_ex_id}/send-request",
+            response=V20CredExRecord,
+        ),
+    ),
+    Transition(
+        "request-received",
+        "issuer",
+        topic="issue_credential_v2_0",
+        values={"cred_ex_id": Ref("issuer_cred_ex_id"), "state": "request-received"},
+        record="/issue-credential-2.0/records/{issuer_cred_ex_id}",
+        record_key="cred_ex_record",
+    ),
+    Transition(
+        "issue",
+        "issuer",
+        action=Request(
+            "POST",
+            "/issue-credential-2.0/records/{issuer_cred_ex_id}/issue",
+            json={},
+            response=V20CredExRecordDetail,
+        ),
+    ),
+    Transition(
+        "credential-received",
+        "holder",
+        topic="issue_credential_v2_0",
+        values={
+            "cred_ex_id": Ref("holder_cred_ex_id"),
+            "state": "credential-received",
+        },
+        record="/issue-credential-2.0/records/{holder_cred_ex_id}",
+        record_key="cred_ex_record",
+    ),
+)
+
+_ISSUE_CREDENTIAL_V2_STORE = (
+    Transition(
+        "store",
+        "holder",
+        action=Request(
+            "POST",
+            "/issue-credential-2.0/records/{holder_cred_ex_id}/store",
+            json={},
+            response=V20CredExRecordDetail,
+        ),
+    ),
+    Transition(
+        "holder-done",
+        "holder",
+        topic="issue_credential_v2_0",
+        values={"cred_ex_id": Ref("holder_cred_ex_id"), "state": "done"},
+        event_type=V20CredExRecord,
+        result="holder_cred_ex",
+        record="/issue-credential-2.0/records/{holder_cred_ex_id}",
+        record_key="cred_ex_record",
+    ),
+)
+
+_ISSUE_CREDENTIAL_V2_ISSUER_DONE = Transition(
+    "issuer-done",
+    "issuer",
+    topic="issue_credential_v2_0",
+    values={"cred_ex_id": Ref("issuer_cred_ex_id"), "state": "done"},
+    event_type=V20CredExRecord,
+    result="issuer_cred_ex",
+    record="/issue-credential-2.0/records/{issuer_cred_ex_id}",
+    record_key="cred_ex_record",
+)
+
+
+def _cred_ex_format_transitions(
+    format: str, record_type: Type[Minimal]
+) -> Tuple[Transition, Transition]:
+    """Return transitions awaiting the format details of the issuer and holder."""
+    return (
+        Transition(
+            f"issuer-{format}",
+            "issuer",
+            topic=f"issue_credential_v2_0_{format}",
+            values={"cred_ex_id": Ref("issuer_cred_ex_id")},
+            event_type=record_type,
+            result="issuer_format_record",
+            record="/issue-credential-2.0/records/{issuer_cred_ex_id}",
+            record_key=format,
+        ),
+        Transition(
+            f"holder-{format}",
+            "holder",
+            topic=f"issue_credential_v2_0_{format}",
+            values={"cred_ex_id": Ref("holder_cred_ex_id")},
+            event_type=record_type,
+            result="holder_format_record",
+            record="/issue-credential-2.0/records/{holder_cred_ex_id}",
+            record_key=format,
+        ),
+    )
+
+
+# Transitions taken by the agents on their own in fast mode
+_AUTO_ISSUE_TRANSITIONS = ("send-request", "request-received", "issue")
+
+
+def _issue_credential_v2_flow(
+    format: Optional[str] = None,
+    record_type: Optional[Type[Minimal]] = None,
+    *,
+    fast: bool = False,
+) -> Flow:
+    """Return an issue-credential/2.0 flow, awaiting the details of format if set.
+
+    Once the holder has received the credential, storing it and the waits for
+    both records to be done run concurrently, each followed by the wait for its
+    format details. The fast flow leaves requesting and issuing the credential
+    to the agents.
+    """
+    exchange = tuple(
+        transition
+        for transition in _ISSUE_CREDENTIAL_V2_EXCHANGE
+        if not fast or transition.name not in _AUTO_ISSUE_TRANSITIONS
+    )
+    issuer: Tuple[Transition, ...] = (_ISSUE_CREDENTIAL_V2_ISSUER_DONE,)
+    holder = _ISSUE_CREDENTIAL_V2_STORE
+    name = "issue-credential-2.0"
+    if format and record_type:
+        issuer_format, holder_format = _cred_ex_format_transitions(format, record_type)
+        issuer += (issuer_format,)
+        holder += (holder_format,)
+        name += f"-{format}"
+    return Flow(
+        f"{name}-fast" if fast else name,
+        (*exchange, Parallel("finish", (holder, issuer))),
+    )
+
+
+ISSUE_CREDENTIAL_V2 = _issue_credential_v2_flow()
+INDY_ISSUE_CREDENTIAL_V2 = _issue_credential_v2_flow("indy", V20CredExRecordIndy)
+ANONCREDS_ISSUE_CREDENTIAL_V2 = _issue_credential_v2_flow(
+    "anoncreds", V20CredExRecordAnonCreds
+)
+ISSUE_CREDENTIAL_V2_FAST = _issue_credential_v2_flow(fast=True)
+INDY_ISSUE_CREDENTIAL_V2_FAST = _issue_credential_v2_flow(
+    "indy", V20CredExRecordIndy, fast=True
+)
+ANONCREDS_ISSUE_CREDENTIAL_V2_FAST = _issue_credential_v2_flow(
+    "anoncreds", V20CredExRecordAnonCreds, fast=True
+)
+
+
 async def indy_issue_credential_v2(
     issuer: Controller,
     holder: Controller,
@@ -708,100 +974,38 @@ async def indy_issue_credential_v2(
     holder_connection_id: str,
     cred_def_id: str,
     attributes: Mapping[str, str],
+    *,
+    scheduler: Optional[FlowScheduler] = None,
+    fast: bool = False,
 ) -> Tuple[V20CredExRecordDetail, V20CredExRecordDetail]:
     """Issue an indy credential using issue-credential/2.0.
 
-    Issuer and holder should already be connected.
+    Issuer and holder should already be connected. If fast, the holder must
+    respond to offers on its own (see enable_auto_respond) and the issuer issues
+    on its own; the controller only stores the credential and awaits states.
     """
-
-    issuer_cred_ex = await issuer.post(
-        "/issue-credential-2.0/send-offer",
-        json={
-            "auto_issue": False,
-            "auto_remove": False,
-            "comment": "Credential from minimal example",
-            "trace": False,
-            "connection_id": issuer_connection_id,
-            "filter": {"indy": {"cred_def_id": cred_def_id}},
-            "credential_preview": {
-                "type": "issue-credential-2.0/2.0/credential-preview",  # pyright: ignore
-                "attributes": [
-                    {
-                        "mime_type": None,
-                        "name": name,
-                        "value": value,
-                    }
-                    for name, value in attributes.items()
-                ],
-            },
+    state = await run_flow(
+        INDY_ISSUE_CREDENTIAL_V2_FAST if fast else INDY_ISSUE_CREDENTIAL_V2,
+        {"issuer": issuer, "holder": holder},
+        {
+            "holder_connection_id": holder_connection_id,
+            "offer": _credential_offer_v2(
+                issuer_connection_id,
+                {"indy": {"cred_def_id": cred_def_id}},
+                attributes,
+                fast=fast,
+            ),
         },
-        response=V20CredExRecord,
-    )
-    issuer_cred_ex_id = issuer_cred_ex.cred_ex_id
-
-    holder_cred_ex = await holder.event_with_values(
-        topic="issue_credential_v2_0",
-        event_type=V20CredExRecord,
-        connection_id=holder_connection_id,
-        state="offer-received",
-    )
-    holder_cred_ex_id = holder_cred_ex.cred_ex_id
-
-    holder_cred_ex = await holder.post(
-        f"/issue-credential-2.0/records/{holder_cred_ex_id}/send-request",
-        response=V20CredExRecord,
-    )
-
-    await issuer.event_with_values(
-        topic="issue_credential_v2_0",
-        cred_ex_id=issuer_cred_ex_id,
-        state="request-received",
-    )
-
-    issuer_cred_ex = await issuer.post(
-        f"/issue-credential-2.0/records/{issuer_cred_ex_id}/issue",
-        json={},
-        response=V20CredExRecordDetail,
-    )
-
-    await holder.event_with_values(
-        topic="issue_credential_v2_0",
-        cred_ex_id=holder_cred_ex_id,
-        state="credential-received",
-    )
-
-    holder_cred_ex = await holder.post(
-        f"/issue-credential-2.0/records/{holder_cred_ex_id}/store",
-        json={},
-        response=V20CredExRecordDetail,
-    )
-    issuer_cred_ex = await issuer.event_with_values(
-        topic="issue_credential_v2_0",
-        event_type=V20CredExRecord,
-        cred_ex_id=issuer_cred_ex_id,
-        state="done",
-    )
-    issuer_indy_record = await issuer.event_with_values(
-        topic="issue_credential_v2_0_indy",
-        event_type=V20CredExRecordIndy,
-    )
-
-    holder_cred_ex = await holder.event_with_values(
-        topic="issue_credential_v2_0",
-        event_type=V20CredExRecord,
-        cred_ex_id=holder_cred_ex_id,
-        state="done",
-    )
-    holder_indy_record = await holder.event_with_values(
-        topic="issue_credential_v2_0_indy",
-        event_type=V20CredExRecordIndy,
+        scheduler=scheduler,
     )
-
     return (
-        V20CredExRecordDetail(cred_ex_record=issuer_cred_ex, indy=issuer_indy_record),
         V20CredExRecordDetail(
-            cred_ex_record=holder_cred_ex,
-            indy=holder_indy_record,
+            cred_ex_record=state["issuer_cred_ex"],
+            indy=state["issuer_format_record"],
+        ),
+        V20CredExRecordDetail(
+            cred_ex_record=state["holder_cred_ex"],
+            indy=state["holder_format_record"],
         ),
     )
 
@@ -813,103 +1017,38 @@ async def anoncreds_issue_credential_v2(
     holder_connection_id: str,
     cred_def_id: str,
     attributes: Mapping[str, str],
+    *,
+    scheduler: Optional[FlowScheduler] = None,
+    fast: bool = False,
 ) -> Tuple[V20CredExRecordDetail, V20CredExRecordDetail]:
     """Issue an indy credential using issue-credential/2.0.
 
-    Issuer and holder should already be connected.
+    Issuer and holder should already be connected. If fast, the holder must
+    respond to offers on its own (see enable_auto_respond) and the issuer issues
+    on its own; the controller only stores the credential and awaits states.
     """
-
-    issuer_cred_ex = await issuer.post(
-        "/issue-credential-2.0/send-offer",
-        json={
-            "auto_issue": False,
-            "auto_remove": False,
-            "comment": "Credential from minimal example",
-            "trace": False,
-            "connection_id": issuer_connection_id,
-            "filter": {"anoncreds": {"cred_def_id": cred_def_id}},
-            "credential_preview": {
-                "type": "issue-credential-2.0/2.0/credential-preview",  # pyright: ignore
-                "attributes": [
-                    {
-                        "mime_type": None,
-                        "name": name,
-                        "value": value,
-                    }
-                    for name, value in attributes.items()
-                ],
-            },
+    state = await run_flow(
+        ANONCREDS_ISSUE_CREDENTIAL_V2_FAST if fast else ANONCREDS_ISSUE_CREDENTIAL_V2,
+        {"issuer": issuer, "holder": holder},
+        {
+            "holder_connection_id": holder_connection_id,
+            "offer": _credential_offer_v2(
+                issuer_connection_id,
+                {"anoncreds": {"cred_def_id": cred_def_id}},
+                attributes,
+                fast=fast,
+            ),
         },
-        response=V20CredExRecord,
-    )
-    issuer_cred_ex_id = issuer_cred_ex.cred_ex_id
-
-    holder_cred_ex = await holder.event_with_values(
-        topic="issue_credential_v2_0",
-        event_type=V20CredExRecord,
-        connection_id=holder_connection_id,
-        state="offer-received",
-    )
-    holder_cred_ex_id = holder_cred_ex.cred_ex_id
-
-    holder_cred_ex = await holder.post(
-        f"/issue-credential-2.0/records/{holder_cred_ex_id}/send-request",
-        response=V20CredExRecord,
-    )
-
-    await issuer.event_with_values(
-        topic="issue_credential_v2_0",
-        cred_ex_id=issuer_cred_ex_id,
-        state="request-received",
-    )
-
-    issuer_cred_ex = await issuer.post(
-        f"/issue-credential-2.0/records/{issuer_cred_ex_id}/issue",
-        json={},
-        response=V20CredExRecordDetail,
-    )
-
-    await holder.event_with_values(
-        topic="issue_credential_v2_0",
-        cred_ex_id=holder_cred_ex_id,
-        state="credential-received",
-    )
-
-    holder_cred_ex = await holder.post(
-        f"/issue-credential-2.0/records/{holder_cred_ex_id}/store",
-        json={},
-        response=V20CredExRecordDetail,
-    )
-    issuer_cred_ex = await issuer.event_with_values(
-        topic="issue_credential_v2_0",
-        event_type=V20CredExRecord,
-        cred_ex_id=issuer_cred_ex_id,
-        state="done",
-    )
-    issuer_anoncreds_record = await issuer.event_with_values(
-        topic="issue_credential_v2_0_anoncreds",
-        event_type=V20CredExRecordAnonCreds,
-    )
-
-    holder_cred_ex = await holder.event_with_values(
-        topic="issue_credential_v2_0",
-        event_type=V20CredExRecord,
-        cred_ex_id=holder_cred_ex_id,
-        state="done",
+        scheduler=scheduler,
     )
-    holder_anoncreds_record = await holder.event_with_values(
-        topic="issue_credential_v2_0_anoncreds",
-        event_type=V20CredExRecordAnonCreds,
-    )
-
     return (
         V20CredExRecordDetail(
-            cred_ex_record=issuer_cred_ex,
-            anoncreds=issuer_anoncreds_record,
+            cred_ex_record=state["issuer_cred_ex"],
+            anoncreds=state["issuer_format_record"],
         ),
         V20CredExRecordDetail(
-            cred_ex_record=holder_cred_ex,
-            anoncreds=holder_anoncreds_record,
+            cred_ex_record=state["holder_cred_ex"],
+            anoncreds=state["holder_format_record"],
         ),
     )
 
@@ -937,6 +1076,9 @@ class IndyCredInfo(Minimal):
 
     referent: str
     attrs: Dict[str, Any]
+    cred_def_id: Optional[str] = None
+    rev_reg_id: Optional[str] = None
+    cred_rev_id: Optional[str] = None
 
 
 @dataclass
@@ -955,44 +1097,264 @@ class IndyCredPrecis(Minimal):
         return super().deserialize(value)
 
 
-def anoncreds_auto_select_credentials_for_presentation_request(
-    presentation_request: Union[IndyProofRequest, dict],
-    relevant_creds: List[IndyCredPrecis],
-) -> IndyPresSpec:
-    """Select credentials to use for presentation automatically."""
-    if isinstance(presentation_request, dict):
-        presentation_request = IndyProofRequest.deserialize(presentation_request)
+@dataclass(frozen=True)
+class SelectionCandidate:
+    """A credential that could satisfy a presentation referent.
+
+    position is the order in which the agent returned the credential for the
+    referent, coverage is the number of requested referents the credential can
+    satisfy, and chosen is whether it is already selected for another referent.
+    """
+
+    precis: IndyCredPrecis
+    position: int
+    coverage: int
+    chosen: bool
+
+
+# Strategies map a candidate to a sort key; the candidate with the lowest key wins
+SelectionStrategy = Callable[[SelectionCandidate], Any]
+
+
+def last_returned(candidate: SelectionCandidate) -> Any:
+    """Prefer the credential the agent returned last for the referent.
+
+    ACA-Py does not report when a credential was stored, so this does not
+    necessarily select the newest credential.
+    """
+    return -candidate.position
 
-    requested_attributes = {}
-    for pres_referrent in presentation_request.requested_attributes.keys():
-        for cred_precis in relevant_creds:
-            if pres_referrent in cred_precis.presentation_referents:
-                requested_attributes[pres_referrent] = {
+
+def fewest_credentials(candidate: SelectionCandidate) -> Any:
+    """Prefer credentials that satisfy the most referents in the request."""
+    return (not candidate.chosen, -candidate.coverage)
+
+
+def excluding(cred_ids: Container[str]) -> SelectionStrategy:
+    """Prefer credentials whose ids are not in cred_ids.
+
+    No revocation status is checked; to avoid revoked credentials, pass the ids
+    of those the holder reports revoked, e.g. by GET /credential/revoked/{id}.
+    """
+
+    def _excluding(candidate: SelectionCandidate) -> Any:
+        return candidate.precis.cred_info.referent in cred_ids
+
+    return _excluding
+
+
+def prefer_cred_def(cred_def_id: str) -> SelectionStrategy:
+    """Prefer credentials issued from the given credential definition."""
+
+    def _prefer_cred_def(candidate: SelectionCandidate) -> Any:
+        return candidate.precis.cred_info.cred_def_id != cred_def_id
+
+    return _prefer_cred_def
+
+
+def index_credentials_by_referent(
+    relevant_creds: Iterable[IndyCredPrecis],
+) -> Dict[str, List[IndyCredPrecis]]:
+    """Index credentials by the presentation referents they can satisfy."""
+    index: Dict[str, List[IndyCredPrecis]] = {}
+    for cred_precis in relevant_creds:
+        for referent in cred_precis.presentation_referents:
+            index.setdefault(referent, []).append(cred_precis)
+    return index
+
+
+class CredentialSelector:
+    """Select credentials to use for a presentation.
+
+    Candidates for each referent are ranked by the strategies in order, the
+    first strategy taking precedence; remaining ties go to the candidate the
+    agent returned first. Without strategies, last_returned is used. Referents
+    with no candidates fall back to values from self_attested, keyed by
+    attribute name, when the attribute is requested without restrictions.
+
+    If max_candidates is set, fetching candidates for a referent stops once that
+    many have been found; this is only useful with strategies that are satisfied
+    by the first candidates returned, such as prefer_cred_def with a narrowing
+    extra_query.
+    """
+
+    def __init__(
+        self,
+        *strategies: SelectionStrategy,
+        self_attested: Optional[Mapping[str, str]] = None,
+        max_candidates: Optional[int] = None,
+    ):
+        """Initialize the selector."""
+        self.strategies = strategies or (last_returned,)
+        self.self_attested = dict(self_attested or {})
+        self.max_candidates = max_candidates
+
+    def _best(
+        self,
+        candidates: Sequence[IndyCredPrecis],
+        coverage: Mapping[str, int],
+        chosen: Container[str],
+    ) -> Optional[IndyCredPrecis]:
+        best = None
+        best_key = None
+        for position, cred_precis in enumerate(candidates):
+            cred_id = cred_precis.cred_info.referent
+            candidate = SelectionCandidate(
+                cred_precis, position, coverage[cred_id], cred_id in chosen
+            )
+            key = tuple(strategy(candidate) for strategy in self.strategies)
+            if best_key is None or key < best_key:
+                best, best_key = cred_precis, key
+        return best
+
+    def select(
+        self,
+        presentation_request: Union[IndyProofRequest, dict],
+        relevant_creds: Iterable[IndyCredPrecis],
+    ) -> IndyPresSpec:
+        """Select credentials from those returned by the agent for the request."""
+        return self.select_from_index(
+            presentation_request, index_credentials_by_referent(relevant_creds)
+        )
+
+    def select_from_index(
+        self,
+        presentation_request: Union[IndyProofRequest, dict],
+        index: Mapping[str, Sequence[IndyCredPrecis]],
+    ) -> IndyPresSpec:
+        """Select credentials from an index of candidates by referent."""
+        if isinstance(presentation_request, dict):
+            presentation_request = IndyProofRequest.deserialize(presentation_request)
+
+        requested = (
+            *presentation_request.requested_attributes,
+            *presentation_request.requested_predicates,
+        )
+        coverage: Dict[str, int] = {}
+        for referent in requested:
+            for cred_id in {c.cred_info.referent for c in index.get(referent, ())}:
+                coverage[cred_id] = coverage.get(cred_id, 0) + 1
+
+        chosen = set()
+        requested_attributes = {}
+        self_attested_attributes = {}
+        for referent, spec in presentation_request.requested_attributes.items():
+            cred_precis = self._best(index.get(referent, ()), coverage, chosen)
+            if cred_precis:
+                chosen.add(cred_precis.cred_info.referent)
+                requested_attributes[referent] = {
                     "cred_id": cred_precis.cred_info.referent,
                     "revealed": True,
                 }
-    requested_predicates = {}
-    for pres_referrent in presentation_request.requested_predicates.keys():
-        for cred_precis in relevant_creds:
-            if pres_referrent in cred_precis.presentation_referents:
-                requested_predicates[pres_referrent] = {
+            elif not spec.get("restrictions") and spec.get("name") in self.self_attested:
+                self_attested_attributes[referent] = self.self_attested[spec["name"]]
+
+        requested_predicates = {}
+        for referent in presentation_request.requested_predicates:
+            cred_precis = self._best(index.get(referent, ()), coverage, chosen)
+            if cred_precis:
+                chosen.add(cred_precis.cred_info.referent)
+                requested_predicates[referent] = {
                     "cred_id": cred_precis.cred_info.referent,
                 }
 
-    return IndyPresSpec.deserialize(
-        {
-            "requested_attributes": requested_attributes,
-            "requested_predicates": requested_predicates,
-            "self_attested_attributes": {},
-        }
-    )
-
+        return IndyPresSpec.deserialize(
+            {
+                "requested_attributes": requested_attributes,
+                "requested_predicates": requested_predicates,
+                "self_attested_attributes": self_attested_attributes,
+            }
+        )
 
-@dataclass
-class V10PresentationExchange(Minimal):
-    """V1.0 presentation exchange record."""
 
-    state: str
+def anoncreds_auto_select_credentials_for_presentation_request(
+    presentation_request: Union[IndyProofRequest, dict],
+    relevant_creds: List[IndyCredPrecis],
+    selector: Optional[CredentialSelector] = None,
+) -> IndyPresSpec:
+    """Select credentials to use for presentation automatically."""
+    return (selector or CredentialSelector()).select(presentation_request, relevant_creds)
+
+
+async def _referent_candidates(
+    holder: Controller,
+    url: str,
+    referent: str,
+    spec: Mapping[str, Any],
+    *,
+    page_size: int = 100,
+    max_candidates: Optional[int] = None,
+    extra_query: Optional[Mapping[str, Mapping[str, Any]]] = None,
+) -> List[IndyCredPrecis]:
+    """Fetch the holder's candidate credentials for a single referent."""
+    extra_query = extra_query or {}
+    query = extra_query.get(referent) or extra_query.get(spec.get("name", ""))
+    candidates = []
+    async for cred_precis in holder.paginate(
+        url,
+        params=params(
+            referent=referent,
+            extra_query={referent: query} if query else None,
+        ),
+        response=IndyCredPrecis,
+        page_size=page_size,
+        limit_param="count",
+        offset_param="start",
+        results_key=None,
+    ):
+        candidates.append(cred_precis)
+        if max_candidates and len(candidates) >= max_candidates:
+            break
+    return candidates
+
+
+async def holder_credentials_by_referent(
+    holder: Controller,
+    url: str,
+    presentation_request: Union[IndyProofRequest, dict],
+    *,
+    page_size: int = 100,
+    max_candidates: Optional[int] = None,
+    extra_query: Optional[Mapping[str, Mapping[str, Any]]] = None,
+) -> Dict[str, List[IndyCredPrecis]]:
+    """Fetch the holder's candidate credentials for each referent in a request.
+
+    Each referent is fetched separately, page_size credentials at a time, from
+    the credentials endpoint of the holder's presentation exchange record (url).
+    Fetching stops early for a referent once max_candidates have been found.
+
+    extra_query maps referents or attribute names to WQL queries that are passed
+    to the agent to narrow the credentials returned.
+    """
+    if isinstance(presentation_request, dict):
+        presentation_request = IndyProofRequest.deserialize(presentation_request)
+
+    requested = {
+        **presentation_request.requested_attributes,
+        **presentation_request.requested_predicates,
+    }
+    results = await asyncio.gather(
+        *(
+            _referent_candidates(
+                holder,
+                url,
+                referent,
+                spec,
+                page_size=page_size,
+                max_candidates=max_candidates,
+                extra_query=extra_query,
+            )
+            for referent, spec in requested.items()
+        )
+    )
+    return dict(zip(requested, results))
+
+
+@dataclass
+class V10PresentationExchange(Minimal):
+    """V1.0 presentation exchange record."""
+
+    state: str
     presentation_exchange_id: str
     connection_id: str
     thread_id: str
@@ -1011,12 +1373,19 @@ async def indy_present_proof_v1(
     requested_attributes: Optional[List[Mapping[str, Any]]] = None,
     requested_predicates: Optional[List[Mapping[str, Any]]] = None,
     non_revoked: Optional[Mapping[str, int]] = None,
+    selector: Optional[CredentialSelector] = None,
+    page_size: int = 100,
+    extra_query: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    fast: bool = False,
 ):
-    """Present an Indy credential using present proof v1."""
+    """Present an Indy credential using present proof v1.
+
+    If fast, the verifier verifies the presentation on its own.
+    """
     verifier_pres_ex = await verifier.post(
         "/present-proof/send-request",
         json={
-            "auto_verify": False,
+            "auto_verify": fast,
             "comment": comment or "Presentation request from minimal",
             "connection_id": verifier_connection_id,
             "proof_request": {
@@ -1046,11 +1415,16 @@ async def indy_present_proof_v1(
     assert holder_pres_ex.presentation_request
     holder_pres_ex_id = holder_pres_ex.presentation_exchange_id
 
-    relevant_creds = await holder.get(
+    selector = selector or CredentialSelector()
+    relevant_creds = await holder_credentials_by_referent(
+        holder,
         f"/present-proof/records/{holder_pres_ex_id}/credentials",
-        response=List[IndyCredPrecis],
+        holder_pres_ex.presentation_request,
+        page_size=page_size,
+        max_candidates=selector.max_candidates,
+        extra_query=extra_query,
     )
-    pres_spec = anoncreds_auto_select_credentials_for_presentation_request(
+    pres_spec = selector.select_from_index(
         holder_pres_ex.presentation_request, relevant_creds
     )
     holder_pres_ex = await holder.post(
@@ -1065,23 +1439,29 @@ async def indy_present_proof_v1(
         presentation_exchange_id=verifier_pres_ex_id,
         state="presentation_received",
     )
-    verifier_pres_ex = await verifier.post(
-        f"/present-proof/records/{verifier_pres_ex_id}/verify-presentation",
-        json={},
-        response=V10PresentationExchange,
-    )
-    verifier_pres_ex = await verifier.event_with_values(
-        topic="present_proof",
-        event_type=V10PresentationExchange,
-        presentation_exchange_id=verifier_pres_ex_id,
-        state="verified",
-    )
 
-    holder_pres_ex = await holder.event_with_values(
-        topic="present_proof",
-        event_type=V10PresentationExchange,
-        presentation_exchange_id=holder_pres_ex_id,
-        state="presentation_acked",
+    async def _verified() -> V10PresentationExchange:
+        if not fast:
+            await verifier.post(
+                f"/present-proof/records/{verifier_pres_ex_id}/verify-presentation",
+                json={},
+                response=V10PresentationExchange,
+            )
+        return await verifier.event_with_values(
+            topic="present_proof",
+            event_type=V10PresentationExchange,
+            presentation_exchange_id=verifier_pres_ex_id,
+            state="verified",
+        )
+
+    verifier_pres_ex, holder_pres_ex = await concurrently(
+        _verified(),
+        holder.event_with_values(
+            topic="present_proof",
+            event_type=V10PresentationExchange,
+            presentation_exchange_id=holder_pres_ex_id,
+            state="presentation_acked",
+        ),
     )
 
     return holder_pres_ex, verifier_pres_ex
@@ -1114,11 +1494,9 @@ class V20PresExRecord(Minimal):
         return super().deserialize(value)
 
 
-async def indy_present_proof_v2(
-    holder: Controller,
-    verifier: Controller,
-    holder_connection_id: str,
-    verifier_connection_id: str,
+def _presentation_request_v2(
+    connection_id: str,
+    format: str,
     *,
     name: Optional[str] = None,
     version: Optional[str] = None,
@@ -1126,90 +1504,190 @@ async def indy_present_proof_v2(
     requested_attributes: Optional[List[Mapping[str, Any]]] = None,
     requested_predicates: Optional[List[Mapping[str, Any]]] = None,
     non_revoked: Optional[Mapping[str, int]] = None,
-):
-    """Present an Indy credential using present proof v2."""
-    verifier_pres_ex = await verifier.post(
-        "/present-proof-2.0/send-request",
-        json={
-            "auto_verify": False,
-            "comment": comment or "Presentation request from minimal",
-            "connection_id": verifier_connection_id,
-            "presentation_request": {
-                "indy": {
-                    "name": name or "proof",
-                    "version": version or "0.1.0",
-                    "nonce": str(randbelow(10**10)),
-                    "requested_attributes": {
-                        str(uuid4()): attr for attr in requested_attributes or []
-                    },
-                    "requested_predicates": {
-                        str(uuid4()): pred for pred in requested_predicates or []
-                    },
-                    "non_revoked": (non_revoked if non_revoked else None),
+    fast: bool = False,
+) -> Dict[str, Any]:
+    """Return the body of an indy or anoncreds present-proof/2.0 request."""
+    return {
+        "auto_verify": fast,
+        "comment": comment or "Presentation request from minimal",
+        "connection_id": connection_id,
+        "presentation_request": {
+            format: {
+                "name": name or "proof",
+                "version": version or "0.1.0",
+                "nonce": str(randbelow(10**10)),
+                "requested_attributes": {
+                    str(uuid4()): attr for attr in requested_attributes or []
                 },
+                "requested_predicates": {
+                    str(uuid4()): pred for pred in requested_predicates or []
+                },
+                "non_revoked": (non_revoked if non_revoked else None),
             },
-            "trace": False,
         },
-        response=V20PresExRecord,
-    )
-    verifier_pres_ex_id = verifier_pres_ex.pres_ex_id
+        "trace": False,
+    }
 
-    holder_pres_ex = await holder.event_with_values(
-        topic="present_proof_v2_0",
-        event_type=V20PresExRecord,
-        connection_id=holder_connection_id,
-        state="request-received",
-    )
+
+async def _send_presentation_v2(
+    holder: Controller, context: Mapping[str, Any]
+) -> V20PresExRecord:
+    """Select credentials for and send an indy or anoncreds presentation."""
+    holder_pres_ex: V20PresExRecord = context["holder_pres_ex"]
     assert holder_pres_ex.pres_request
     holder_pres_ex_id = holder_pres_ex.pres_ex_id
+    format = context["format"]
 
-    relevant_creds = await holder.get(
-        f"/present-proof-2.0/records/{holder_pres_ex_id}/credentials",
-        response=List[IndyCredPrecis],
-    )
     assert holder_pres_ex.by_format.pres_request
-    indy_proof_request = holder_pres_ex.by_format.pres_request["indy"]
-    pres_spec = anoncreds_auto_select_credentials_for_presentation_request(
-        indy_proof_request, relevant_creds
+    proof_request = holder_pres_ex.by_format.pres_request[format]
+    selector = context.get("selector") or CredentialSelector()
+    relevant_creds = await holder_credentials_by_referent(
+        holder,
+        f"/present-proof-2.0/records/{holder_pres_ex_id}/credentials",
+        proof_request,
+        page_size=context.get("page_size", 100),
+        max_candidates=selector.max_candidates,
+        extra_query=context.get("extra_query"),
     )
-    holder_pres_ex = await holder.post(
+    pres_spec = selector.select_from_index(proof_request, relevant_creds)
+    return await holder.post(
         f"/present-proof-2.0/records/{holder_pres_ex_id}/send-presentation",
         json={
-            "indy": pres_spec.serialize(),
+            format: pres_spec.serialize(),
             "trace": False,
         },
         response=V20PresExRecord,
     )
 
-    await verifier.event_with_values(
-        topic="present_proof_v2_0",
-        event_type=V20PresExRecord,
-        pres_ex_id=verifier_pres_ex_id,
-        state="presentation-received",
-    )
-    verifier_pres_ex = await verifier.post(
-        f"/present-proof-2.0/records/{verifier_pres_ex_id}/verify-presentation",
-        json={},
+
+async def _send_dif_presentation(
+    holder: Controller, context: Mapping[str, Any]
+) -> V20PresExRecord:
+    """Send a DIF presentation for the definition in the request."""
+    holder_pres_ex: V20PresExRecord = context["holder_pres_ex"]
+    assert holder_pres_ex.pres_request
+    assert "request_presentations~attach" in holder_pres_ex.pres_request
+    assert holder_pres_ex.pres_request["request_presentations~attach"]
+    attachment = holder_pres_ex.pres_request["request_presentations~attach"][0]
+    assert "data" in attachment
+    assert "json" in attachment["data"]
+    assert "presentation_definition" in attachment["data"]["json"]
+    definition = attachment["data"]["json"]["presentation_definition"]
+
+    return await holder.post(
+        f"/present-proof-2.0/records/{holder_pres_ex.pres_ex_id}/send-presentation",
+        json={"dif": {"presentation_definition": definition}},
         response=V20PresExRecord,
     )
-    verifier_pres_ex = await verifier.event_with_values(
-        topic="present_proof_v2_0",
-        event_type=V20PresExRecord,
-        pres_ex_id=verifier_pres_ex_id,
-        state="done",
-    )
 
-    holder_pres_ex = await holder.event_with_values(
-        topic="present_proof_v2_0",
-        event_type=V20PresExRecord,
-        pres_ex_id=holder_pres_ex_id,
-        state="done",
+
+def _present_proof_v2_flow(
+    name: str, send_presentation: Action, *, fast: bool = False
+) -> Flow:
+    """Return a present-proof/2.0 flow using the given holder action.
+
+    Once the verifier has received the presentation, verifying it and the waits
+    for both records to be done run concurrently. The fast flow leaves verifying
+    the presentation to the verifier.
+    """
+    verify = (
+        Transition(
+            "presentation-received",
+            "verifier",
+            topic="present_proof_v2_0",
+            values={
+                "pres_ex_id": Ref("verifier_pres_ex_id"),
+                "state": "presentation-received",
+            },
+            event_type=V20PresExRecord,
+            record="/present-proof-2.0/records/{verifier_pres_ex_id}",
+        ),
+        Transition(
+            "verify-presentation",
+            "verifier",
+            action=Request(
+                "POST",
+                "/present-proof-2.0/records/{verifier_pres_ex_id}/verify-presentation",
+                json={},
+                response=V20PresExRecord,
+            ),
+        ),
+    )
+    return Flow(
+        name,
+        (
+            Transition(
+                "send-request",
+                "verifier",
+                action=Request(
+                    "POST",
+                    "/present-proof-2.0/send-request",
+                    json=Ref("request"),
+                    response=V20PresExRecord,
+                ),
+                save={"verifier_pres_ex_id": "pres_ex_id", "thread_id": "thread_id"},
+            ),
+            Transition(
+                "request-received",
+                "holder",
+                topic="present_proof_v2_0",
+                values={
+                    "connection_id": Ref("holder_connection_id"),
+                    "state": "request-received",
+                },
+                event_type=V20PresExRecord,
+                save={"holder_pres_ex_id": "pres_ex_id"},
+                result="holder_pres_ex",
+                record="/present-proof-2.0/records?thread_id={thread_id}",
+            ),
+            Transition("send-presentation", "holder", action=send_presentation),
+            *(() if fast else verify[:1]),
+            Parallel(
+                "finish",
+                (
+                    (
+                        *(() if fast else verify[1:]),
+                        Transition(
+                            "verifier-done",
+                            "verifier",
+                            topic="present_proof_v2_0",
+                            values={
+                                "pres_ex_id": Ref("verifier_pres_ex_id"),
+                                "state": "done",
+                            },
+                            event_type=V20PresExRecord,
+                            result="verifier_pres_ex",
+                            record="/present-proof-2.0/records/{verifier_pres_ex_id}",
+                        ),
+                    ),
+                    Transition(
+                        "holder-done",
+                        "holder",
+                        topic="present_proof_v2_0",
+                        values={"pres_ex_id": Ref("holder_pres_ex_id"), "state": "done"},
+                        event_type=V20PresExRecord,
+                        result="holder_pres_ex",
+                        record="/present-proof-2.0/records/{holder_pres_ex_id}",
+                    ),
+                ),
+            ),
+        ),
     )
 
-    return holder_pres_ex, verifier_pres_ex
 
+PRESENT_PROOF_V2 = _present_proof_v2_flow("present-proof-2.0", _send_presentation_v2)
+DIF_PRESENT_PROOF_V2 = _present_proof_v2_flow(
+    "present-proof-2.0-dif", _send_dif_presentation
+)
+PRESENT_PROOF_V2_FAST = _present_proof_v2_flow(
+    "present-proof-2.0-fast", _send_presentation_v2, fast=True
+)
+DIF_PRESENT_PROOF_V2_FAST = _present_proof_v2_flow(
+    "present-proof-2.0-dif-fast", _send_dif_presentation, fast=True
+)
 
-async def anoncreds_present_proof_v2(
+
+async def indy_present_proof_v2(
     holder: Controller,
     verifier: Controller,
     holder_connection_id: str,
@@ -1221,87 +1699,279 @@ async def anoncreds_present_proof_v2(
     requested_attributes: Optional[List[Mapping[str, Any]]] = None,
     requested_predicates: Optional[List[Mapping[str, Any]]] = None,
     non_revoked: Optional[Mapping[str, int]] = None,
+    selector: Optional[CredentialSelector] = None,
+    page_size: int = 100,
+    extra_query: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    scheduler: Optional[FlowScheduler] = None,
+    fast: bool = False,
 ):
-    """Present an Indy credential using present proof v2."""
-    verifier_pres_ex = await verifier.post(
-        "/present-proof-2.0/send-request",
-        json={
-            "auto_verify": False,
-            "comment": comment or "Presentation request from minimal",
-            "connection_id": verifier_connection_id,
-            "presentation_request": {
-                "anoncreds": {
-                    "name": name or "proof",
-                    "version": version or "0.1.0",
-                    "nonce": str(randbelow(10**10)),
-                    "requested_attributes": {
-                        str(uuid4()): attr for attr in requested_attributes or []
-                    },
-                    "requested_predicates": {
-                        str(uuid4()): pred for pred in requested_predicates or []
-                    },
-                    "non_revoked": (non_revoked if non_revoked else None),
-                },
-            },
-            "trace": False,
+    """Present an Indy credential using present proof v2.
+
+    If fast, the verifier verifies the presentation on its own.
+    """
+    state = await run_flow(
+        PRESENT_PROOF_V2_FAST if fast else PRESENT_PROOF_V2,
+        {"holder": holder, "verifier": verifier},
+        {
+            "format": "indy",
+            "holder_connection_id": holder_connection_id,
+            "request": _presentation_request_v2(
+                verifier_connection_id,
+                "indy",
+                name=name,
+                version=version,
+                comment=comment,
+                requested_attributes=requested_attributes,
+                requested_predicates=requested_predicates,
+                non_revoked=non_revoked,
+                fast=fast,
+            ),
+            "selector": selector,
+            "page_size": page_size,
+            "extra_query": extra_query,
         },
-        response=V20PresExRecord,
+        scheduler=scheduler,
     )
-    verifier_pres_ex_id = verifier_pres_ex.pres_ex_id
+    return state["holder_pres_ex"], state["verifier_pres_ex"]
 
-    holder_pres_ex = await holder.event_with_values(
-        topic="present_proof_v2_0",
-        event_type=V20PresExRecord,
-        connection_id=holder_connection_id,
-        state="request-received",
-    )
-    assert holder_pres_ex.pres_request
-    holder_pres_ex_id = holder_pres_ex.pres_ex_id
 
-    relevant_creds = await holder.get(
-        f"/present-proof-2.0/records/{holder_pres_ex_id}/credentials",
-        response=List[IndyCredPrecis],
-    )
-    assert holder_pres_ex.by_format.pres_request
-    anoncreds_proof_request = holder_pres_ex.by_format.pres_request["anoncreds"]
-    pres_spec = anoncreds_auto_select_credentials_for_presentation_request(
-        anoncreds_proof_request, relevant_creds
-    )
-    holder_pres_ex = await holder.post(
-        f"/present-proof-2.0/records/{holder_pres_ex_id}/send-presentation",
-        json={
-            "anoncreds": pres_spec.serialize(),
-            "trace": False,
+async def anoncreds_present_proof_v2(
+    holder: Controller,
+    verifier: Controller,
+    holder_connection_id: str,
+    verifier_connection_id: str,
+    *,
+    name: Optional[str] = None,
+    version: Optional[str] = None,
+    comment: Optional[str] = None,
+    requested_attributes: Optional[List[Mapping[str, Any]]] = None,
+    requested_predicates: Optional[List[Mapping[str, Any]]] = None,
+    non_revoked: Optional[Mapping[str, int]] = None,
+    selector: Optional[CredentialSelector] = None,
+    page_size: int = 100,
+    extra_query: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    scheduler: Optional[FlowScheduler] = None,
+    fast: bool = False,
+):
+    """Present an Indy credential using present proof v2.
+
+    If fast, the verifier verifies the presentation on its own.
+    """
+    state = await run_flow(
+        PRESENT_PROOF_V2_FAST if fast else PRESENT_PROOF_V2,
+        {"holder": holder, "verifier": verifier},
+        {
+            "format": "anoncreds",
+            "holder_connection_id": holder_connection_id,
+            "request": _presentation_request_v2(
+                verifier_connection_id,
+                "anoncreds",
+                name=name,
+                version=version,
+                comment=comment,
+                requested_attributes=requested_attributes,
+                requested_predicates=requested_predicates,
+                non_revoked=non_revoked,
+                fast=fast,
+            ),
+            "selector": selector,
+            "page_size": page_size,
+            "extra_query": extra_query,
         },
-        response=V20PresExRecord,
+        scheduler=scheduler,
     )
+    return state["holder_pres_ex"], state["verifier_pres_ex"]
 
-    await verifier.event_with_values(
-        topic="present_proof_v2_0",
-        event_type=V20PresExRecord,
-        pres_ex_id=verifier_pres_ex_id,
-        state="presentation-received",
-    )
-    verifier_pres_ex = await verifier.post(
-        f"/present-proof-2.0/records/{verifier_pres_ex_id}/verify-presentation",
-        json={},
-        response=V20PresExRecord,
-    )
-    verifier_pres_ex = await verifier.event_with_values(
-        topic="present_proof_v2_0",
-        event_type=V20PresExRecord,
-        pres_ex_id=verifier_pres_ex_id,
-        state="done",
-    )
 
-    holder_pres_ex = await holder.event_with_values(
-        topic="present_proof_v2_0",
-        event_type=V20PresExRecord,
-        pres_ex_id=holder_pres_ex_id,
-        state="done",
-    )
+@dataclass
+class FanOutResult:
+    """Result of answering one presentation request in a fan-out."""
 
-    return holder_pres_ex, verifier_pres_ex
+    request: V20PresExRecord
+    pres_ex: Optional[V20PresExRecord] = None
+    error: Optional[Exception] = None
+
+
+def _restrictions_key(spec: Mapping[str, Any]) -> str:
+    """Return a key identifying a requested attribute or predicate."""
+    return json.dumps(spec, sort_keys=True)
+
+
+def _normalize_proof_request(
+    proof_request: IndyProofRequest,
+) -> Tuple[Dict[str, Any], Dict[str, Tuple[str, Mapping[str, Any]]]]:
+    """Rename referents in a proof request by position.
+
+    Referents are named differently in every request; renaming them makes
+    requests for identical attributes and predicates compare equal. Returns the
+    normalized request and a map of positional names to original referents and
+    their specs.
+    """
+    attributes = {
+        f"attr{index}": (referent, spec)
+        for index, (referent, spec) in enumerate(
+            proof_request.requested_attributes.items()
+        )
+    }
+    predicates = {
+        f"pred{index}": (referent, spec)
+        for index, (referent, spec) in enumerate(
+            proof_request.requested_predicates.items()
+        )
+    }
+    normalized = {
+        "requested_attributes": {name: spec for name, (_, spec) in attributes.items()},
+        "requested_predicates": {name: spec for name, (_, spec) in predicates.items()},
+    }
+    return normalized, {**attributes, **predicates}
+
+
+class _SharedSelections:
+    """Credential lookups and selections shared across presentation requests."""
+
+    def __init__(
+        self,
+        holder: Controller,
+        selector: CredentialSelector,
+        page_size: int,
+        extra_query: Optional[Mapping[str, Mapping[str, Any]]],
+    ):
+        self.holder = holder
+        self.selector = selector
+        self.page_size = page_size
+        self.extra_query = extra_query
+        self.candidates: Dict[str, asyncio.Future[List[IndyCredPrecis]]] = {}
+        self.selections: Dict[str, asyncio.Future[IndyPresSpec]] = {}
+
+    def _candidates(self, url: str, referent: str, spec: Mapping[str, Any]):
+        key = _restrictions_key(spec)
+        if key not in self.candidates:
+            self.candidates[key] = asyncio.ensure_future(
+                _referent_candidates(
+                    self.holder,
+                    url,
+                    referent,
+                    spec,
+                    page_size=self.page_size,
+                    max_candidates=self.selector.max_candidates,
+                    extra_query=self.extra_query,
+                )
+            )
+        return self.candidates[key]
+
+    async def _selection(
+        self,
+        url: str,
+        normalized: Mapping[str, Any],
+        names: Mapping[str, Tuple[str, Mapping[str, Any]]],
+    ) -> IndyPresSpec:
+        results = await asyncio.gather(
+            *(self._candidates(url, referent, spec) for referent, spec in names.values())
+        )
+        return self.selector.select_from_index(normalized, dict(zip(names, results)))
+
+    async def select(self, url: str, proof_request: IndyProofRequest) -> IndyPresSpec:
+        """Select credentials for a request using the holder record's url."""
+        normalized, names = _normalize_proof_request(proof_request)
+        key = _restrictions_key(normalized)
+        if key not in self.selections:
+            self.selections[key] = asyncio.ensure_future(
+                self._selection(url, normalized, names)
+            )
+
+        pres_spec = await self.selections[key]
+        return IndyPresSpec.deserialize(
+            {
+                field: {names[name][0]: value for name, value in selected.items()}
+                for field, selected in pres_spec.serialize().items()
+            }
+        )
+
+    def cancel(self):
+        """Cancel outstanding lookups."""
+        for future in (*self.candidates.values(), *self.selections.values()):
+            future.cancel()
+
+
+async def present_proof_v2_fan_out(
+    holder: Controller,
+    requests: Iterable[V20PresExRecord],
+    *,
+    concurrency: int = 10,
+    selector: Optional[CredentialSelector] = None,
+    page_size: int = 100,
+    extra_query: Optional[Mapping[str, Mapping[str, Any]]] = None,
+) -> AsyncIterator[FanOutResult]:
+    """Answer many received presentation requests concurrently.
+
+    requests are the holder's presentation exchange records in the
+    request-received state, in indy or anoncreds format. Credentials are looked
+    up once for all referents with identical restrictions across requests, and
+    selections are reused for requests asking for identical attributes and
+    predicates. At most concurrency send-presentation requests are in flight.
+
+    Results are yielded as each presentation is sent; failures are reported on
+    the result rather than raised.
+    """
+    shared = _SharedSelections(
+        holder, selector or CredentialSelector(), page_size, extra_query
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _present(request: V20PresExRecord) -> FanOutResult:
+        try:
+            pres_request = request.by_format.pres_request or {}
+            format = "indy" if "indy" in pres_request else "anoncreds"
+            if format not in pres_request:
+                raise ValueError("Expected indy or anoncreds presentation request")
+
+            url = f"/present-proof-2.0/records/{request.pres_ex_id}"
+            pres_spec = await shared.select(
+                f"{url}/credentials",
+                IndyProofRequest.deserialize(pres_request[format]),
+            )
+            async with semaphore:
+                pres_ex = await holder.post(
+                    f"{url}/send-presentation",
+                    json={format: pres_spec.serialize(), "trace": False},
+                    response=V20PresExRecord,
+                )
+            return FanOutResult(request, pres_ex=pres_ex)
+        except Exception as error:
+            return FanOutResult(request, error=error)
+
+    tasks = [asyncio.ensure_future(_present(request)) for request in requests]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            yield await next_result
+    finally:
+        for task in tasks:
+            task.cancel()
+        shared.cancel()
+
+
+def _revocation_ids(
+    cred_ex: Union[V10CredentialExchange, V20CredExRecordDetail],
+) -> Tuple[Optional[str], Optional[str]]:
+    """Return the revocation registry id and credential revocation id."""
+    # Passes in V10CredentialExchange
+    if isinstance(cred_ex, V10CredentialExchange):
+        return cred_ex.revoc_reg_id, cred_ex.revocation_id
+
+    # Passes in V20CredExRecordDetail
+    if isinstance(cred_ex, V20CredExRecordDetail):
+        if cred_ex.indy:
+            format = cred_ex.indy
+        elif cred_ex.anoncreds:
+            format = cred_ex.anoncreds
+        else:
+            raise ValueError("Missing indy or anoncreds on detail")
+        return format.rev_reg_id, format.cred_rev_id
+
+    raise TypeError(
+        "Expected cred_ex to be V10CredentialExchange or V20CredExRecordDetail; "
+        f"got {type(cred_ex).__name__}"
+    )
 
 
 async def anoncreds_revoke(
@@ -1318,11 +1988,8 @@ async def anoncreds_revoke(
     V2.0: V20CredExRecordDetail.
     """
     # Get wallet type
-    if issuer.wallet_type is None:
-        raise ControllerError(
-            "Wallet type not found. Please correctly set up the controller."
-        )
-    anoncreds_wallet = issuer.wallet_type == "askar-anoncreds"
+    wallet_type = await issuer.get_wallet_type()
+    anoncreds_wallet = wallet_type == "askar-anoncreds"
 
     if notify and holder_connection_id is None:
         return (
@@ -1330,46 +1997,18 @@ async def anoncreds_revoke(
             "then holder_connection_id cannot be empty."
         )
 
-    # Passes in V10CredentialExchange
-    if isinstance(cred_ex, V10CredentialExchange):
-        await issuer.post(
-            url="{}/revocation/revoke".format("/anoncreds" if anoncreds_wallet else ""),
-            json={
-                "connection_id": holder_connection_id,
-                "rev_reg_id": cred_ex.revoc_reg_id,
-                "cred_rev_id": cred_ex.revocation_id,
-                "publish": publish,
-                "notify": notify,
-                "notify_version": notify_version,
-            },
-        )
-
-    # Passes in V20CredExRecordDetail
-    elif isinstance(cred_ex, V20CredExRecordDetail):
-        if cred_ex.indy:
-            format = cred_ex.indy
-        elif cred_ex.anoncreds:
-            format = cred_ex.anoncreds
-        else:
-            raise ValueError("Missing indy or anoncreds on detail")
-
-        await issuer.post(
-            url="{}/revocation/revoke".format("/anoncreds" if anoncreds_wallet else ""),
-            json={
-                "connection_id": holder_connection_id,
-                "rev_reg_id": format.rev_reg_id,
-                "cred_rev_id": format.cred_rev_id,
-                "publish": publish,
-                "notify": notify,
-                "notify_version": notify_version,
-            },
-        )
-
-    else:
-        raise TypeError(
-            "Expected cred_ex to be V10CredentialExchange or V20CredExRecordDetail; "
-            f"got {type(cred_ex).__name__}"
-        )
+    rev_reg_id, cred_rev_id = _revocation_ids(cred_ex)
+    await issuer.post(
+        url="{}/revocation/revoke".format("/anoncreds" if anoncreds_wallet else ""),
+        json={
+            "connection_id": holder_connection_id,
+            "rev_reg_id": rev_reg_id,
+            "cred_rev_id": cred_rev_id,
+            "publish": publish,
+            "notify": notify,
+            "notify_version": notify_version,
+        },
+    )
 
 
 async def anoncreds_publish_revocation(
@@ -1384,51 +2023,93 @@ async def anoncreds_publish_revocation(
     V2.0: V20CredExRecordDetail.
     """
     # Get wallet type
-    if issuer.wallet_type is None:
-        raise ControllerError(
-            "Wallet type not found. Please correctly set up the controller."
-        )
-    anoncreds_wallet = issuer.wallet_type == "askar-anoncreds"
+    wallet_type = await issuer.get_wallet_type()
+    anoncreds_wallet = wallet_type == "askar-anoncreds"
 
-    if isinstance(cred_ex, V10CredentialExchange):
-        await issuer.post(
-            url="{}/revocation/publish-revocations".format(
-                "/anoncreds" if anoncreds_wallet else ""
-            ),
-            json={
-                "rev_reg_id": cred_ex.revoc_reg_id,
-                "cred_rev_id": cred_ex.revocation_id,
-                "publish": publish,
-                "notify": notify,
-            },
-        )
+    rev_reg_id, cred_rev_id = _revocation_ids(cred_ex)
+    await issuer.post(
+        url="{}/revocation/publish-revocations".format(
+            "/anoncreds" if anoncreds_wallet else ""
+        ),
+        json={
+            "rev_reg_id": rev_reg_id,
+            "cred_rev_id": cred_rev_id,
+            "publish": publish,
+            "notify": notify,
+        },
+    )
 
-    elif isinstance(cred_ex, V20CredExRecordDetail):
-        if cred_ex.indy:
-            format = cred_ex.indy
-        elif cred_ex.anoncreds:
-            format = cred_ex.anoncreds
+
+async def anoncreds_bulk_revoke(
+    issuer: Controller,
+    cred_exs: Iterable[Union[V10CredentialExchange, V20CredExRecordDetail]],
+    *,
+    publish: bool = True,
+    notify: bool = False,
+    notify_version: str = "v1_0",
+    concurrency: int = 10,
+) -> Dict[str, List[str]]:
+    """Revoke many credentials, publishing once per revocation registry.
+
+    Credentials are grouped by revocation registry and revoked concurrently
+    (at most concurrency requests in flight) without publishing. If publish is
+    set, a single publish-revocations request is then made for each registry.
+
+    If notify is set, holders are notified over the connection the credential
+    was issued on. ACA-Py holds notifications for unpublished revocations and
+    sends them when the registry is published, so notifications go out in one
+    batch per registry.
+
+    Returns the mapping of revocation registry ids to revoked credential
+    revocation ids.
+    """
+    wallet_type = await issuer.get_wallet_type()
+    prefix = "/anoncreds" if wallet_type == "askar-anoncreds" else ""
+
+    rrid2crid: Dict[str, List[str]] = {}
+    revocations: List[Tuple[str, str, str]] = []
+    for cred_ex in cred_exs:
+        rev_reg_id, cred_rev_id = _revocation_ids(cred_ex)
+        if not rev_reg_id or not cred_rev_id:
+            raise ValueError("Credential exchange is missing revocation information")
+        if isinstance(cred_ex, V10CredentialExchange):
+            connection_id = cred_ex.connection_id
         else:
-            raise ValueError("Missing indy or anoncreds on detail")
+            connection_id = cred_ex.cred_ex_record.connection_id
+        rrid2crid.setdefault(rev_reg_id, []).append(cred_rev_id)
+        revocations.append((rev_reg_id, cred_rev_id, connection_id))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _revoke(rev_reg_id: str, cred_rev_id: str, connection_id: str):
+        async with semaphore:
+            await issuer.post(
+                f"{prefix}/revocation/revoke",
+                json=omit_none(
+                    connection_id=connection_id if notify else None,
+                    rev_reg_id=rev_reg_id,
+                    cred_rev_id=cred_rev_id,
+                    publish=False,
+                    notify=notify,
+                    notify_version=notify_version if notify else None,
+                ),
+            )
 
-        await issuer.post(
-            url="{}/revocation/publish-revocations".format(
-                "/anoncreds" if anoncreds_wallet else ""
-            ),
-            json={
-                "rev_reg_id": format.rev_reg_id,
-                "cred_rev_id": format.cred_rev_id,
-                "publish": publish,
-                "notify": notify,
-            },
-        )
+    async def _publish(rev_reg_id: str, cred_rev_ids: List[str]):
+        async with semaphore:
+            await issuer.post(
+                f"{prefix}/revocation/publish-revocations",
+                json={"rrid2crid": {rev_reg_id: cred_rev_ids}},
+            )
 
-    else:
-        raise TypeError(
-            "Expected cred_ex to be V10CredentialExchange or V20CredExRecordDetail; "
-            f"got {type(cred_ex).__name__}"
+    await asyncio.gather(*(_revoke(*revocation) for revocation in revocations))
+    if publish:
+        await asyncio.gather(
+            *(_publish(rev_reg_id, crids) for rev_reg_id, crids in rrid2crid.items())
         )
 
+    return rrid2crid
+
 
 async def jsonld_issue_credential(
     issuer: Controller,
@@ -1437,78 +2118,29 @@ async def jsonld_issue_credential(
     holder_connection_id: str,
     credential: Mapping[str, Any],
     options: Mapping[str, Any],
+    *,
+    scheduler: Optional[FlowScheduler] = None,
+    fast: bool = False,
 ):
-    """Issue a JSON-LD Credential."""
-    issuer_cred_ex = await issuer.post(
-        "/issue-credential-2.0/send-offer",
-        json={
-            "auto_issue": False,
-            "auto_remove": False,
-            "comment": "Credential from minimal example",
-            "trace": False,
-            "connection_id": issuer_connection_id,
-            "filter": {
-                "ld_proof": {
-                    "credential": credential,
-                    "options": options,
-                }
-            },
-        },
-        response=V20CredExRecord,
-    )
-    issuer_cred_ex_id = issuer_cred_ex.cred_ex_id
-
-    holder_cred_ex = await holder.event_with_values(
-        topic="issue_credential_v2_0",
-        event_type=V20CredExRecord,
-        connection_id=holder_connection_id,
-        state="offer-received",
-    )
-    holder_cred_ex_id = holder_cred_ex.cred_ex_id
-
-    holder_cred_ex = await holder.post(
-        f"/issue-credential-2.0/records/{holder_cred_ex_id}/send-request",
-        response=V20CredExRecord,
-    )
-
-    await issuer.event_with_values(
-        topic="issue_credential_v2_0",
-        cred_ex_id=issuer_cred_ex_id,
-        state="request-received",
-    )
-
-    issuer_cred_ex = await issuer.post(
-        f"/issue-credential-2.0/records/{issuer_cred_ex_id}/issue",
-        json={},
-        response=V20CredExRecordDetail,
-    )
-
-    await holder.event_with_values(
-        topic="issue_credential_v2_0",
-        cred_ex_id=holder_cred_ex_id,
-        state="credential-received",
-    )
-
-    holder_cred_ex = await holder.post(
-        f"/issue-credential-2.0/records/{holder_cred_ex_id}/store",
-        json={},
-        response=V20CredExRecordDetail,
-    )
-    issuer_cred_ex = await issuer.event_with_values(
-        topic="issue_credential_v2_0",
-        event_type=V20CredExRecord,
-        cred_ex_id=issuer_cred_ex_id,
-        state="done",
-    )
+    """Issue a JSON-LD Credential.
 
-    holder_cred_ex = await holder.event_with_values(
-        topic="issue_credential_v2_0",
-        event_type=V20CredExRecord,
-        cred_ex_id=holder_cred_ex_id,
-        state="done",
+    If fast, the holder must respond to offers on its own (see
+    enable_auto_respond) and the issuer issues on its own.
+    """
+    state = await run_flow(
+        ISSUE_CREDENTIAL_V2_FAST if fast else ISSUE_CREDENTIAL_V2,
+        {"issuer": issuer, "holder": holder},
+        {
+            "holder_connection_id": holder_connection_id,
+            "offer": _credential_offer_v2(
+                issuer_connection_id,
+                {"ld_proof": {"credential": credential, "options": options}},
+                fast=fast,
+            ),
+        },
+        scheduler=scheduler,
     )
-
-    return issuer_cred_ex, holder_cred_ex
+    return state["issuer_cred_ex"], state["holder_cred_ex"]
 
 
 async def jsonld_present_proof(
@@ -1520,71 +2152,31 @@ async def jsonld_present_proof(
     domain: str,
     *,
     comment: Optional[str] = None,
+    scheduler: Optional[FlowScheduler] = None,
+    fast: bool = False,
 ):
-    """Present an Indy credential using present proof v1."""
-    verifier_pres_ex = await verifier.post(
-        "/present-proof-2.0/send-request",
-        json={
-            "auto_verify": False,
-            "comment": comment or "Presentation request from minimal",
-            "connection_id": verifier_connection_id,
-            "presentation_request": {
-                "dif": {
-                    "presentation_definition": presentation_definition,
-                    "options": {"challenge": str(uuid4()), "domain": domain},
+    """Present an Indy credential using present proof v1.
+
+    If fast, the verifier verifies the presentation on its own.
+    """
+    state = await run_flow(
+        DIF_PRESENT_PROOF_V2_FAST if fast else DIF_PRESENT_PROOF_V2,
+        {"holder": holder, "verifier": verifier},
+        {
+            "holder_connection_id": holder_connection_id,
+            "request": {
+                "auto_verify": fast,
+                "comment": comment or "Presentation request from minimal",
+                "connection_id": verifier_connection_id,
+                "presentation_request": {
+                    "dif": {
+                        "presentation_definition": presentation_definition,
+                        "options": {"challenge": str(uuid4()), "domain": domain},
+                    },
                 },
+                "trace": False,
             },
-            "trace": False,
         },
-        response=V20PresExRecord,
-    )
-    verifier_pres_ex_id = verifier_pres_ex.pres_ex_id
-
-    holder_pres_ex = await holder.event_with_values(
-        topic="present_proof_v2_0",
-        event_type=V20PresExRecord,
-        connection_id=holder_connection_id,
-        state="request-received",
-    )
-    assert holder_pres_ex.pres_request
-    assert "request_presentations~attach" in holder_pres_ex.pres_request
-    assert holder_pres_ex.pres_request["request_presentations~attach"]
-    attachment = holder_pres_ex.pres_request["request_presentations~attach"][0]
-    assert "data" in attachment
-    assert "json" in attachment["data"]
-    assert "presentation_definition" in attachment["data"]["json"]
-    definition = attachment["data"]["json"]["presentation_definition"]
-    holder_pres_ex_id = holder_pres_ex.pres_ex_id
-
-    holder_pres_ex = await holder.post(
-        f"/present-proof-2.0/records/{holder_pres_ex_id}/send-presentation",
-        json={"dif": {"presentation_definition": definition}},
-        response=V20PresExRecord,
-    )
-
-    await verifier.event_with_values(
-        topic="present_proof_v2_0",
-        event_type=V20PresExRecord,
-        pres_ex_id=verifier_pres_ex_id,
-        state="presentation-received",
+        scheduler=scheduler,
     )
-    verifier_pres_ex = await verifier.post(
-        f"/present-proof-2.0/records/{verifier_pres_ex_id}/verify-presentation",
-        json={},
-        response=V20PresExRecord,
-    )
-    verifier_pres_ex = await verifier.event_with_values(
-        topic="present_proof_v2_0",
-        event_type=V20PresExRecord,
-        pres_ex_id=verifier_pres_ex_id,
-        state="done",
-    )
-
-    holder_pres_ex = await holder.event_with_values(
-        topic="present_proof_v2_0",
-        event_type=V20PresExRecord,
-        pres_ex_id=holder_pres_ex_id,
-        state="done",
-    )
-
-    return verifier_pres_ex, holder_pres_ex
+    return state["verifier_pres_ex"], state["holder_pres_ex"]
@@ -0,0 +1,307 @@
+"""Bulk provisioning of tenants on multitenant agents.
+
+provision_tenants creates subwallets concurrently under a rate limit, then
+drives each new tenant through a pipeline of setup steps (public DID, mediation,
+a connection to an issuer, ...). Tenants proceed through the pipeline
+independently, so slow steps for one tenant do not hold up the others.
+
+Progress is recorded in a manifest. Provisioning again with the same manifest
+skips wallets already created and steps already completed, resuming after a
+partial failure; the manifest can also be loaded into a TenantPool later. Tokens
+are not written to the manifest; the pool requests new ones when needed.
+
+    manifest = TenantManifest("tenants.jsonl")
+    async with TenantPool(agency) as pool:
+        async for tenant in provision_tenants(
+            pool,
+            [f"tenant-{i}" for i in range(10000)],
+            steps=[public_did(), connect_to(issuer)],
+            manifest=manifest,
+            rate=50,
+        ):
+            ...
+"""
+
+import asyncio
+from dataclasses import asdict, dataclass, field
+import json
+import logging
+from pathlib import Path
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from .controller import Controller
+from .protocols import didexchange, indy_anoncred_onboard, request_mediation_v1
+from .tenants import TenantPool
+
+LOGGER = logging.getLogger(__name__)
+
+
+class RateLimit:
+    """Token bucket limiting operations to rate per second."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """Initialize the limit, allowing bursts of up to burst operations."""
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until an operation is allowed."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._tokens + (now - self._updated) * self.rate, self.burst
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class ProvisionedTenant:
+    """Progress of provisioning a tenant.
+
+    values holds the results of completed steps, such as connection ids; error
+    holds the error that stopped provisioning, if any. token is only known to
+    the process that created the wallet; it is not recorded in manifests.
+    """
+
+    label: str
+    wallet_id: Optional[str] = None
+    token: Optional[str] = None
+    wallet_type: Optional[str] = None
+    steps: List[str] = field(default_factory=list)
+    values: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+StepAction = Callable[[Controller, ProvisionedTenant], Awaitable[Mapping[str, Any]]]
+
+
+@dataclass(frozen=True)
+class Step:
+    """Named setup step run for each tenant.
+
+    The action returns values to record in the tenant's manifest entry.
+    """
+
+    name: str
+    action: StepAction
+
+
+def public_did() -> Step:
+    """Return a step creating and publishing a public DID for the tenant."""
+
+    async def _public_did(tenant: Controller, _: ProvisionedTenant):
+        did = await indy_anoncred_onboard(tenant)
+        return {"public_did": did.did}
+
+    return Step("public_did", _public_did)
+
+
+def mediation(mediator: Controller) -> Step:
+    """Return a step connecting the tenant to a mediator and requesting mediation."""
+
+    async def _mediation(tenant: Controller, _: ProvisionedTenant):
+        mediator_conn, tenant_conn = await didexchange(mediator, tenant)
+        _, record = await request_mediation_v1(
+            mediator, tenant, mediator_conn.connection_id, tenant_conn.connection_id
+        )
+        return {
+            "mediator_connection_id": tenant_conn.connection_id,
+            "mediation_id": record.mediation_id,
+        }
+
+    return Step("mediation", _mediation)
+
+
+def connect_to(issuer: Controller, name: str = "issuer") -> Step:
+    """Return a step connecting the tenant to another agent using DID exchange.
+
+    The connection ids of both sides are recorded under {name}_connection_id
+    and {name}_their_connection_id.
+    """
+
+    async def _connect(tenant: Controller, _: ProvisionedTenant):
+        issuer_conn, tenant_conn = await didexchange(issuer, tenant)
+        return {
+            f"{name}_connection_id": tenant_conn.connection_id,
+            f"{name}_their_connection_id": issuer_conn.connection_id,
+        }
+
+    return Step(f"connect_{name}", _connect)
+
+
+def _manifest_line(entry: ProvisionedTenant) -> str:
+    """Return the manifest line of an entry, leaving out its token."""
+    values = asdict(entry)
+    values.pop("token")
+    return json.dumps(values) + "\n"
+
+
+class TenantManifest:
+    """JSON lines file recording the progress of provisioned tenants.
+
+    Each update appends the full entry of a tenant; the last entry for a label
+    wins when the manifest is loaded. Bearer tokens are not recorded; tenants
+    registered from a manifest get a new token from
+    /multitenancy/wallet/{wallet_id}/token on first use, which requires the
+    wallet key for unmanaged wallets.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """Initialize the manifest, loading entries already in the file."""
+        self.path = Path(path)
+        self.entries: Dict[str, ProvisionedTenant] = {}
+        if self.path.exists():
+            with self.path.open() as file:
+                for line in file:
+                    try:
+                        entry = ProvisionedTenant(**json.loads(line))
+                    except (json.JSONDecodeError, TypeError):
+                        # Partially written final line
+                        continue
+                    self.entries[entry.label] = entry
+
+    def record(self, entry: ProvisionedTenant):
+        """Record the progress of a tenant."""
+        self.entries[entry.label] = entry
+        with self.path.open("a") as file:
+            file.write(_manifest_line(entry))
+
+    def compact(self):
+        """Rewrite the file with only the latest entry of each tenant."""
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp.open("w") as file:
+            for entry in self.entries.values():
+                file.write(_manifest_line(entry))
+        tmp.replace(self.path)
+
+    def register(self, pool: TenantPool):
+        """Register the created wallets in the manifest with a tenant pool."""
+        for entry in self.entries.values():
+            if entry.wallet_id:
+                pool.register(
+                    entry.wallet_id,
+                    entry.token,
+                    label=entry.label,
+                    wallet_type=entry.wallet_type,
+                )
+
+
+async def _provision(
+    pool: TenantPool,
+    entry: ProvisionedTenant,
+    steps: Sequence[Step],
+    manifest: Optional[TenantManifest],
+    limit: Optional[RateLimit],
+    wallet_options: Mapping[str, Any],
+    creating: asyncio.Semaphore,
+    stepping: asyncio.Semaphore,
+) -> ProvisionedTenant:
+    """Create the wallet of a tenant, if needed, and run its remaining steps.
+
+    The wallet is created holding a slot of creating and the steps are run
+    holding a slot of stepping, so slow steps do not hold up wallet creation.
+    """
+
+    def _record():
+        if manifest:
+            manifest.record(entry)
+
+    entry.error = None
+    try:
+        if entry.wallet_id is None:
+            async with creating:
+                if limit:
+                    await limit.acquire()
+                wallet = await pool.create(
+                    entry.label, entry.wallet_type or "askar", **wallet_options
+                )
+            entry.wallet_id = wallet["wallet_id"]
+            entry.token = wallet["token"]
+            _record()
+        else:
+            pool.register(
+                entry.wallet_id,
+                entry.token,
+                label=entry.label,
+                wallet_type=entry.wallet_type,
+            )
+
+        remaining = [step for step in steps if step.name not in entry.steps]
+        if remaining:
+            async with stepping:
+                for step in remaining:
+                    async with pool.tenant(entry.wallet_id) as tenant:
+                        LOGGER.debug("Provisioning %s: %s", entry.label, step.name)
+                        values = await step.action(tenant, entry)
+                    entry.values.update(values or {})
+                    entry.steps.append(step.name)
+                    _record()
+    except Exception as error:
+        LOGGER.warning("Provisioning %s failed: %s", entry.label, error)
+        entry.error = f"{type(error).__name__}: {error}"
+        _record()
+
+    return entry
+
+
+async def provision_tenants(
+    pool: TenantPool,
+    labels: Iterable[str],
+    *,
+    steps: Sequence[Step] = (),
+    manifest: Optional[TenantManifest] = None,
+    rate: Optional[float] = None,
+    concurrency: int = 10,
+    step_concurrency: Optional[int] = None,
+    wallet_type: str = "askar",
+    wallet_options: Optional[Mapping[str, Any]] = None,
+) -> AsyncIterator[ProvisionedTenant]:
+    """Provision a tenant for each label, yielding tenants as they finish.
+
+    Wallets are created at most rate per second, and at most concurrency at
+    once. Separately, at most step_concurrency tenants (by default concurrency)
+    run their steps at once, so slow steps do not hold up wallet creation.
+    Tenants whose provisioning fails are yielded with error set; provisioning
+    again with the same manifest resumes them.
+    """
+    limit = RateLimit(rate) if rate else None
+    creating = asyncio.Semaphore(concurrency)
+    stepping = asyncio.Semaphore(step_concurrency or concurrency)
+
+    async def _run(label: str) -> ProvisionedTenant:
+        entry = manifest.entries.get(label) if manifest else None
+        entry = entry or ProvisionedTenant(label, wallet_type=wallet_type)
+        return await _provision(
+            pool, entry, steps, manifest, limit, wallet_options or {}, creating, stepping
+        )
+
+    tasks = [asyncio.ensure_future(_run(label)) for label in labels]
+    try:
+        for next_entry in asyncio.as_completed(tasks):
+            yield await next_entry
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,178 @@
+"""Retry policy for transient admin API failures.
+
+Under load ACA-Py may answer with 502/503/504 (or 429) or drop connections. A
+retry policy set on a controller retries such failures with exponential backoff
+and full jitter, honouring any Retry-After header and the deadline in effect.
+
+Only requests that are safe to repeat are retried: by default GET requests.
+Other requests, like POSTs known to be idempotent, are opted in by route or per
+call with request(..., retry=True).
+"""
+
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import logging
+import random
+import re
+from typing import Awaitable, Callable, Collection, Optional, Sequence, TypeVar
+
+from aiohttp import ClientConnectionError
+
+from .controller import ControllerResponseError
+from .deadlines import budget
+
+LOGGER = logging.getLogger(__name__)
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class RetryRoute:
+    """Rule deciding whether requests to matching routes are retried.
+
+    pattern is a regular expression matched against the whole request path.
+    """
+
+    method: str
+    pattern: str
+    retry: bool = True
+
+    def matches(self, method: str, path: str) -> bool:
+        """Return whether this rule applies to a request."""
+        return method == self.method and re.fullmatch(self.pattern, path) is not None
+
+
+@dataclass
+class RetryStats:
+    """Counts of requests and retries made under a retry policy."""
+
+    attempts: int = 0
+    retries: Counter = field(default_factory=Counter)
+    exhausted: int = 0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Return the seconds to wait given by a Retry-After header."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryPolicy:
+    """Retry policy for admin API requests."""
+
+    def __init__(
+        self,
+        *,
+        attempts: int = 3,
+        base_delay: float = 0.1,
+        max_delay: float = 5.0,
+        max_retry_after: float = 30.0,
+        statuses: Collection[int] = (429, 502, 503, 504),
+        methods: Collection[str] = ("GET",),
+        routes: Sequence[RetryRoute] = (),
+    ):
+        """Initialize the policy.
+
+        attempts is the total number of attempts made for a request. Delays grow
+        from base_delay up to max_delay; a Retry-After header may extend a delay
+        up to max_retry_after. Requests using methods are retried unless a rule
+        in routes says otherwise; the first matching rule wins.
+        """
+        if attempts < 1:
+            raise ValueError("attempts must be at least 1")
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(methods)
+        self.routes = tuple(routes)
+        self.stats = RetryStats()
+
+    def retries(self, method: str, url: str) -> bool:
+        """Return whether a request may be retried."""
+        path = url.split("?", 1)[0]
+        for route in self.routes:
+            if route.matches(method, path):
+                return route.retry
+        return method in self.methods
+
+    def cause(self, error: BaseException) -> Optional[str]:
+        """Return why error is worth retrying, or None if it is not."""
+        if isinstance(error, ControllerResponseError):
+            if error.status in self.statuses:
+                return f"status {error.status}"
+            return None
+        if isinstance(error, ClientConnectionError):
+            return type(error).__name__
+        if isinstance(error, asyncio.TimeoutError):
+            return "timeout"
+        return None
+
+    def delay(self, attempt: int, error: BaseException) -> float:
+        """Return the time to wait before retrying after the given attempt."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        retry_after = None
+        if isinstance(error, ControllerResponseError):
+            retry_after = parse_retry_after(error.headers.get("Retry-After"))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+
+    async def call(
+        self,
+        method: str,
+        url: str,
+        attempt: Callable[[], Awaitable[T]],
+        *,
+        retry: Optional[bool] = None,
+    ) -> T:
+        """Make a request, retrying transient failures.
+
+        retry overrides whether the request may be retried.
+        """
+        retryable = self.retries(method, url) if retry is None else retry
+        number = 0
+        while True:
+            self.stats.attempts += 1
+            try:
+                return await attempt()
+            except Exception as error:
+                number += 1
+                cause = self.cause(error)
+                if not retryable or cause is None:
+                    raise
+                if number >= self.attempts:
+                    self.stats.exhausted += 1
+                    raise
+
+                delay = self.delay(number - 1, error)
+                remaining = budget(None)
+                if remaining is not None and remaining <= delay:
+                    self.stats.exhausted += 1
+                    raise
+
+                self.stats.retries[cause] += 1
+                LOGGER.warning(
+                    "Retrying %s %s after %s (attempt %d of %d) in %.2fs",
+                    method,
+                    url,
+                    cause,
+                    number + 1,
+                    self.attempts,
+                    delay,
+                )
+                await asyncio.sleep(delay)
@@ -0,0 +1,294 @@
+"""Pool of subwallet controllers for multitenant agents.
+
+A tenant pool hands out controllers for subwallets of a multitenant agent by
+wallet_id. Controllers are created lazily and share a single HTTP session and a
+single event hub (one WS for all tenants) instead of each running setup. Only
+max_active tenants are kept; the least recently used idle tenant is evicted to
+make room for another.
+
+Subwallet tokens are refreshed with /multitenancy/wallet/{wallet_id}/token
+before they expire, as given by the token's exp claim: when a tenant is handed
+out, and periodically for active tenants while the pool is open.
+
+    async with TenantPool(agency) as pool:
+        wallet = await pool.create("Alice")
+        async with pool.tenant(wallet["wallet_id"]) as alice:
+            await indy_anoncred_onboard(alice)
+"""
+
+import asyncio
+import base64
+from collections import OrderedDict
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Mapping, Optional
+
+from aiohttp import ClientSession
+
+from .controller import Controller, ControllerError
+from .events import EventHub
+
+LOGGER = logging.getLogger(__name__)
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """Return the expiry time of a JWT from its exp claim, if any.
+
+    The token is not verified; the agent does that.
+    """
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (IndexError, ValueError):
+        return None
+    exp = claims.get("exp") if isinstance(claims, dict) else None
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+@dataclass
+class Tenant:
+    """Known subwallet of a multitenant agent."""
+
+    wallet_id: str
+    token: Optional[str] = None
+    label: Optional[str] = None
+    wallet_type: Optional[str] = None
+    wallet_key: Optional[str] = None
+
+    @property
+    def expires(self) -> Optional[float]:
+        """Return the expiry time of the tenant's token, if known."""
+        return token_expiry(self.token) if self.token else None
+
+
+class TenantPool:
+    """Pool of subwallet controllers sharing a session and event hub."""
+
+    def __init__(
+        self,
+        agency: Controller,
+        *,
+        max_active: int = 100,
+        refresh_margin: float = 60.0,
+        refresh_interval: Optional[float] = None,
+        **controller_options: Any,
+    ):
+        """Initialize the pool for the base wallet controller of an agent.
+
+        Tokens expiring within refresh_margin seconds are refreshed before a
+        controller is handed out, and every refresh_interval seconds (by default
+        half of refresh_margin) for active tenants, so tenants held for longer
+        than a token lasts keep working.
+
+        Tenants in use are never evicted: if all max_active tenants are in use,
+        another is activated anyway and a warning is logged.
+
+        controller_options are passed to each tenant controller, e.g. retry or
+        request_timeout. Tenants send the headers of agency, such as an admin API
+        key, and share its lag monitor unless passed others.
+        """
+        if max_active < 1:
+            raise ValueError("max_active must be at least 1")
+        self.agency = agency
+        self.max_active = max_active
+        self.refresh_margin = refresh_margin
+        self.refresh_interval = refresh_interval or refresh_margin / 2
+        self.controller_options = controller_options
+        self.tenants: Dict[str, Tenant] = {}
+        self._active: "OrderedDict[str, Controller]" = OrderedDict()
+        self._in_use: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._pending: Dict[str, int] = {}
+        self._session: Optional[ClientSession] = None
+        self._hub: Optional[EventHub] = None
+        self._refresher: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "TenantPool":
+        """Open the shared session and event hub."""
+        self._session = ClientSession(base_url=self.agency.base_url)
+        self._hub = await EventHub(self.agency).__aenter__()
+        self._refresher = asyncio.ensure_future(self._refresh_periodically())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        """Close the shared session and event hub."""
+        if self._refresher:
+            self._refresher.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._refresher
+            self._refresher = None
+        if self._hub:
+            await self._hub.__aexit__(*exc_info)
+            self._hub = None
+        if self._session:
+            await self._session.close()
+            self._session = None
+        self._active.clear()
+        self._locks.clear()
+
+    def register(
+        self,
+        wallet_id: str,
+        token: Optional[str] = None,
+        *,
+        label: Optional[str] = None,
+        wallet_type: Optional[str] = None,
+        wallet_key: Optional[str] = None,
+    ) -> Tenant:
+        """Make an existing subwallet known to the pool.
+
+        Without a token, one is requested when the tenant is first used; this
+        requires wallet_key for unmanaged wallets.
+        """
+        tenant = Tenant(wallet_id, token, label, wallet_type, wallet_key)
+        self.tenants[wallet_id] = tenant
+        return tenant
+
+    async def create(
+        self, label: str, wallet_type: str = "askar", **options: Any
+    ) -> Mapping[str, Any]:
+        """Create a subwallet and register it with the pool.
+
+        options are passed in the body of POST /multitenancy/wallet. Returns the
+        created wallet.
+        """
+        wallet = await self.agency.post(
+            "/multitenancy/wallet",
+            json={"label": label, "wallet_type": wallet_type, **options},
+        )
+        self.register(
+            wallet["wallet_id"],
+            wallet["token"],
+            label=label,
+            wallet_type=wallet_type,
+            wallet_key=options.get("wallet_key"),
+        )
+        return wallet
+
+    async def _refresh_token(self, tenant: Tenant):
+        """Request a new token for a tenant."""
+        LOGGER.debug("Refreshing token of wallet %s", tenant.wallet_id)
+        body = {"wallet_key": tenant.wallet_key} if tenant.wallet_key else {}
+        result = await self.agency.post(
+            f"/multitenancy/wallet/{tenant.wallet_id}/token", json=body
+        )
+        tenant.token = result["token"]
+
+    def _expiring(self, tenant: Tenant) -> bool:
+        expires = tenant.expires
+        return expires is not None and expires - time.time() < self.refresh_margin
+
+    async def _describe(self, tenant: Tenant):
+        """Fill in the label and wallet type of a tenant from its wallet record."""
+        wallet = await self.agency.get(f"/multitenancy/wallet/{tenant.wallet_id}")
+        settings = wallet.get("settings") or {}
+        tenant.label = tenant.label or settings.get("default_label")
+        tenant.wallet_type = tenant.wallet_type or settings.get("wallet.type")
+
+    def _evict(self):
+        """Evict least recently used idle tenants until there is room for one more."""
+        assert self._hub
+        for wallet_id in list(self._active):
+            if len(self._active) < self.max_active:
+                return
+            if self._in_use.get(wallet_id):
+                continue
+            LOGGER.debug("Evicting wallet %s", wallet_id)
+            del self._active[wallet_id]
+            self._hub.drop(wallet_id)
+            if not self._pending.get(wallet_id):
+                self._locks.pop(wallet_id, None)
+        if len(self._active) >= self.max_active:
+            LOGGER.warning(
+                "All %d active tenants are in use; exceeding max_active of %d",
+                len(self._active),
+                self.max_active,
+            )
+
+    def _controller(self, tenant: Tenant) -> Controller:
+        assert self._hub and self._session and tenant.token
+        options = {"lag": self.agency.lag, **self.controller_options}
+        headers = {
+            key: value
+            for key, value in self.agency.headers.items()
+            if key.lower() != "authorization"
+        }
+        return Controller(
+            self.agency.base_url,
+            label=tenant.label,
+            wallet_id=tenant.wallet_id,
+            subwallet_token=tenant.token,
+            wallet_type=tenant.wallet_type,
+            event_queue=self._hub.queue(tenant.wallet_id),
+            session=self._session,
+            **{**options, "headers": {**headers, **options.get("headers", {})}},
+        )
+
+    async def get(self, wallet_id: str) -> Controller:
+        """Return the controller of a tenant, activating it if needed.
+
+        The controller may be evicted once no longer in use; prefer tenant() to
+        hold it for the duration of a task.
+        """
+        if self._hub is None:
+            raise ControllerError("Tenant pool is not open")
+
+        self._pending[wallet_id] = self._pending.get(wallet_id, 0) + 1
+        try:
+            async with self._locks.setdefault(wallet_id, asyncio.Lock()):
+                return await self._activate(wallet_id)
+        finally:
+            self._pending[wallet_id] -= 1
+            if not self._pending[wallet_id]:
+                del self._pending[wallet_id]
+                # Locks of evicted or never activated wallets are not kept
+                if wallet_id not in self._active:
+                    self._locks.pop(wallet_id, None)
+
+    async def _activate(self, wallet_id: str) -> Controller:
+        """Refresh the token of a tenant and return its controller."""
+        tenant = self.tenants.get(wallet_id) or self.register(wallet_id)
+        if tenant.token is None or self._expiring(tenant):
+            await self._refresh_token(tenant)
+        if tenant.label is None or tenant.wallet_type is None:
+            await self._describe(tenant)
+
+        controller = self._active.get(wallet_id)
+        if controller is None:
+            self._evict()
+            controller = self._controller(tenant)
+            self._active[wallet_id] = controller
+        elif controller.subwallet_token != tenant.token:
+            controller.subwallet_token = tenant.token
+            controller.headers["Authorization"] = f"Bearer {tenant.token}"
+
+        self._active.move_to_end(wallet_id)
+        return controller
+
+    @asynccontextmanager
+    async def tenant(self, wallet_id: str) -> AsyncIterator[Controller]:
+        """Hold the controller of a tenant, protecting it from eviction."""
+        self._in_use[wallet_id] = self._in_use.get(wallet_id, 0) + 1
+        try:
+            yield await self.get(wallet_id)
+        finally:
+            self._in_use[wallet_id] -= 1
+            if not self._in_use[wallet_id]:
+                del self._in_use[wallet_id]
+
+    async def refresh_expiring(self):
+        """Refresh the tokens of active tenants that are about to expire."""
+        for wallet_id in list(self._active):
+            if wallet_id in self._active and self._expiring(self.tenants[wallet_id]):
+                await self.get(wallet_id)
+
+    async def _refresh_periodically(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh_expiring()
+            except ControllerError:
+                LOGGER.exception("Unable to refresh tenant tokens")
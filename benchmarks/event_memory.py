@@ -0,0 +1,136 @@
+"""Benchmark memory used by buffered events.
+
+Buffers connection record events in an event queue, as received from the WS,
+and reports the growth of peak resident memory per buffered event for each
+payload representation: decoded dictionaries held by a plain dataclass Event
+(as before events had slots), decoded dictionaries, compact payloads and
+payloads not yet decoded. Each case runs in a fresh process.
+
+    python benchmarks/event_memory.py --counts 100000 1000000
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import gc
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from acapy_controller.events import Event, FanOutQueue, parse_event
+
+
+@dataclass
+class DictEvent:
+    """Event as it was before slots and interning."""
+
+    topic: str
+    payload: Mapping[str, Any]
+    wallet_id: Optional[str] = None
+    seq: int = field(default=0)
+
+
+STATES = ["request", "response", "active", "completed"]
+
+
+def frame(i: int) -> str:
+    """Return the WS message of the i-th connection record event."""
+    return json.dumps(
+        {
+            "topic": "connections",
+            "payload": {
+                "connection_id": f"{i:08d}-5a3c-4f3b-9f5e-3c1b2a4d5e6f",
+                "state": STATES[i % len(STATES)],
+                "rfc23_state": STATES[i % len(STATES)],
+                "created_at": "2024-01-01T00:00:00.000000Z",
+                "updated_at": f"2024-01-01T00:00:{i % 60:02d}.000000Z",
+                "their_label": f"Tenant {i % 1000}",
+                "their_did": f"did:peer:4zQm{i:040d}",
+                "my_did": f"did:peer:4zQm{i:040d}",
+                "invitation_key": f"{i:044d}",
+                "their_role": "invitee",
+                "accept": "auto",
+                "connection_protocol": "didexchange/1.1",
+                "invitation_mode": "once",
+                "routing_state": "none",
+            },
+            "wallet_id": f"wallet-{i % 100}",
+        }
+    )
+
+
+def legacy(raw: str) -> Event:
+    """Return the event of a message, decoded as before lazy payloads."""
+    data = json.loads(raw)
+    return DictEvent(data["topic"], data["payload"], data["wallet_id"])  # type: ignore
+
+
+def decoded(raw: str) -> Event:
+    """Return the event of a message with its payload decoded."""
+    return Event(**json.loads(raw))
+
+
+def lazy(raw: str) -> Event:
+    """Return the event of a message as received from the WS."""
+    event = parse_event(raw)
+    assert event
+    return event
+
+
+def _peak_rss() -> int:
+    """Return the peak resident memory of the process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+CASES = {
+    "dataclass event, dict payload": (legacy, False),
+    "slots event, dict payload": (decoded, False),
+    "slots event, compact payload": (decoded, True),
+    "slots event, lazy payload": (lazy, False),
+}
+
+
+async def _buffer(count: int, make: Callable[[str], Event], compact: bool):
+    queue = FanOutQueue(compact=compact)
+    for i in range(count):
+        await queue.put(make(frame(i)))
+    return queue
+
+
+def buffer(name: str, count: int) -> Dict[str, float]:
+    """Return the bytes per event and seconds taken to buffer count events."""
+    make, compact = CASES[name]
+    gc.collect()
+    before = _peak_rss()
+    start = time.perf_counter()
+    queue = asyncio.run(_buffer(count, make, compact))
+    elapsed = time.perf_counter() - start
+    used = _peak_rss() - before
+    del queue
+    return {"bytes": used / count, "seconds": elapsed}
+
+
+def main(counts: List[int]):
+    """Run the benchmark."""
+    context = multiprocessing.get_context("spawn")
+    for count in counts:
+        print(f"{count} buffered events")
+        for name in CASES:
+            with ProcessPoolExecutor(1, mp_context=context) as pool:
+                result = pool.submit(buffer, name, count).result()
+            print(
+                f"  {name:<32} {result['bytes']:7.0f} bytes/event"
+                f"  (buffered in {result['seconds']:.1f} s)"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+", default=[100000, 1000000])
+    args = parser.parse_args()
+    main(args.counts)
@@ -0,0 +1,310 @@
+"""Benchmark the fast mode of the issuance and presentation helpers.
+
+Runs indy_issue_credential_v2 and jsonld_present_proof, with and without
+fast=True, against simulated agents: every admin request takes --rtt ms and
+every DIDComm message between the agents --transit ms. Reports the mean time
+per flow and the admin requests made per flow, for --flows flows run at once.
+
+    python benchmarks/fast_mode.py --flows 100 --rtt 20 --transit 10
+"""
+
+import argparse
+import asyncio
+from itertools import count
+import json
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from acapy_controller.controller import Controller
+from acapy_controller.events import Event, FanOutQueue
+from acapy_controller.protocols import (
+    enable_auto_respond,
+    indy_issue_credential_v2,
+    jsonld_present_proof,
+)
+
+Record = Dict[str, Any]
+
+ISSUE = "issue_credential_v2_0"
+PRESENT = "present_proof_v2_0"
+
+
+class SimController(Controller):
+    """Controller whose admin requests are served by a simulated agent."""
+
+    def __init__(self, agent: "SimAgent"):
+        """Initialize the controller of agent."""
+        super().__init__("http://agent.invalid", event_queue=FanOutQueue())
+        self.agent = agent
+
+    async def _request(self, method, url, *, json=None, raw=False, **kwargs) -> bytes:
+        self.agent.requests += 1
+        await asyncio.sleep(self.agent.rtt)
+        return _json(self.agent.handle(method, url, json or {}))
+
+
+def _json(body: Any) -> bytes:
+    return json.dumps(body).encode()
+
+
+class SimAgent:
+    """Agent simulating the issue-credential/2.0 and present-proof/2.0 protocols."""
+
+    def __init__(self, rtt: float, transit: float):
+        """Initialize the agent."""
+        self.rtt = rtt
+        self.transit = transit
+        self.peer: Optional["SimAgent"] = None
+        self.auto_respond_offer = False
+        self.requests = 0
+        self.records: Dict[str, Record] = {}
+        self.threads: Dict[Tuple[str, str], str] = {}
+        self.ids = count()
+        self.controller = SimController(self)
+        self.routes: List[Tuple[str, str, Callable[..., Any]]] = [
+            ("PUT", r"/settings", self._settings),
+            ("POST", r"/issue-credential-2.0/send-offer", self._send_offer),
+            (
+                "POST",
+                r"/issue-credential-2.0/records/(.+)/send-request",
+                self._send_request,
+            ),
+            ("POST", r"/issue-credential-2.0/records/(.+)/issue", self._issue),
+            ("POST", r"/issue-credential-2.0/records/(.+)/store", self._store),
+            ("POST", r"/present-proof-2.0/send-request", self._send_pres_request),
+            (
+                "POST",
+                r"/present-proof-2.0/records/(.+)/send-presentation",
+                self._send_presentation,
+            ),
+            (
+                "POST",
+                r"/present-proof-2.0/records/(.+)/verify-presentation",
+                self._verify,
+            ),
+        ]
+
+    def handle(self, method: str, url: str, body: Record) -> Any:
+        """Serve an admin request."""
+        for route_method, pattern, handler in self.routes:
+            match = re.fullmatch(pattern, url)
+            if method == route_method and match:
+                return handler(*match.groups(), body)
+        raise ValueError(f"No route for {method} {url}")
+
+    def _emit(self, topic: str, payload: Record):
+        queue = self.controller.event_queue
+        asyncio.ensure_future(queue.put(Event(topic, dict(payload))))
+
+    def _send(self, handler: Callable[[Record], Awaitable[None] | None], message: Record):
+        asyncio.get_running_loop().call_later(self.transit, handler, message)
+
+    def _record(self, topic: str, key: str, body: Record, state: str) -> Record:
+        record_id = f"{key}-{next(self.ids)}"
+        record = {
+            key: record_id,
+            "connection_id": body["connection_id"],
+            "thread_id": body.get("thread_id") or f"thread-{record_id}",
+            "state": state,
+            "auto": body.get("auto", False),
+            **body.get("extra", {}),
+        }
+        self.records[record_id] = record
+        self.threads[(topic, record["thread_id"])] = record_id
+        self._emit(topic, record)
+        return record
+
+    def _update(self, topic: str, record_id: str, state: str) -> Record:
+        record = self.records[record_id]
+        record["state"] = state
+        self._emit(topic, record)
+        return record
+
+    def _thread(self, topic: str, message: Record) -> str:
+        return self.threads[(topic, message["thread_id"])]
+
+    def _settings(self, body: Record) -> Record:
+        settings = body.get("extra_settings", {})
+        self.auto_respond_offer = settings.get(
+            "ACAPY_AUTO_RESPOND_CREDENTIAL_OFFER", False
+        )
+        return {}
+
+    # Issuer
+    def _send_offer(self, body: Record) -> Record:
+        record = self._record(
+            ISSUE,
+            "cred_ex_id",
+            {"connection_id": body["connection_id"], "auto": body["auto_issue"]},
+            "offer-sent",
+        )
+        assert self.peer
+        self._send(self.peer._offer_received, record)
+        return record
+
+    def _request_received(self, message: Record):
+        record_id = self._thread(ISSUE, message)
+        self._update(ISSUE, record_id, "request-received")
+        if self.records[record_id]["auto"]:
+            self._issue(record_id, {})
+
+    def _issue(self, record_id: str, body: Record) -> Record:
+        record = self._update(ISSUE, record_id, "credential-issued")
+        self._emit(f"{ISSUE}_indy", {"cred_ex_id": record_id})
+        assert self.peer
+        self._send(self.peer._credential_received, record)
+        return {"cred_ex_record": record}
+
+    def _ack_received(self, message: Record):
+        self._update(ISSUE, self._thread(ISSUE, message), "done")
+
+    # Holder
+    def _offer_received(self, message: Record):
+        record = self._record(
+            ISSUE,
+            "cred_ex_id",
+            {
+                "connection_id": f"{message['connection_id']}-holder",
+                "thread_id": message["thread_id"],
+            },
+            "offer-received",
+        )
+        if self.auto_respond_offer:
+            self._send_request(record["cred_ex_id"], {})
+
+    def _send_request(self, record_id: str, body: Record) -> Record:
+        record = self._update(ISSUE, record_id, "request-sent")
+        assert self.peer
+        self._send(self.peer._request_received, record)
+        return record
+
+    def _credential_received(self, message: Record):
+        self._update(ISSUE, self._thread(ISSUE, message), "credential-received")
+
+    def _store(self, record_id: str, body: Record) -> Record:
+        record = self._update(ISSUE, record_id, "done")
+        self._emit(f"{ISSUE}_indy", {"cred_ex_id": record_id})
+        assert self.peer
+        self._send(self.peer._ack_received, record)
+        return {"cred_ex_record": record}
+
+    # Verifier
+    def _send_pres_request(self, body: Record) -> Record:
+        record = self._record(
+            PRESENT,
+            "pres_ex_id",
+            {
+                "connection_id": body["connection_id"],
+                "auto": body["auto_verify"],
+                "extra": {"by_format": {}},
+            },
+            "request-sent",
+        )
+        assert self.peer
+        self._send(self.peer._pres_request_received, record)
+        return record
+
+    def _presentation_received(self, message: Record):
+        record_id = self._thread(PRESENT, message)
+        self._update(PRESENT, record_id, "presentation-received")
+        if self.records[record_id]["auto"]:
+            self._verify(record_id, {})
+
+    def _verify(self, record_id: str, body: Record) -> Record:
+        record = self._update(PRESENT, record_id, "done")
+        assert self.peer
+        self._send(self.peer._pres_ack_received, record)
+        return record
+
+    # Prover
+    def _pres_request_received(self, message: Record):
+        attachment = {"data": {"json": {"presentation_definition": {}}}}
+        self._record(
+            PRESENT,
+            "pres_ex_id",
+            {
+                "connection_id": f"{message['connection_id']}-holder",
+                "thread_id": message["thread_id"],
+                "extra": {
+                    "by_format": {},
+                    "pres_request": {"request_presentations~attach": [attachment]},
+                },
+            },
+            "request-received",
+        )
+
+    def _send_presentation(self, record_id: str, body: Record) -> Record:
+        record = self._update(PRESENT, record_id, "presentation-sent")
+        assert self.peer
+        self._send(self.peer._presentation_received, record)
+        return record
+
+    def _pres_ack_received(self, message: Record):
+        self._update(PRESENT, self._thread(PRESENT, message), "done")
+
+
+async def issue(issuer: SimAgent, holder: SimAgent, i: int, fast: bool):
+    """Issue a credential."""
+    await indy_issue_credential_v2(
+        issuer.controller,
+        holder.controller,
+        f"conn-{i}",
+        f"conn-{i}-holder",
+        "cred-def",
+        {"name": "Alice"},
+        fast=fast,
+    )
+
+
+async def present(verifier: SimAgent, holder: SimAgent, i: int, fast: bool):
+    """Present a credential."""
+    await jsonld_present_proof(
+        verifier.controller,
+        holder.controller,
+        f"conn-{i}",
+        f"conn-{i}-holder",
+        {},
+        "domain",
+        fast=fast,
+    )
+
+
+async def run(flow, flows: int, rtt: float, transit: float, fast: bool):
+    """Return the mean seconds and admin requests per flow."""
+    first, second = SimAgent(rtt, transit), SimAgent(rtt, transit)
+    first.peer, second.peer = second, first
+    if fast:
+        await enable_auto_respond(second.controller)
+        second.requests = 0
+
+    async def _one(i: int) -> float:
+        start = time.perf_counter()
+        await flow(first, second, i, fast)
+        return time.perf_counter() - start
+
+    elapsed = await asyncio.gather(*(_one(i) for i in range(flows)))
+    return sum(elapsed) / flows, (first.requests + second.requests) / flows
+
+
+def main(flows: int, rtt: float, transit: float):
+    """Run the benchmark."""
+    for name, flow in (("issue-credential-2.0", issue), ("present-proof-2.0", present)):
+        for fast in (False, True):
+            mean, requests = asyncio.run(
+                run(flow, flows, rtt / 1000, transit / 1000, fast)
+            )
+            mode = "fast" if fast else "default"
+            print(
+                f"{name:<21} {mode:<8} {mean * 1000:7.1f} ms per flow"
+                f"  {requests:4.1f} admin requests per flow"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--flows", type=int, default=100)
+    parser.add_argument("--rtt", type=float, default=20.0, help="ms")
+    parser.add_argument("--transit", type=float, default=10.0, help="ms")
+    args = parser.parse_args()
+    main(args.flows, args.rtt, args.transit)
@@ -0,0 +1,134 @@
+"""Benchmark the latency of the final step of issue-credential/2.0 flows.
+
+Simulates an issuer and a holder agent: the holder stores the credential,
+taking --store ms, which sets its record done and sends the issuer an ack
+arriving --transit ms later. Events reach each controller after a random WS
+delivery lag of up to --lag ms. The final transitions (store, both done waits
+and both indy detail waits) are run one after the other, as before the
+"finish" parallel group, and as that group, and the mean time from the
+credential being received to the flow completing is reported.
+
+Controllers buffer events, so waits for events that already arrived return
+at once and sequential waits only add up when an action is ordered after a
+wait it does not depend on.
+
+    python benchmarks/flow_overlap.py --flows 100 --store 40 --transit 10 --lag 50
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Mapping
+
+from acapy_controller.controller import Controller
+from acapy_controller.events import Event, FanOutQueue
+from acapy_controller.flows import Flow, FlowScheduler, FlowState, Parallel, Transition
+from acapy_controller.protocols import INDY_ISSUE_CREDENTIAL_V2
+
+
+class Agent:
+    """Simulated agent delivering events to its controller after a lag."""
+
+    def __init__(self, lag: float):
+        """Initialize the agent and its controller."""
+        self.lag = lag
+        self.controller = Controller("http://agent.invalid", event_queue=FanOutQueue())
+
+    def emit(self, topic: str, payload: Mapping[str, Any], delay: float = 0.0):
+        """Deliver an event after delay plus a random lag."""
+        queue = self.controller.event_queue
+        loop = asyncio.get_running_loop()
+        loop.call_later(
+            delay + random.uniform(0, self.lag),
+            lambda: asyncio.ensure_future(queue.put(Event(topic, payload))),
+        )
+
+
+def finish_transitions(flow: Flow) -> Parallel:
+    """Return the final parallel group of a flow."""
+    group = flow.transitions[-1]
+    assert isinstance(group, Parallel)
+    return group
+
+
+def done(cred_ex_id: str) -> Mapping[str, Any]:
+    """Return a cred ex record in state done."""
+    return {
+        "cred_ex_id": cred_ex_id,
+        "state": "done",
+        "connection_id": "conn",
+        "thread_id": "thread",
+    }
+
+
+def store_action(issuer: Agent, holder: Agent, store: float, transit: float):
+    """Return the holder's store action, emitting the events it causes."""
+
+    async def _store(controller: Controller, context: Mapping[str, Any]):
+        await asyncio.sleep(store)
+        holder_id, issuer_id = context["holder_cred_ex_id"], context["issuer_cred_ex_id"]
+        holder.emit("issue_credential_v2_0", done(holder_id))
+        holder.emit("issue_credential_v2_0_indy", {"cred_ex_id": holder_id})
+        issuer.emit("issue_credential_v2_0", done(issuer_id), transit)
+        return {}
+
+    return _store
+
+
+def shapes(action) -> Mapping[str, Flow]:
+    """Return the final step as run sequentially and as a parallel group."""
+    group = finish_transitions(INDY_ISSUE_CREDENTIAL_V2)
+    chains = tuple(
+        tuple(
+            Transition(transition.name, transition.role, action=action)
+            if transition.name == "store"
+            else transition
+            for transition in chain
+        )
+        for chain in group.chains
+    )
+    sequential = tuple(transition for chain in chains for transition in chain)
+    return {
+        "sequential": Flow("sequential", sequential),
+        "parallel": Flow("parallel", (Parallel(group.name, chains),)),
+    }
+
+
+async def run(shape: str, flows: int, store: float, transit: float, lag: float) -> float:
+    """Return the mean seconds to finish flows instances of a shape."""
+    issuer, holder = Agent(lag), Agent(lag)
+    flow = shapes(store_action(issuer, holder, store, transit))[shape]
+    roles = {"issuer": issuer.controller, "holder": holder.controller}
+    scheduler = FlowScheduler(timeout=30)
+
+    async def _one(i: int) -> float:
+        context = {"issuer_cred_ex_id": f"issuer-{i}", "holder_cred_ex_id": f"holder-{i}"}
+        # The issuer's indy detail record is saved when the credential is issued
+        issuer.emit(
+            "issue_credential_v2_0_indy", {"cred_ex_id": context["issuer_cred_ex_id"]}
+        )
+        start = time.perf_counter()
+        await scheduler.run(flow, roles, state=FlowState(flow.name, context))
+        return time.perf_counter() - start
+
+    elapsed = await asyncio.gather(*(_one(i) for i in range(flows)))
+    return sum(elapsed) / flows
+
+
+def main(flows: int, store: float, transit: float, lag: float):
+    """Run the benchmark."""
+    for shape in ("sequential", "parallel"):
+        random.seed(0)
+        mean = asyncio.run(run(shape, flows, store / 1000, transit / 1000, lag / 1000))
+        print(f"{shape:<10} {mean * 1000:7.1f} ms per flow")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--flows", type=int, default=100)
+    parser.add_argument("--store", type=float, default=40.0, help="ms")
+    parser.add_argument("--transit", type=float, default=10.0, help="ms")
+    parser.add_argument("--lag", type=float, default=50.0, help="ms")
+    args = parser.parse_args()
+    main(args.flows, args.store, args.transit, args.lag)
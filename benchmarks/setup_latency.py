@@ -0,0 +1,103 @@
+"""Benchmark controller startup latency.
+
+Runs a fake agent with a fixed latency on every admin API call and WS attach,
+then measures the time from creating a controller to the completion of its first
+request (a POST) using the standard and fast setup paths.
+
+    python benchmarks/setup_latency.py --latency 0.02 --runs 50
+"""
+
+import argparse
+import asyncio
+from statistics import mean, median
+import time
+from typing import Any, Awaitable, Callable, List, Mapping
+
+from aiohttp import web
+
+from acapy_controller import Controller
+
+
+def fake_agent(latency: float) -> web.Application:
+    """Return a fake agent answering setup calls after latency seconds."""
+
+    async def ws(request: web.Request):
+        await asyncio.sleep(latency)
+        socket = web.WebSocketResponse()
+        await socket.prepare(request)
+        await socket.send_json(
+            {"topic": "settings", "payload": {"label": "Fake", "wallet_type": "askar"}}
+        )
+        async for _ in socket:
+            pass
+        return socket
+
+    async def config(request: web.Request):
+        await asyncio.sleep(latency)
+        return web.json_response({"config": {"wallet.type": "askar"}})
+
+    async def create_did(request: web.Request):
+        await asyncio.sleep(latency)
+        return web.json_response({"result": {"did": "did", "verkey": "verkey"}})
+
+    app = web.Application()
+    app.router.add_get("/ws", ws)
+    app.router.add_get("/status/config", config)
+    app.router.add_post("/wallet/did/create", create_did)
+    return app
+
+
+async def startup(base_url: str, **options: Any) -> float:
+    """Return the seconds from creating a controller to its first response."""
+    start = time.perf_counter()
+    async with Controller(base_url, **options) as controller:
+        await controller.post("/wallet/did/create", json={})
+        elapsed = time.perf_counter() - start
+    return elapsed
+
+
+async def measure(runs: int, run: Callable[[], Awaitable[float]]) -> List[float]:
+    """Return the timings of runs sequential runs."""
+    return [await run() for _ in range(runs)]
+
+
+def report(name: str, timings: List[float]):
+    """Print a summary of timings in milliseconds."""
+    print(
+        f"{name:<32} mean {mean(timings) * 1000:7.1f} ms"
+        f"  median {median(timings) * 1000:7.1f} ms"
+    )
+
+
+async def main(latency: float, runs: int):
+    """Run the benchmark."""
+    runner = web.AppRunner(fake_agent(latency))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore
+    base_url = f"http://127.0.0.1:{port}"
+
+    cases: Mapping[str, Mapping[str, Any]] = {
+        "standard setup": {},
+        "fast setup": {"fast_setup": True},
+        "fast setup, label and type": {
+            "fast_setup": True,
+            "label": "Fake",
+            "wallet_type": "askar",
+        },
+    }
+    try:
+        print(f"Agent latency {latency * 1000:.0f} ms, {runs} runs")
+        for name, options in cases.items():
+            report(name, await measure(runs, lambda: startup(base_url, **options)))
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.runs))
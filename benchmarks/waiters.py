@@ -0,0 +1,101 @@
+"""Benchmark the per-event cost of serving concurrent event waits.
+
+Starts a number of concurrent waits, each for the connection record of its own
+connection id reaching state active, then delivers events to --events of them
+(or all, if fewer), each preceded by a non-matching event for the same
+connection. Reports the time per event until the awaited waits complete, with
+the waiter registry of FanOutQueue.wait and with the selective get of the plain
+event queue, where every event wakes every waiter.
+
+    python benchmarks/waiters.py --waiters 1000 10000 100000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, List
+
+from async_selective_queue import AsyncSelectiveQueue
+
+from acapy_controller.events import Event, FanOutQueue
+
+Wait = Callable[[int], Awaitable[Event]]
+
+
+def keyed(queue: FanOutQueue) -> Wait:
+    """Return a wait served by the waiter registry."""
+
+    def _wait(i: int) -> Awaitable[Event]:
+        values = {"connection_id": f"conn-{i}", "state": "active"}
+        return queue.wait("connections", values, timeout=600)
+
+    return _wait
+
+
+def selective(queue: AsyncSelectiveQueue[Event]) -> Wait:
+    """Return a wait served by selective get."""
+
+    def _wait(i: int) -> Awaitable[Event]:
+        connection_id = f"conn-{i}"
+        return queue.get(
+            lambda event: (
+                event.topic == "connections"
+                and event.payload.get("connection_id") == connection_id
+                and event.payload.get("state") == "active"
+            ),
+            timeout=600,
+        )
+
+    return _wait
+
+
+async def run(
+    queue: AsyncSelectiveQueue[Event], wait: Wait, waiters: int, events: int
+) -> float:
+    """Return the seconds per event delivered with waiters pending."""
+    tasks = [asyncio.ensure_future(wait(i)) for i in range(waiters)]
+    await asyncio.sleep(0)
+
+    events = min(events, waiters)
+    targets = random.sample(range(waiters), events)
+    start = time.perf_counter()
+    for i in targets:
+        payload = {"connection_id": f"conn-{i}"}
+        await queue.put(Event("connections", {**payload, "state": "request"}))
+        await queue.put(Event("connections", {**payload, "state": "active"}))
+        await tasks[i]
+    elapsed = time.perf_counter() - start
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return elapsed / (2 * events)
+
+
+async def main(counts: List[int], events: int, selective_max: int):
+    """Run the benchmark."""
+    for waiters in counts:
+        queue = FanOutQueue()
+        per_event = await run(queue, keyed(queue), waiters, events)
+        line = f"{waiters:>7} waiters  registry {per_event * 1e6:9.1f} us/event"
+        if waiters <= selective_max:
+            queue = AsyncSelectiveQueue()
+            sample = max(events // 10, 1)
+            per_event = await run(queue, selective(queue), waiters, sample)
+            line += f"  selective get {per_event * 1e6:11.1f} us/event"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--waiters", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument(
+        "--selective-max",
+        type=int,
+        default=10000,
+        help="largest number of waiters to run selective get with; it is slow",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.waiters, args.events, args.selective_max))
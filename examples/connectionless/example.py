@@ -65,16 +65,17 @@ async def icv2():
             json={"attachments": [{"id": offer.cred_ex_id, "type": "credential-offer"}]},
             response=InvitationRecord,
         )
-        bob.event_queue.flush()
+        since = bob.mark()
         await bob.post("/out-of-band/receive-invitation", json=invite.invitation)
         bob_cred_ex = await bob.event_with_values(
             topic="issue_credential_v2_0",
             state="offer-received",
+            since=since,
             event_type=ConnectionlessV20CredExRecord,
         )
         bob_cred_ex_id = bob_cred_ex.cred_ex_id
 
-        alice.event_queue.flush()
+        since = alice.mark()
         bob_cred_ex = await bob.post(
             f"/issue-credential-2.0/records/{bob_cred_ex_id}/send-request",
             response=ConnectionlessV20CredExRecord,
@@ -83,6 +84,7 @@ async def icv2():
         alice_cred_ex = await alice.event_with_values(
             topic="issue_credential_v2_0",
             state="request-received",
+            since=since,
             event_type=ConnectionlessV20CredExRecord,
         )
         alice_cred_ex_id = alice_cred_ex.cred_ex_id
@@ -174,16 +176,17 @@ async def icv1():
             },
             response=InvitationRecord,
         )
-        bob.event_queue.flush()
+        since = bob.mark()
         await bob.post("/out-of-band/receive-invitation", json=invite.invitation)
         bob_cred_ex = await bob.event_with_values(
             topic="issue_credential",
             state="offer_received",
+            since=since,
             event_type=ConnectionlessV10CredExRecord,
         )
         bob_cred_ex_id = bob_cred_ex.credential_exchange_id
 
-        alice.event_queue.flush()
+        since = alice.mark()
         bob_cred_ex = await bob.post(
             f"/issue-credential/records/{bob_cred_ex_id}/send-request",
             response=ConnectionlessV10CredExRecord,
@@ -192,6 +195,7 @@ async def icv1():
         alice_cred_ex = await alice.event_with_values(
             topic="issue_credential",
             state="request_received",
+            since=since,
             event_type=ConnectionlessV10CredExRecord,
         )
         alice_cred_ex_id = alice_cred_ex.credential_exchange_id
@@ -87,6 +87,7 @@ async def indy_anoncred_onboard_via_endorser(
     assert result.result
     issuer_did = result.result
 
+    endorser_cursor, issuer_cursor = endorser.mark(), issuer.mark()
     await issuer.post(
         "/ledger/register-nym",
         params={
@@ -98,10 +99,15 @@ async def indy_anoncred_onboard_via_endorser(
     )
 
     txn = await endorser.event_with_values(
-        "endorse_transaction", state="request_received", event_type=EndorseTxn
+        "endorse_transaction",
+        state="request_received",
+        event_type=EndorseTxn,
+        since=endorser_cursor,
     )
     await endorser.post(f"/transactions/{txn.transaction_id}/endorse")
-    await issuer.event_with_values("endorse_transaction", state="transaction_acked")
+    await issuer.event_with_values(
+        "endorse_transaction", state="transaction_acked", since=issuer_cursor
+    )
 
     config = (await issuer.get("/status/config"))["config"]
     genesis_url = config.get("ledger.genesis_url")
@@ -119,6 +125,7 @@ async def indy_anoncred_onboard_via_endorser(
                 "version": taa["taa_record"]["version"],
             },
         )
+    endorser_cursor, issuer_cursor = endorser.mark(), issuer.mark()
     await issuer.post(
         "/wallet/did/public",
         params={
@@ -127,13 +134,15 @@ async def indy_anoncred_onboard_via_endorser(
         },
     )
     txn = await endorser.event_with_values(
-        "endorse_transaction", state="request_received", event_type=EndorseTxn
+        "endorse_transaction",
+        state="request_received",
+        event_type=EndorseTxn,
+        since=endorser_cursor,
     )
     await endorser.post(f"/transactions/{txn.transaction_id}/endorse")
-    await issuer.event_with_values("endorse_transaction", state="transaction_acked")
-
-    endorser.event_queue.flush()
-    issuer.event_queue.flush()
+    await issuer.event_with_values(
+        "endorse_transaction", state="transaction_acked", since=issuer_cursor
+    )
 
     return issuer_did.did, ea, ae
 
@@ -146,27 +155,22 @@ async def auto_endorse_all(endorser: Controller):
     """Auto endorse all received requests."""
 
     async def _inner():
-        while True:
-            LOGGER.debug("Looking for endorse requests...")
-            try:
-                txn = await endorser.event_with_values(
-                    "endorse_transaction",
-                    state="request_received",
-                    event_type=EndorseTxn,
-                )
+        async with endorser.subscribe(
+            "endorse_transaction", state="request_received", event_type=EndorseTxn
+        ) as requests:
+            async for txn in requests:
                 LOGGER.debug("Request received: %s", txn)
-                await endorser.post(f"/transactions/{txn.transaction_id}/endorse")
-            except TimeoutError:
-                LOGGER.debug("Timeout while waiting for endorse request")
-            except Exception:
-                LOGGER.exception("Something went wrong in auto endorse loop")
+                try:
+                    await endorser.post(f"/transactions/{txn.transaction_id}/endorse")
+                except Exception:
+                    LOGGER.exception("Something went wrong in auto endorse loop")
 
     task = asyncio.create_task(_inner())
 
     yield
 
     task.cancel()
-    with suppress(asyncio.CancelledError, TimeoutError):
+    with suppress(asyncio.CancelledError):
         await task
 
 
@@ -0,0 +1,61 @@
+"""Test the controller."""
+
+import json
+
+import pytest
+
+from acapy_controller.controller import Controller, ControllerError
+from acapy_controller.events import Event, FanOutQueue
+
+
+class OfflineController(Controller):
+    """Controller answering every request with an empty body."""
+
+    async def _request(self, method, url, **kwargs) -> bytes:
+        return b"{}"
+
+
+@pytest.mark.asyncio
+async def test_writes_wait_for_late_attach():
+    queue = FanOutQueue()
+    controller = OfflineController(
+        "http://example", event_queue=queue, event_timeout=0.05
+    )
+    controller._start_attach()
+
+    with pytest.raises(ControllerError, match="did not attach"):
+        await controller.post("/connections/create-invitation")
+
+    # The WS attaches late; the next write waits for it again and succeeds
+    await queue.put(Event("settings", {"label": "alice"}))
+    assert await controller.post("/connections/create-invitation") == {}
+    assert controller.label == "alice"
+    controller._cancel_attach()
+
+
+class UnpagedController(Controller):
+    """Controller whose list endpoint ignores limit and offset."""
+
+    def __init__(self, count: int):
+        super().__init__("http://example")
+        self.count = count
+        self.requests = 0
+
+    async def _request(self, method, url, **kwargs) -> bytes:
+        self.requests += 1
+        results = [{"connection_id": str(i)} for i in range(self.count)]
+        return json.dumps({"results": results}).encode()
+
+
+@pytest.mark.asyncio
+async def test_paginate_without_paging_support():
+    controller = UnpagedController(5)
+    with pytest.raises(ControllerError, match="does not support limit and offset"):
+        async for _ in controller.paginate("/connections", page_size=2, prefetch=True):
+            pass
+    assert controller.requests == 1
+
+    # Short pages end the iteration
+    controller = UnpagedController(1)
+    results = [item async for item in controller.paginate("/connections", page_size=2)]
+    assert results == [{"connection_id": "0"}]
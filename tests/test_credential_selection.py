@@ -0,0 +1,71 @@
+"""Test credential selection for presentations."""
+
+from acapy_controller.protocols import (
+    CredentialSelector,
+    IndyCredPrecis,
+    anoncreds_auto_select_credentials_for_presentation_request,
+    excluding,
+    fewest_credentials,
+    prefer_cred_def,
+)
+
+
+def precis(cred_id: str, *referents: str, cred_def_id: str = "cd") -> IndyCredPrecis:
+    return IndyCredPrecis.deserialize(
+        {
+            "cred_info": {"referent": cred_id, "attrs": {}, "cred_def_id": cred_def_id},
+            "presentation_referents": list(referents),
+        }
+    )
+
+
+REQUEST = {
+    "requested_attributes": {
+        "first": {"name": "firstname", "restrictions": [{"cred_def_id": "cd"}]},
+        "last": {"name": "lastname", "restrictions": [{"cred_def_id": "cd"}]},
+        "nick": {"name": "nickname"},
+    },
+    "requested_predicates": {"age": {"name": "age", "p_type": ">=", "p_value": 18}},
+}
+
+
+def test_default_selects_last_returned():
+    creds = [precis("earlier", "first", "last"), precis("later", "first")]
+    spec = anoncreds_auto_select_credentials_for_presentation_request(REQUEST, creds)
+    assert spec.requested_attributes["first"]["cred_id"] == "later"
+    assert spec.requested_attributes["last"]["cred_id"] == "earlier"
+    assert "nick" not in spec.requested_attributes
+    assert spec.requested_predicates == {}
+
+
+def test_fewest_credentials():
+    creds = [
+        precis("a", "first", "last", "age"),
+        precis("b", "first"),
+        precis("c", "age"),
+    ]
+    spec = CredentialSelector(fewest_credentials).select(REQUEST, creds)
+    assert {
+        spec.requested_attributes["first"]["cred_id"],
+        spec.requested_attributes["last"]["cred_id"],
+        spec.requested_predicates["age"]["cred_id"],
+    } == {"a"}
+
+
+def test_strategies_in_order():
+    creds = [
+        precis("revoked", "first", cred_def_id="other"),
+        precis("preferred", "first", cred_def_id="other"),
+        precis("later", "first"),
+    ]
+    spec = CredentialSelector(excluding({"revoked"}), prefer_cred_def("other")).select(
+        REQUEST, creds
+    )
+    assert spec.requested_attributes["first"]["cred_id"] == "preferred"
+
+
+def test_self_attested_fallback():
+    spec = CredentialSelector(
+        self_attested={"nickname": "Bobby", "lastname": "B"}
+    ).select(REQUEST, [])
+    assert spec.self_attested_attributes == {"nick": "Bobby"}
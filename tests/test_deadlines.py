@@ -0,0 +1,28 @@
+"""Test deadline propagation."""
+
+import asyncio
+
+from async_selective_queue import AsyncSelectiveQueue
+import pytest
+
+from acapy_controller.controller import Controller, ControllerTimeoutError
+from acapy_controller.deadlines import budget, deadline, step
+
+
+def test_nested_deadlines_only_shorten():
+    assert budget(5) == 5
+    with deadline(1):
+        assert budget(5) <= 1
+        with deadline(10):
+            assert budget(None) <= 1
+    assert budget(None) is None
+
+
+@pytest.mark.asyncio
+async def test_event_wait_limited_by_deadline():
+    controller = Controller("http://example", event_queue=AsyncSelectiveQueue())
+    with deadline(0.05, "test"), step("wait for offer"):
+        with pytest.raises(ControllerTimeoutError, match="at step wait for offer"):
+            await asyncio.wait_for(
+                controller.event_with_values("topic", timeout=10), timeout=1
+            )
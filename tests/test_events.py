@@ -0,0 +1,230 @@
+"""Test event subscriptions."""
+
+import asyncio
+import json
+
+import pytest
+
+from acapy_controller.controller import Controller
+from acapy_controller.events import (
+    CompactPayload,
+    Event,
+    FanOutQueue,
+    LazyPayload,
+    SubscriptionOverflowError,
+    _handle_message,
+    _put,
+    parse_event,
+)
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_fan_out():
+    queue = FanOutQueue()
+    controller = Controller("http://example", event_queue=queue)
+    first = controller.subscribe("connections", state="active")
+    second = controller.subscribe("connections")
+
+    await queue.put(Event("connections", {"state": "request", "connection_id": "1"}))
+    await queue.put(Event("connections", {"state": "active", "connection_id": "1"}))
+
+    assert await anext(first) == {"state": "active", "connection_id": "1"}
+    assert second.lag == 2
+    assert [event["state"] async for event in _take(second, 2)] == ["request", "active"]
+
+    # One-shot waiters still see the event
+    record = await controller.event_with_values("connections", state="active")
+    assert record["connection_id"] == "1"
+
+    first.close()
+    with pytest.raises(StopAsyncIteration):
+        await asyncio.wait_for(anext(first), 1)
+
+
+@pytest.mark.asyncio
+async def test_subscription_overflow():
+    queue = FanOutQueue()
+    oldest = queue.subscribe(lambda _: True, lambda event: event.payload, maxsize=2)
+    failing = queue.subscribe(
+        lambda _: True, lambda event: event.payload, maxsize=2, overflow="error"
+    )
+    for i in range(3):
+        await queue.put(Event("topic", {"i": i}))
+
+    assert oldest.dropped == 1
+    assert [event["i"] async for event in _take(oldest, 2)] == [1, 2]
+    with pytest.raises(SubscriptionOverflowError):
+        await anext(failing)
+
+
+async def _take(subscription, count):
+    for _ in range(count):
+        yield await anext(subscription)
+
+
+@pytest.mark.asyncio
+async def test_wait_since_cursor():
+    queue = FanOutQueue()
+    controller = Controller("http://example", event_queue=queue)
+    await queue.put(Event("connections", {"state": "done", "connection_id": "old"}))
+
+    cursor = controller.mark()
+    await queue.put(Event("connections", {"state": "done", "connection_id": "new"}))
+
+    record = await controller.event_with_values("connections", state="done", since=cursor)
+    assert record["connection_id"] == "new"
+    with pytest.raises(asyncio.TimeoutError):
+        await controller.event_with_values(
+            "connections", state="done", since=cursor, timeout=0.01
+        )
+
+    # The stale event is still there for waits that want it
+    record = await controller.event_with_values("connections", state="done")
+    assert record["connection_id"] == "old"
+
+
+@pytest.mark.asyncio
+async def test_dedupe_and_latest_state():
+    queue = FanOutQueue()
+    controller = Controller("http://example", event_queue=queue)
+
+    def _conn(state, updated_at):
+        return Event(
+            "connections",
+            {"connection_id": "1", "state": state, "updated_at": updated_at},
+        )
+
+    await queue.put(_conn("done", "2024-01-01T00:00:01Z"))
+    await queue.put(_conn("done", "2024-01-01T00:00:01Z"))
+    await queue.put(_conn("request", "2024-01-01T00:00:02Z"))
+    await queue.put(_conn("done", "2024-01-01T00:00:03Z"))
+    # Replayed after a reconnect
+    await queue.put(_conn("request", "2024-01-01T00:00:02Z"))
+    assert queue.duplicates == 2
+
+    latest = controller.record_state("connections", "1")
+    assert latest and latest.state == "done"
+    assert latest.updated_at == "2024-01-01T00:00:03Z"
+
+    record = await controller.event_with_values("connections", state="done")
+    assert record["updated_at"] == "2024-01-01T00:00:03Z"
+    with pytest.raises(asyncio.TimeoutError):
+        await controller.event_with_values("connections", state="done", timeout=0.01)
+
+
+def test_parse_event_frames():
+    payload = {"connection_id": "1", "state": "active", "nested": {"wallet_id": "x"}}
+    frame = {"topic": "connections", "payload": payload, "wallet_id": "w"}
+    event = parse_event(json.dumps(frame))
+    assert event and event.topic == "connections" and event.wallet_id == "w"
+    assert isinstance(event.payload, LazyPayload) and not event.payload.decoded
+    assert event.payload == payload
+
+    event = parse_event(json.dumps({"topic": "connections", "payload": payload}))
+    assert event and event.wallet_id is None
+    assert event.payload["nested"] == {"wallet_id": "x"}
+
+    assert parse_event(json.dumps({"topic": "ping", "authenticated": True})) is None
+
+
+def test_parse_event_frames_with_trailing_keys():
+    # Not the frame layout of ACA-Py; decoded in full and rejected as before
+    for raw in (
+        '{"topic": "t", "payload": {"a": 1}, "extra": {"b": 2}}',
+        '{"topic": "t", "payload": {"a": 1}, "wallet_id": "w", "extra": {"b": 2}}',
+    ):
+        with pytest.raises(TypeError):
+            parse_event(raw)
+
+    event = parse_event('{"topic": "t", "payload": {"a": {"b": 2}}, "wallet_id": "w"}')
+    assert event and event.wallet_id == "w" and event.payload == {"a": {"b": 2}}
+
+
+@pytest.mark.asyncio
+async def test_bad_payloads_dropped():
+    queue = FanOutQueue()
+    controller = Controller("http://example", event_queue=queue)
+    waiting = asyncio.ensure_future(controller.event_with_values("t", a=1))
+    await asyncio.sleep(0)
+
+    # Decoded by the waiter only; dropped without ending the WS task
+    await _put(queue, Event("t", LazyPayload('{"a": }')))
+    await _handle_message(controller, queue, '{"topic": "t", "payload": {"a": 1}}')
+    assert await waiting == {"a": 1}
+
+
+@pytest.mark.asyncio
+async def test_payloads_decoded_on_use():
+    queue = FanOutQueue()
+    controller = Controller("http://example", event_queue=queue)
+    frame = {
+        "topic": "connections",
+        "payload": {"connection_id": "1", "state": "request", "updated_at": "t1"},
+    }
+    event = parse_event(json.dumps(frame))
+    assert event
+    await queue.put(event)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await controller.event_with_values("connections", state="active", timeout=0.01)
+    assert not event.payload.decoded
+    latest = controller.record_state("connections", "1")
+    assert latest and latest.state == "request"
+
+    record = await controller.event_with_values("connections", state="request")
+    assert record["updated_at"] == "t1"
+
+
+@pytest.mark.asyncio
+async def test_compact_payloads():
+    queue = FanOutQueue(compact=True)
+    controller = Controller("http://example", event_queue=queue)
+    for i in range(2):
+        payload = {"connection_id": str(i), "state": "active", "tags": [{"a": i}]}
+        await queue.put(Event("connections", payload))
+
+    first, second = queue._queue
+    assert isinstance(first.payload, CompactPayload)
+    assert first.payload._layout is second.payload._layout
+    assert first.payload["tags"][0]["a"] == 0
+
+    # Callers get plain payloads
+    record = await controller.event_with_values("connections", connection_id="1")
+    assert record == {"connection_id": "1", "state": "active", "tags": [{"a": 1}]}
+    assert type(record) is dict
+
+    subscription = controller.subscribe("connections")
+    await queue.put(Event("connections", {"connection_id": "2", "tags": [{"a": 2}]}))
+    assert await anext(subscription) == {"connection_id": "2", "tags": [{"a": 2}]}
+    subscription.close()
+
+
+@pytest.mark.asyncio
+async def test_keyed_waiters():
+    queue = FanOutQueue()
+    waits = [
+        asyncio.ensure_future(
+            queue.wait("connections", {"connection_id": str(i), "state": "active"})
+        )
+        for i in range(100)
+    ]
+    expiring = asyncio.ensure_future(
+        queue.wait("connections", {"connection_id": "x"}, timeout=0.01)
+    )
+    await asyncio.sleep(0)
+    assert len(queue._waiters) == 101
+
+    await queue.put(Event("connections", {"connection_id": "7", "state": "request"}))
+    await queue.put(Event("connections", {"connection_id": "7", "state": "active"}))
+    event = await asyncio.wait_for(waits[7], 1)
+    assert event.payload["state"] == "active"
+    # The non-matching event stays queued for other waits
+    assert [event.payload["state"] for event in queue._queue] == ["request"]
+
+    with pytest.raises(asyncio.TimeoutError):
+        await expiring
+
+    for wait in waits:
+        wait.cancel()
+    await asyncio.gather(*waits, return_exceptions=True)
+    assert len(queue._waiters) == 0
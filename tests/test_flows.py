@@ -0,0 +1,366 @@
+"""Test the flow engine."""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from acapy_controller.checkpoints import JsonLinesCheckpointStore
+from acapy_controller.flows import (
+    Flow,
+    FlowScheduler,
+    FlowState,
+    Parallel,
+    Ref,
+    Request,
+    Transition,
+)
+from acapy_controller.protocols import (
+    ANONCREDS_ISSUE_CREDENTIAL_V2,
+    INDY_ISSUE_CREDENTIAL_V2,
+    INDY_ISSUE_CREDENTIAL_V2_FAST,
+    _credential_offer_v2,
+)
+
+
+class FakeController:
+    """Stand-in for a controller recording requests and serving canned events."""
+
+    def __init__(
+        self,
+        events: Dict[str, Dict[str, Any]],
+        records: Optional[Dict[str, Dict[str, Any]]] = None,
+    ):
+        self.events = events
+        self.records = records or {}
+        self.requests: List[Tuple[str, str, Any]] = []
+
+    async def request(self, method, url, *, json=None, params=None, response=None):
+        self.requests.append((method, url, json))
+        return {"id": f"{url}-result"}
+
+    async def get(self, url):
+        return self.records[url]
+
+    async def event_with_values(self, topic, *, event_type=None, timeout=5, **values):
+        return {**self.events[topic], **values}
+
+
+FLOW = Flow(
+    "test",
+    (
+        Transition(
+            "start",
+            "alice",
+            action=Request("POST", "/start", json={"to": Ref("peer")}),
+            save={"start_id": "id"},
+        ),
+        Transition(
+            "received",
+            "bob",
+            topic="topic",
+            values={"ref": Ref("start_id")},
+            save={"bob_id": "id"},
+            result="bob_event",
+        ),
+        Transition("reply", "bob", action=Request("POST", "/reply/{bob_id}")),
+    ),
+)
+
+
+@pytest.mark.asyncio
+async def test_flow_runs_transitions_in_order():
+    alice = FakeController({})
+    bob = FakeController({"topic": {"id": "bob-record"}})
+    state = await FlowScheduler().run(FLOW, {"alice": alice, "bob": bob}, {"peer": "bob"})
+
+    assert state.step == len(FLOW.transitions)
+    assert alice.requests == [("POST", "/start", {"to": "bob"})]
+    assert bob.requests == [("POST", "/reply/bob-record", None)]
+    assert state["bob_event"] == {"id": "bob-record", "ref": "/start-result"}
+
+
+@pytest.mark.asyncio
+async def test_run_many():
+    alice = FakeController({})
+    bob = FakeController({"topic": {"id": "bob-record"}})
+    states = [
+        state
+        async for state in FlowScheduler(concurrency=2).run_many(
+            FLOW, {"alice": alice, "bob": bob}, [{"peer": str(i)} for i in range(5)]
+        )
+    ]
+    assert len(states) == 5
+    assert len(alice.requests) == 5
+
+
+RECOVERABLE_FLOW = Flow(
+    "recoverable",
+    (
+        FLOW.transitions[0],
+        Transition(
+            "received",
+            "bob",
+            topic="topic",
+            values={"ref": Ref("start_id"), "state": "received"},
+            save={"bob_id": "id"},
+            record="/records?ref={start_id}",
+        ),
+        FLOW.transitions[2],
+    ),
+)
+
+
+@pytest.mark.asyncio
+async def test_resume_recovers_missed_events(tmp_path):
+    store = JsonLinesCheckpointStore(tmp_path / "checkpoints.jsonl")
+    store.save(
+        FlowState("recoverable", {"start_id": "/start-result"}, step=1, id="flow-1")
+    )
+
+    # Reopen the store as a restarted controller would
+    store = JsonLinesCheckpointStore(tmp_path / "checkpoints.jsonl")
+    [state] = store.pending("recoverable")
+    assert state.step == 1
+
+    alice = FakeController({})
+    # No events: the missed event must be recovered from the record
+    bob = FakeController(
+        {},
+        {
+            "/records?ref=/start-result": {
+                "results": [
+                    {"id": "other", "ref": "other", "state": "received"},
+                    {"id": "bob-record", "ref": "/start-result", "state": "received"},
+                ]
+            }
+        },
+    )
+    scheduler = FlowScheduler(checkpoints=store)
+    state = await scheduler.resume(RECOVERABLE_FLOW, {"alice": alice, "bob": bob}, state)
+
+    assert state.step == len(RECOVERABLE_FLOW.transitions)
+    assert state.last_state == "received"
+    assert alice.requests == []
+    assert bob.requests == [("POST", "/reply/bob-record", None)]
+    assert store.pending() == []
+    assert JsonLinesCheckpointStore(tmp_path / "checkpoints.jsonl").pending() == []
+
+
+PARALLEL_FLOW = Flow(
+    "parallel",
+    (
+        FLOW.transitions[0],
+        Parallel(
+            "finish",
+            (
+                (
+                    Transition("ack", "alice", action=Request("POST", "/ack")),
+                    Transition("alice-done", "alice", topic="done", result="alice"),
+                ),
+                Transition(
+                    "bob-done",
+                    "bob",
+                    topic="done",
+                    result="bob",
+                    record="/records/bob",
+                ),
+            ),
+        ),
+    ),
+)
+
+
+class SlowController(FakeController):
+    """Controller whose events arrive only when released."""
+
+    def __init__(self, events, records=None):
+        super().__init__(events, records)
+        self.release = asyncio.Event()
+        self.cancelled = False
+
+    async def event_with_values(self, topic, *, event_type=None, timeout=5, **values):
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(self.events[topic], Exception):
+            raise self.events[topic]
+        return await super().event_with_values(topic, **values)
+
+
+@pytest.mark.asyncio
+async def test_parallel_group_overlaps_members(tmp_path):
+    alice = FakeController({"done": {"id": "alice-record"}})
+    bob = SlowController({"done": {"id": "bob-record"}})
+    store = JsonLinesCheckpointStore(tmp_path / "checkpoints.jsonl")
+    run = asyncio.ensure_future(
+        FlowScheduler(checkpoints=store).run(
+            PARALLEL_FLOW, {"alice": alice, "bob": bob}, {"peer": "bob"}
+        )
+    )
+    await asyncio.sleep(0.01)
+
+    # Alice's chain finished while Bob's wait is still pending
+    [state] = JsonLinesCheckpointStore(tmp_path / "checkpoints.jsonl").pending()
+    assert state.step == 1
+    assert state.taken == ["ack", "alice-done"]
+
+    bob.release.set()
+    state = await run
+    assert state.step == 2 and state.taken == []
+    assert state["alice"] == {"id": "alice-record"}
+    assert state["bob"] == {"id": "bob-record"}
+
+
+@pytest.mark.asyncio
+async def test_parallel_group_cancels_on_error():
+    alice = SlowController({"done": RuntimeError("boom")})
+    alice.release.set()
+    bob = SlowController({"done": {"id": "bob-record"}})
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await FlowScheduler().run(
+            PARALLEL_FLOW, {"alice": alice, "bob": bob}, {"peer": "bob"}
+        )
+    assert bob.cancelled
+
+
+@pytest.mark.asyncio
+async def test_resume_parallel_group():
+    alice = FakeController({"done": {"id": "alice-record"}})
+    bob = FakeController({}, {"/records/bob": {"id": "bob-record", "state": "x"}})
+    state = FlowState("parallel", {}, step=1, taken=["ack"])
+
+    state = await FlowScheduler().resume(
+        PARALLEL_FLOW, {"alice": alice, "bob": bob}, state
+    )
+    # Bob's member was recovered from its record, Alice's resumed after "ack"
+    assert alice.requests == []
+    assert bob.requests == []
+    assert state["bob"]["id"] == "bob-record"
+    assert state["alice"] == {"id": "alice-record"}
+
+
+class Agent(FakeController):
+    """Controller returning credential exchange records from requests."""
+
+    async def request(self, method, url, *, json=None, params=None, response=None):
+        await super().request(method, url, json=json)
+        return {"cred_ex_id": "issuer-1", "thread_id": "thread-1"}
+
+
+@pytest.mark.parametrize("fast", [False, True])
+@pytest.mark.asyncio
+async def test_fast_issuance_leaves_steps_to_agents(fast):
+    record = {"connection_id": "conn", "thread_id": "thread-1", "state": "done"}
+    issuer = Agent({"issue_credential_v2_0": record, "issue_credential_v2_0_indy": {}})
+    holder = Agent(
+        {
+            "issue_credential_v2_0": {**record, "cred_ex_id": "holder-1"},
+            "issue_credential_v2_0_indy": {},
+        }
+    )
+    offer = _credential_offer_v2("conn", {"indy": {}}, fast=fast)
+    state = await FlowScheduler().run(
+        INDY_ISSUE_CREDENTIAL_V2_FAST if fast else INDY_ISSUE_CREDENTIAL_V2,
+        {"issuer": issuer, "holder": holder},
+        {"holder_connection_id": "conn", "offer": offer},
+    )
+
+    assert offer["auto_issue"] is fast
+    issuer_urls = [url for _, url, _ in issuer.requests]
+    holder_urls = [url for _, url, _ in holder.requests]
+    if fast:
+        assert issuer_urls == ["/issue-credential-2.0/send-offer"]
+        assert holder_urls == ["/issue-credential-2.0/records/holder-1/store"]
+    else:
+        assert issuer_urls == [
+            "/issue-credential-2.0/send-offer",
+            "/issue-credential-2.0/records/issuer-1/issue",
+        ]
+        assert holder_urls == [
+            "/issue-credential-2.0/records/holder-1/send-request",
+            "/issue-credential-2.0/records/holder-1/store",
+        ]
+    assert state["issuer_cred_ex"]["state"] == "done"
+    assert state["holder_cred_ex"]["cred_ex_id"] == "holder-1"
+
+
+@pytest.mark.asyncio
+async def test_resume_pending_keeps_formats_apart(tmp_path):
+    store = JsonLinesCheckpointStore(tmp_path / "checkpoints.jsonl")
+    done = len(INDY_ISSUE_CREDENTIAL_V2.transitions)
+    store.save(FlowState(INDY_ISSUE_CREDENTIAL_V2.name, {}, step=done, id="indy"))
+    store.save(FlowState(ANONCREDS_ISSUE_CREDENTIAL_V2.name, {}, step=done, id="anon"))
+    assert INDY_ISSUE_CREDENTIAL_V2.name != ANONCREDS_ISSUE_CREDENTIAL_V2.name
+
+    scheduler = FlowScheduler(checkpoints=store)
+    roles = {"issuer": FakeController({}), "holder": FakeController({})}
+    states = [
+        state async for state in scheduler.resume_pending(INDY_ISSUE_CREDENTIAL_V2, roles)
+    ]
+    assert [state.id for state in states] == ["indy"]
+    assert [state.id for state in store.pending()] == ["anon"]
+
+
+@pytest.mark.asyncio
+async def test_detail_record_does_not_skip_exchange():
+    # The holder's indy detail record exists before the credential is stored
+    ids = {"connection_id": "conn", "thread_id": "thread-1"}
+    records = {
+        "/issue-credential-2.0/records/holder-1": {
+            "cred_ex_record": {
+                "cred_ex_id": "holder-1",
+                "state": "credential-received",
+                **ids,
+            },
+            "indy": {"cred_ex_id": "holder-1"},
+        },
+        "/issue-credential-2.0/records/issuer-1": {
+            "cred_ex_record": {
+                "cred_ex_id": "issuer-1",
+                "state": "credential-issued",
+                **ids,
+            },
+        },
+    }
+    holder = FakeController({}, records)
+    issuer = FakeController({}, records)
+    state = FlowState(
+        INDY_ISSUE_CREDENTIAL_V2.name,
+        {"issuer_cred_ex_id": "issuer-1", "holder_cred_ex_id": "holder-1"},
+        step=6,
+    )
+    await FlowScheduler()._recover(
+        INDY_ISSUE_CREDENTIAL_V2, {"issuer": issuer, "holder": holder}, state
+    )
+    # The credential is still to be stored
+    assert state.step == 6
+    assert state.taken == []
+
+
+@pytest.mark.asyncio
+async def test_resume_past_awaited_state():
+    # Both records moved on to done while waiting for credential-received
+    ids = {"connection_id": "conn", "thread_id": "thread-1"}
+    records = {
+        f"/issue-credential-2.0/records/{cred_ex_id}": {
+            "cred_ex_record": {"cred_ex_id": cred_ex_id, "state": "done", **ids},
+            "indy": {"cred_ex_id": cred_ex_id},
+        }
+        for cred_ex_id in ("holder-1", "issuer-1")
+    }
+    holder = FakeController({}, records)
+    issuer = FakeController({}, records)
+    state = FlowState(
+        INDY_ISSUE_CREDENTIAL_V2.name,
+        {"issuer_cred_ex_id": "issuer-1", "holder_cred_ex_id": "holder-1"},
+        step=5,
+    )
+    await FlowScheduler()._recover(
+        INDY_ISSUE_CREDENTIAL_V2, {"issuer": issuer, "holder": holder}, state
+    )
+    assert state.step == len(INDY_ISSUE_CREDENTIAL_V2.transitions)
+    assert state["holder_cred_ex"].state == "done"
@@ -0,0 +1,44 @@
+"""Test the event journal."""
+
+import pytest
+
+from acapy_controller.events import Event, FanOutQueue
+from acapy_controller.journal import EventJournal
+
+
+def _event(i: int) -> Event:
+    return Event("connections", {"connection_id": str(i), "state": "active"}, "w")
+
+
+def test_rotation_scan_and_recovery(tmp_path):
+    journal = EventJournal(tmp_path, segment_size=512, max_segments=3)
+    for i in range(40):
+        journal.append(_event(i), timestamp=1000.0 + i)
+
+    segments = sorted(tmp_path.glob("*.seg"))
+    assert len(segments) == 3
+    assert [entry.seq for entry in journal.tail(3)] == [38, 39, 40]
+
+    entries = list(journal.scan(1030.0, 1033.0))
+    assert [entry.payload["connection_id"] for entry in entries] == ["30", "31", "32"]
+    assert [entry.seq for entry in journal.scan(since=37)] == [38, 39, 40]
+    journal.close()
+
+    # Reopen and keep appending after the last event
+    journal = EventJournal(tmp_path, segment_size=512, max_segments=3)
+    assert journal.last_seq == 40
+    assert journal.append(_event(40), timestamp=1040.0) == 41
+    assert journal.tail(1)[0].wallet_id == "w"
+    journal.close()
+
+
+@pytest.mark.asyncio
+async def test_replay(tmp_path):
+    with EventJournal(tmp_path) as journal:
+        for i in range(5):
+            journal.append(_event(i), timestamp=1000.0 + i)
+
+        queue = FanOutQueue()
+        assert await journal.replay(queue, start=1002.0) == 3
+        event = await queue.get(timeout=1)
+        assert event.payload["connection_id"] == "2"
@@ -0,0 +1,66 @@
+"""Test event lag measurement."""
+
+import asyncio
+import json
+import logging
+import time
+
+import pytest
+
+from acapy_controller.controller import Controller
+from acapy_controller.events import Event, FanOutQueue
+from acapy_controller.lag import Histogram, LagMonitor
+
+
+def test_histogram():
+    histogram = Histogram()
+    for value in (0.002, 0.02, 0.2, 2.0, 120.0):
+        histogram.record(value)
+    assert histogram.count == 5
+    assert histogram.quantile(0.5) == 0.25
+    assert histogram.quantile(1.0) == 120.0
+    assert histogram.summary()["max"] == 120.0
+
+
+def test_delivery_lag_warning(caplog):
+    monitor = LagMonitor(threshold=5.0)
+    now = time.time()
+    with caplog.at_level(logging.WARNING, logger="acapy_controller.lag"):
+        monitor.delivered("connections", "active", "2024-01-01T00:00:00Z", now)
+        monitor.delivered("connections", "active", "2024-01-01 00:00:00.500000Z", now)
+    assert monitor.delivery["connections", "active"].count == 2
+    assert len(caplog.records) == 1
+
+
+class OfflineController(Controller):
+    """Controller whose writes return a connection record after a delay."""
+
+    async def _request(self, method, url, **kwargs) -> bytes:
+        await asyncio.sleep(0.05)
+        return json.dumps({"connection_id": "1", "state": "request"}).encode()
+
+
+@pytest.mark.asyncio
+async def test_response_lag():
+    monitor = LagMonitor()
+    queue = FanOutQueue()
+    controller = OfflineController("http://example", event_queue=queue, lag=monitor)
+    await queue.put(Event("connections", {"connection_id": "1", "state": "start"}))
+    await controller.post("/connections/create-invitation")
+
+    # Events about other records or from before the write are not counted
+    await queue.put(Event("connections", {"connection_id": "2", "state": "active"}))
+    await controller.event_with_values("connections", state="start")
+    await controller.event_with_values("connections", connection_id="2")
+    assert not monitor.response
+
+    await queue.put(Event("connections", {"connection_id": "1", "state": "active"}))
+    await controller.event_with_values("connections", connection_id="1")
+    histogram = monitor.response["connections", "active"]
+    assert histogram.count == 1
+    assert 0.04 < histogram.max < 5
+
+    # Each write is measured once
+    await queue.put(Event("connections", {"connection_id": "1", "state": "done"}))
+    await controller.event_with_values("connections", state="done")
+    assert list(monitor.response) == [("connections", "active")]
@@ -0,0 +1,48 @@
+"""Test adaptive concurrency and circuit breaking."""
+
+import pytest
+
+from acapy_controller.controller import ControllerResponseError
+from acapy_controller.limits import AdaptiveConcurrency, CircuitBreaker, CircuitOpenError
+
+OVERLOADED = ControllerResponseError("unavailable", 503, {})
+
+
+@pytest.mark.asyncio
+async def test_aimd():
+    limit = AdaptiveConcurrency(initial=4, latency_target=1.0)
+    tokens = [await limit.acquire() for _ in range(4)]
+    assert limit.in_flight == 4
+
+    # One cut per round of requests
+    await limit.release(tokens[0], 0.1, OVERLOADED)
+    await limit.release(tokens[1], 2.0, None)
+    assert limit.limit == 2
+
+    await limit.release(tokens[2], 0.1, None)
+    assert limit.limit == 2.5
+    await limit.release(tokens[3], 0.1, ControllerResponseError("bad", 400, {}))
+    assert limit.limit > 2.5
+    assert limit.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker():
+    async def unhealthy():
+        return False
+
+    async def healthy():
+        return True
+
+    breaker = CircuitBreaker(window=4, min_requests=4, reset_timeout=0)
+    for error in (None, OVERLOADED, None, OVERLOADED):
+        await breaker.allow(unhealthy)
+        breaker.record(error)
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        await breaker.allow(unhealthy)
+    assert breaker.state == "open"
+
+    await breaker.allow(healthy)
+    assert breaker.state == "closed"
@@ -1,5 +1,8 @@
-from typing import Tuple
-from acapy_controller.controller import Minimal
+import json
+from typing import List, Tuple
+
+from acapy_controller.controller import Minimal, _deserialize_json
+from acapy_controller.models import ConnRecord, V20CredOffer
 
 
 def test_import():
@@ -16,3 +19,29 @@ def test_into(did_exchange: Tuple[Minimal, Minimal]):
     bob_conn = bob.into(ConnRecord)
     assert bob_conn.connection_protocol
     assert alice_conn.invitation_mode
+
+
+def test_deserialize_json_list():
+    raw = b'[{"connection_id": "1", "state": "active"}]'
+    (validated,) = _deserialize_json(raw, List[ConnRecord])
+    (constructed,) = _deserialize_json(raw, List[ConnRecord], trusted=True)
+    assert validated == constructed
+    assert validated.connection_id == "1"
+
+
+def test_deserialize_json_nested():
+    offer = {
+        "@type": "https://didcomm.org/issue-credential/2.0/offer-credential",
+        "credential_preview": {
+            "attributes": [{"name": "name", "value": "Alice", "mime-type": "text/plain"}]
+        },
+        "formats": [{"attach_id": "indy", "format": "hlindy/cred-abstract@v2.0"}],
+        "offers~attach": [{"@id": "indy", "data": {"base64": "e30="}}],
+    }
+    raw = json.dumps(offer).encode()
+    validated = _deserialize_json(raw, V20CredOffer)
+    constructed = _deserialize_json(raw, V20CredOffer, trusted=True)
+    assert validated == constructed
+    assert constructed.credential_preview
+    assert constructed.credential_preview.attributes[0].mime_type == "text/plain"
+    assert constructed.offers_attach[0].data.base64 == "e30="
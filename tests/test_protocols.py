@@ -8,10 +8,13 @@ from acapy_controller import Controller
 from acapy_controller.protocols import (
     connection,
     didexchange,
+    anoncreds_bulk_revoke,
     anoncreds_publish_revocation,
     anoncreds_revoke,
+    indy_issue_credential_v2,
     oob_invitation,
     ConnRecord,
+    CredDefResult,
     DIDInfo,
     V10CredentialExchange,
     V10PresentationExchange,
@@ -126,3 +129,28 @@ async def test_indy_anoncreds_publish_revocation_v2(
     Testing publishing revocation
     """
     await anoncreds_publish_revocation(alice, cred_ex=alice_cred_ex_v2)
+
+
+@pytest.mark.asyncio
+async def test_indy_anoncreds_bulk_revoke(
+    alice: Controller,
+    bob: Controller,
+    alice_conn: ConnRecord,
+    bob_conn: ConnRecord,
+    cred_def: CredDefResult,
+):
+    """Testing revoking several credentials with a single publish."""
+    cred_exs = []
+    for _ in range(3):
+        alice_cred_ex, _ = await indy_issue_credential_v2(
+            alice,
+            bob,
+            alice_conn.connection_id,
+            bob_conn.connection_id,
+            cred_def.credential_definition_id,
+            {"firstname": "Bob", "lastname": "Builder"},
+        )
+        cred_exs.append(alice_cred_ex)
+
+    rrid2crid = await anoncreds_bulk_revoke(alice, cred_exs, notify=True)
+    assert sum(len(crids) for crids in rrid2crid.values()) == 3
@@ -0,0 +1,105 @@
+"""Test bulk tenant provisioning."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List
+
+import pytest
+
+from acapy_controller.provisioning import (
+    ProvisionedTenant,
+    Step,
+    TenantManifest,
+    provision_tenants,
+)
+
+
+class FakePool:
+    """Stand-in for a tenant pool creating numbered wallets."""
+
+    def __init__(self):
+        self.created: List[str] = []
+        self.registered: Dict[str, Any] = {}
+
+    async def create(self, label, wallet_type="askar", **options):
+        self.created.append(label)
+        return {"wallet_id": f"wallet-{label}", "token": f"token-{label}"}
+
+    def register(self, wallet_id, token=None, **kwargs):
+        self.registered[wallet_id] = token
+
+    @asynccontextmanager
+    async def tenant(self, wallet_id):
+        yield wallet_id
+
+
+@pytest.mark.asyncio
+async def test_provisioning_resumes_from_manifest(tmp_path):
+    calls: List[str] = []
+    fail = {"b"}
+
+    async def _flaky(tenant, entry: ProvisionedTenant):
+        calls.append(entry.label)
+        if entry.label in fail:
+            raise RuntimeError("agent unavailable")
+        return {"did": f"did-{entry.label}"}
+
+    steps = [Step("flaky", _flaky)]
+    pool = FakePool()
+    manifest = TenantManifest(tmp_path / "tenants.jsonl")
+    results = {
+        tenant.label: tenant
+        async for tenant in provision_tenants(
+            pool,
+            ["a", "b"],
+            steps=steps,
+            manifest=manifest,
+            rate=1000,
+        )
+    }
+    assert results["a"].values == {"did": "did-a"}
+    assert results["b"].error == "RuntimeError: agent unavailable"
+    assert results["b"].wallet_id == "wallet-b"
+
+    fail.clear()
+    calls.clear()
+    pool = FakePool()
+    manifest = TenantManifest(tmp_path / "tenants.jsonl")
+    results = {
+        tenant.label: tenant
+        async for tenant in provision_tenants(
+            pool,
+            ["a", "b"],
+            steps=steps,
+            manifest=manifest,
+        )
+    }
+    assert pool.created == []
+    assert calls == ["b"]
+    # Tokens are not written to the manifest; the pool requests new ones
+    assert "token-" not in (tmp_path / "tenants.jsonl").read_text()
+    assert pool.registered == {"wallet-a": None, "wallet-b": None}
+    assert results["b"].error is None
+    assert results["b"].values == {"did": "did-b"}
+
+
+@pytest.mark.asyncio
+async def test_slow_steps_do_not_hold_up_creation():
+    release = asyncio.Event()
+
+    async def _slow(tenant, entry: ProvisionedTenant):
+        await release.wait()
+        return {}
+
+    pool = FakePool()
+    provisioning = provision_tenants(
+        pool, ["a", "b", "c"], steps=[Step("slow", _slow)], concurrency=1
+    )
+    first = asyncio.ensure_future(anext(provisioning))
+    for _ in range(10):
+        await asyncio.sleep(0)
+    assert pool.created == ["a", "b", "c"]
+
+    release.set()
+    assert (await first).steps == ["slow"]
+    assert len([tenant async for tenant in provisioning]) == 2
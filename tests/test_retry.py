@@ -0,0 +1,54 @@
+"""Test the retry policy."""
+
+import pytest
+
+from acapy_controller.controller import ControllerResponseError
+from acapy_controller.retry import RetryPolicy, RetryRoute, parse_retry_after
+
+
+def failing(*statuses: int):
+    """Return an attempt failing with statuses before succeeding."""
+    remaining = list(statuses)
+
+    async def _attempt():
+        if remaining:
+            status = remaining.pop(0)
+            raise ControllerResponseError("failed", status, {"Retry-After": "0"})
+        return b"ok"
+
+    return _attempt
+
+
+@pytest.mark.asyncio
+async def test_get_retried():
+    policy = RetryPolicy(base_delay=0)
+    assert await policy.call("GET", "/status", failing(503, 504)) == b"ok"
+    assert policy.stats.attempts == 3
+    assert policy.stats.retries == {"status 503": 1, "status 504": 1}
+
+
+@pytest.mark.asyncio
+async def test_post_retried_only_when_opted_in():
+    policy = RetryPolicy(base_delay=0, routes=[RetryRoute("POST", r"/wallet/did/create")])
+    with pytest.raises(ControllerResponseError):
+        await policy.call("POST", "/connections/create-invitation", failing(503))
+    assert await policy.call("POST", "/wallet/did/create", failing(503)) == b"ok"
+    assert await policy.call("POST", "/any", failing(503), retry=True) == b"ok"
+
+
+@pytest.mark.asyncio
+async def test_attempts_exhausted():
+    policy = RetryPolicy(attempts=2, base_delay=0)
+    with pytest.raises(ControllerResponseError):
+        await policy.call("GET", "/status", failing(503, 503, 503))
+    assert policy.stats.exhausted == 1
+
+    with pytest.raises(ControllerResponseError):
+        await policy.call("GET", "/status", failing(400))
+    assert policy.stats.exhausted == 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
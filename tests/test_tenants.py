@@ -0,0 +1,157 @@
+"""Test the tenant pool."""
+
+import asyncio
+import base64
+import json
+import logging
+import time
+
+from aiohttp import ClientSession
+import pytest
+import pytest_asyncio
+
+from acapy_controller.controller import Controller
+from acapy_controller.events import EventHub
+from acapy_controller.tenants import TenantPool, token_expiry
+
+
+def jwt(claims):
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=")
+    return f"eyJhbGciOiJIUzI1NiJ9.{payload.decode()}.signature"
+
+
+def token(wallet_id, expires_in=3600.0):
+    return jwt({"wallet_id": wallet_id, "exp": int(time.time() + expires_in)})
+
+
+class FakeAgency(Controller):
+    """Base wallet controller of an agent issuing subwallet tokens."""
+
+    def __init__(self, **options):
+        super().__init__("http://agency.invalid", **options)
+        self.refreshed = []
+
+    async def _request(self, method, url, **kwargs) -> bytes:
+        wallet_id = url.split("/")[3]
+        if method == "POST" and url.endswith("/token"):
+            self.refreshed.append(wallet_id)
+            return json.dumps({"token": token(wallet_id)}).encode()
+        settings = {"default_label": wallet_id, "wallet.type": "askar"}
+        return json.dumps({"wallet_id": wallet_id, "settings": settings}).encode()
+
+
+@pytest_asyncio.fixture
+async def agency():
+    yield FakeAgency()
+
+
+@pytest_asyncio.fixture
+async def pool(agency):
+    # Open the pool without connecting its hub to a WS
+    pool = TenantPool(agency, max_active=2)
+    pool._hub = EventHub(agency)
+    async with ClientSession() as pool._session:
+        yield pool
+
+
+def test_token_expiry():
+    assert token_expiry(jwt({"wallet_id": "1", "exp": 1700000000})) == 1700000000
+    assert token_expiry(jwt({"wallet_id": "1"})) is None
+    assert token_expiry("not a token") is None
+
+
+@pytest.mark.asyncio
+async def test_evicts_least_recently_used(pool):
+    for wallet_id in "abc":
+        pool.register(wallet_id, token(wallet_id))
+    await pool.get("a")
+    await pool.get("b")
+    await pool.get("a")
+    await pool.get("c")
+
+    assert list(pool._active) == ["a", "c"]
+    assert set(pool._hub.queues) == {"a", "c"}
+    assert set(pool._locks) == {"a", "c"}
+
+
+@pytest.mark.asyncio
+async def test_in_use_not_evicted(pool, caplog):
+    pool.max_active = 1
+    async with pool.tenant("a") as alice:
+        assert alice.wallet_id == "a"
+        with caplog.at_level(logging.WARNING, logger="acapy_controller.tenants"):
+            await pool.get("b")
+        assert list(pool._active) == ["a", "b"]
+        assert "exceeding max_active" in caplog.text
+
+    await pool.get("c")
+    assert list(pool._active) == ["c"]
+    assert set(pool._locks) == {"c"}
+
+
+@pytest.mark.asyncio
+async def test_refreshes_expiring_token(pool, agency):
+    pool.register("a", token("a", expires_in=30), label="a", wallet_type="askar")
+    alice = await pool.get("a")
+    assert agency.refreshed == ["a"]
+    assert alice.subwallet_token == pool.tenants["a"].token
+
+    # Tokens expiring later than refresh_margin are kept
+    await pool.get("a")
+    assert agency.refreshed == ["a"]
+
+    pool.tenants["a"].token = token("a", expires_in=pool.refresh_margin / 2)
+    await pool.refresh_expiring()
+    assert agency.refreshed == ["a", "a"]
+    assert alice.headers["Authorization"] == f"Bearer {pool.tenants['a'].token}"
+
+
+@pytest.mark.asyncio
+async def test_hub_routes_by_wallet_id(agency):
+    hub = EventHub(agency)
+    alice, bob = hub.queue("a"), hub.queue("b")
+
+    def message(wallet_id):
+        return json.dumps(
+            {
+                "topic": "connections",
+                "payload": {"state": "active"},
+                "wallet_id": wallet_id,
+            }
+        )
+
+    await hub._handle_message(message("a"))
+    await hub._handle_message(message("c"))
+    hub.drop("b")
+    await hub._handle_message(message("b"))
+
+    assert [event.wallet_id for event in alice.flush()] == ["a"]
+    assert bob.empty()
+    assert set(hub.queues) == {"a"}
+
+
+@pytest.mark.asyncio
+async def test_refreshes_held_tenants(pool):
+    pool.refresh_interval = 0.01
+    pool._refresher = asyncio.ensure_future(pool._refresh_periodically())
+    async with pool.tenant("a") as alice:
+        pool.tenants["a"].token = token("a", expires_in=1)
+        await asyncio.sleep(0.05)
+        assert pool.tenants["a"].expires > time.time() + pool.refresh_margin
+        assert alice.headers["Authorization"] == f"Bearer {pool.tenants['a'].token}"
+    pool._refresher.cancel()
+
+
+@pytest.mark.asyncio
+async def test_tenants_send_agency_headers():
+    agency = FakeAgency(headers={"x-api-key": "secret"})
+    pool = TenantPool(agency, headers={"x-request": "1"})
+    pool._hub = EventHub(agency)
+    async with ClientSession() as pool._session:
+        alice = await pool.get("a")
+
+    assert alice.headers == {
+        "x-api-key": "secret",
+        "x-request": "1",
+        "Authorization": f"Bearer {pool.tenants['a'].token}",
+    }